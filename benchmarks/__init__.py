@@ -0,0 +1,25 @@
+"""Набор бенчмарков приложения.
+
+Запуск: python -m benchmarks (см. benchmarks/__main__.py).
+
+- micro — микробенчмарки моделей, get_currencies, отрисовки
+  шаблонов и find_user_by_id при разном числе пользователей;
+- load — нагрузка на запущенный в процессе сервер с локальной
+  заглушкой ленты курсов: пропускная способность и p50/p99 по маршрутам.
+
+Заглушка ленты (stub_feed) общая для бенчмарков и тестов.
+
+База данных и история курсов приложения на время замеров создаются во временном
+каталоге до импорта любого модуля myapp, чтобы не трогать рабочие файлы
+приложения; при выходе из процесса каталог удаляется.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="myapp-benchmarks-")
+atexit.register(shutil.rmtree, _WORKDIR, ignore_errors=True)
+os.environ.setdefault("MYAPP_DB", os.path.join(_WORKDIR, "myapp.sqlite3"))
+os.environ.setdefault("MYAPP_HISTORY", os.path.join(_WORKDIR, "history"))
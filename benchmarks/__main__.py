@@ -0,0 +1,71 @@
+"""Запуск бенчмарков из командной строки.
+
+Примеры:
+    python -m benchmarks --output before.json
+    python -m benchmarks --output after.json --baseline before.json --threshold 0.1
+
+С --baseline результаты сравниваются с сохранёнными; если какой-либо
+показатель ухудшился больше чем на threshold, код возврата — 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .stub_feed import install_stub_feed, uninstall_stub_feed
+
+from . import load, micro
+from .harness import build_report, compare, format_results, load_report, save_report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Разбирает аргументы, выполняет бенчмарки и возвращает код возврата."""
+    parser = argparse.ArgumentParser(description="Бенчмарки CurrenciesListApp.")
+    parser.add_argument(
+        "--suite",
+        choices=("all", "micro", "load"),
+        default="all",
+        help="какие бенчмарки запускать",
+    )
+    parser.add_argument("--quick", action="store_true", help="короткий прогон для проверки")
+    parser.add_argument("--output", help="сохранить результаты в JSON-файл")
+    parser.add_argument("--baseline", help="JSON-файл прошлого прогона для сравнения")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="допустимое ухудшение (доля, 0.1 = 10%%)"
+    )
+    parser.add_argument("--duration", type=float, default=2.0, help="секунд нагрузки на маршрут")
+    parser.add_argument("--concurrency", type=int, default=4, help="число клиентов нагрузки")
+    args = parser.parse_args(argv)
+
+    results = {}
+    install_stub_feed()
+    try:
+        if args.suite in ("all", "micro"):
+            if args.quick:
+                results.update(micro.run(min_time=0.02, user_counts=(100, 10_000)))
+            else:
+                results.update(micro.run())
+        if args.suite in ("all", "load"):
+            duration = min(args.duration, 0.3) if args.quick else args.duration
+            results.update(load.run(duration=duration, concurrency=args.concurrency))
+    finally:
+        uninstall_stub_feed()
+
+    print(format_results(results))
+    if args.output:
+        save_report(build_report(results), args.output)
+    if args.baseline:
+        regressions = compare(load_report(args.baseline)["results"], results, args.threshold)
+        if regressions:
+            print("\nРегрессии:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("\nРегрессий нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Общие средства бенчмарков: замер, сохранение и сравнение результатов.
+
+Результат одного бенчмарка — словарь с обязательными ключами
+value (главный показатель), unit и better ('lower' или 'higher');
+остальные ключи (min, p99_ms, requests, ...) справочные.
+Результаты прогона сохраняются в JSON вместе с версией Python
+и платформой, чтобы прогоны можно было сравнивать.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+Result = Dict[str, Any]
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> Result:
+    """Замеряет время одного вызова func в микросекундах.
+
+    Число вызовов в серии подбирается так, чтобы серия длилась
+    не меньше min_time секунд; серия повторяется repeat раз.
+
+    Возвращает:
+        Результат с медианой (value) и минимумом по сериям.
+    """
+    func()  # прогрев: первый вызов может заполнять кэши
+    number = 1
+    while True:
+        elapsed = _run(func, number)
+        if elapsed >= min_time / 10 or number >= 1_000_000:
+            break
+        number *= 10
+    number = max(1, math.ceil(number * min_time / max(elapsed, 1e-9)))
+    timings = [_run(func, number) / number * 1e6 for _ in range(repeat)]
+    return {
+        "value": statistics.median(timings),
+        "min": min(timings),
+        "unit": "us",
+        "better": "lower",
+        "number": number,
+    }
+
+
+def _run(func: Callable[[], Any], number: int) -> float:
+    """Вызывает func number раз и возвращает затраченное время в секундах."""
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - started
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Возвращает перцентиль fraction (0..1) по методу ближайшего ранга.
+
+    Исключения:
+        ValueError: если values пуст или fraction вне [0, 1].
+    """
+    if not values:
+        raise ValueError("Нет значений для перцентиля.")
+    if not 0 <= fraction <= 1:
+        raise ValueError("Доля перцентиля должна быть от 0 до 1.")
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_report(results: Dict[str, Result]) -> Dict[str, Any]:
+    """Оформляет результаты прогона для сохранения в JSON."""
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Сохраняет отчёт в файл path."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Читает отчёт из файла path."""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(
+    baseline: Dict[str, Result], current: Dict[str, Result], threshold: float = 0.1
+) -> List[str]:
+    """Сравнивает результаты с базовыми и возвращает найденные регрессии.
+
+    Регрессия — ухудшение главного показателя больше чем на долю
+    threshold. Бенчмарки, которых нет в одном из прогонов, пропускаются.
+
+    Исключения:
+        ValueError: если threshold отрицательный.
+    """
+    if threshold < 0:
+        raise ValueError("Порог регрессии не может быть отрицательным.")
+    regressions = []
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name]["value"], current[name]["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        if current[name].get("better", "lower") == "higher":
+            change = -change
+        if change > threshold:
+            unit = current[name].get("unit", "")
+            regressions.append(
+                f"{name}: {old:.4g} -> {new:.4g} {unit} (хуже на {change:.0%})"
+            )
+    return regressions
+
+
+def format_results(results: Dict[str, Result]) -> str:
+    """Форматирует результаты в виде таблицы для вывода в терминал."""
+    width = max((len(name) for name in results), default=0)
+    lines = []
+    for name, result in results.items():
+        extra = ", ".join(
+            f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in sorted(result.items())
+            if key not in ("value", "unit", "better")
+        )
+        lines.append(f"{name:<{width}}  {result['value']:>12.4g} {result['unit']:<6} {extra}")
+    return "\n".join(lines)
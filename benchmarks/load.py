@@ -0,0 +1,131 @@
+"""Нагрузочный прогон: сервер приложения запускается в этом же процессе.
+
+Сервер (ThreadPoolHTTPServer с MyRequestHandler) слушает свободный
+порт, курсы берутся с локальной заглушки ленты. Каждый маршрут
+нагружается отдельно в течение duration секунд: concurrency
+клиентов по постоянным (keep-alive) соединениям отправляют запросы
+друг за другом. Клиенты работают в том же процессе, что и сервер,
+поэтому результаты годятся для сравнения прогонов между собой,
+а не как абсолютная производительность.
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from myapp.myapp import MyRequestHandler
+from myapp.servers import ThreadPoolHTTPServer
+
+from .harness import Result, percentile
+
+ROUTES = (
+    "/",
+    "/users",
+    "/user/1",
+    "/currencies",
+    "/currency/USD",
+    "/convert?from=USD&to=EUR&amount=100",
+    "/author",
+)
+
+
+class _QuietHandler(MyRequestHandler):
+    """MyRequestHandler без журнала запросов."""
+
+    def log_message(self, format: str, *args) -> None:
+        """Не выводит журнал запросов во время замеров."""
+
+
+def run(
+    routes: Sequence[str] = ROUTES,
+    duration: float = 2.0,
+    concurrency: int = 4,
+    threads: int = 8,
+) -> Dict[str, Result]:
+    """Нагружает маршруты routes и возвращает результаты по каждому.
+
+    Заглушка ленты курсов должна быть уже запущена (install_stub_feed).
+
+    Аргументы:
+        routes: Пути запросов (с query-параметрами).
+        duration: Длительность нагрузки на один маршрут, в секундах.
+        concurrency: Число одновременных клиентов.
+        threads: Число рабочих потоков сервера.
+
+    Исключения:
+        ValueError: если duration или concurrency не больше нуля.
+    """
+    if duration <= 0 or concurrency <= 0:
+        raise ValueError("Длительность и число клиентов должны быть больше нуля.")
+    server = ThreadPoolHTTPServer(("127.0.0.1", 0), _QuietHandler, max_workers=threads)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results: Dict[str, Result] = {}
+    try:
+        port = server.server_address[1]
+        for route in routes:
+            latencies, errors, elapsed = _load_route(port, route, duration, concurrency)
+            name = f"load.{route.partition('?')[0]}"
+            results[f"{name}.throughput"] = {
+                "value": len(latencies) / elapsed,
+                "unit": "req/s",
+                "better": "higher",
+                "requests": len(latencies),
+                "errors": errors,
+            }
+            for label, fraction in (("p50", 0.5), ("p99", 0.99)):
+                results[f"{name}.{label}"] = {
+                    "value": percentile(latencies, fraction) * 1000 if latencies else 0.0,
+                    "unit": "ms",
+                    "better": "lower",
+                }
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+    return results
+
+
+def _load_route(
+    port: int, route: str, duration: float, concurrency: int
+) -> Tuple[List[float], int, float]:
+    """Нагружает один маршрут.
+
+    Возвращает:
+        Времена ответов в секундах, число ответов с кодом не 2xx/3xx
+        и фактическую длительность нагрузки.
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def client() -> None:
+        own: List[float] = []
+        failed = 0
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                connection.request("GET", route)
+                response = connection.getresponse()
+                response.read()
+                own.append(time.perf_counter() - sent)
+                if response.status >= 400:
+                    failed += 1
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(own)
+                errors[0] += failed
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
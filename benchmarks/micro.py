@@ -0,0 +1,123 @@
+"""Микробенчмарки: модели, курсы валют, шаблоны, поиск пользователя, статистика курсов.
+
+Курсы загружаются с локальной заглушки ленты (benchmarks/stub_feed.py),
+поэтому замеры не зависят от сети.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import random
+import tempfile
+from typing import Callable, Dict, Sequence
+
+import myapp.myapp as app
+from myapp.models import Currency, User, UserCurrency
+from myapp.utils import currencies_api
+from myapp.utils.analytics import RateAnalytics
+from myapp.utils.repository import Repository
+
+from .harness import Result, measure
+
+# Число пользователей в базе для замеров find_user_by_id
+USER_COUNTS = (100, 10_000, 100_000)
+
+
+def run(min_time: float = 0.2, user_counts: Sequence[int] = USER_COUNTS) -> Dict[str, Result]:
+    """Выполняет все микробенчмарки.
+
+    Заглушка ленты курсов должна быть уже запущена (install_stub_feed).
+
+    Аргументы:
+        min_time: Минимальная длительность одной серии вызовов, в секундах.
+        user_counts: Размеры базы для замеров find_user_by_id.
+    """
+    results: Dict[str, Result] = {}
+    for name, func in _model_benchmarks().items():
+        results[f"micro.model.{name}"] = measure(func, min_time)
+    results["micro.get_currencies.cached"] = measure(currencies_api.get_currencies, min_time)
+
+    results["micro.get_currencies.refresh"] = measure(currencies_api.rates.refresh, min_time)
+    for name, func in _template_benchmarks().items():
+        results[f"micro.render.{name}"] = measure(func, min_time)
+    for count in user_counts:
+        results[f"micro.find_user_by_id.{count}"] = _find_user_benchmark(count, min_time)
+    results.update(_analytics_benchmarks(min_time))
+    return results
+
+
+def _model_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Возвращает функции создания моделей (с проверками в сеттерах)."""
+    return {
+        "Currency": lambda: Currency(1, 840, "USD", "Доллар США", 80.7513, 1),
+        "User": lambda: User(1, "Ivan"),
+        "UserCurrency": lambda: UserCurrency(1, 1, 840),
+    }
+
+
+def _template_benchmarks() -> Dict[str, Callable[[], str]]:
+    """Возвращает функции отрисовки каждого шаблона с данными приложения."""
+    common = dict(
+        app_name=app.app_info.name,
+        author_name=app.main_author.name,
+        group=app.main_author.group,
+        navigation=app.build_navigation(),
+    )
+    currencies = currencies_api.get_currencies()
+    users = [User(number, f"User {number}") for number in range(1, app.USERS_PAGE_SIZE + 1)]
+    return {
+        "index.html": lambda: app.template_index.render(
+            app_version=app.app_info.version, **common
+        ),
+        "author.html": lambda: app.template_author.render(**common),
+        "users.html": lambda: app.template_users.render(
+            page=users, query="", limit=app.USERS_PAGE_SIZE, **common
+        ),
+        "currencies.html": lambda: app.template_currencies.render(
+            currencies=currencies, **common
+        ),
+        "user_detail.html": lambda: app.template_user_detail.render(
+            user=users[0], subscriptions=currencies[:2], **common
+        ),
+    }
+
+
+def _analytics_benchmarks(min_time: float) -> Dict[str, Result]:
+    """Замеряет учёт нового дня в статистике (все валюты ленты) и чтение статистики."""
+    rows = [
+        (currency.char_code, currency.value, currency.nominal)
+        for currency in currencies_api.get_currencies()
+    ]
+    analytics = RateAnalytics(window=30)
+    day = dt.date(2000, 1, 1)
+
+    def update() -> None:
+        nonlocal day
+        day += dt.timedelta(days=1)
+        analytics.update(day, rows)
+
+    results = {"micro.analytics.update_day": measure(update, min_time)}
+    results["micro.analytics.stats"] = measure(lambda: analytics.stats("USD"), min_time)
+    return results
+
+
+def _find_user_benchmark(count: int, min_time: float) -> Result:
+    """Замеряет find_user_by_id в базе из count пользователей."""
+    with tempfile.TemporaryDirectory(prefix="myapp-bench-") as directory:
+        repository = Repository(os.path.join(directory, "users.sqlite3"))
+        repository.add_users(User(number, f"User {number}") for number in range(1, count + 1))
+        ids = [random.randint(1, count) for _ in range(1024)]
+        position = 0
+
+        def find() -> None:
+            nonlocal position
+            position = (position + 1) & 1023
+            app.find_user_by_id(ids[position])
+
+        previous, app.REPOSITORY = app.REPOSITORY, repository
+        try:
+            return measure(find, min_time)
+        finally:
+            app.REPOSITORY = previous
+            repository.close()
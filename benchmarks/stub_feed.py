@@ -0,0 +1,108 @@
+"""Локальная заглушка XML-ленты курсов ЦБ РФ для бенчмарков и тестов.
+
+Сервер отдаёт записанный документ из benchmarks/data и поддерживает
+условные запросы (ETag и Last-Modified), как настоящая лента.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from myapp.utils import currencies_api
+from myapp.utils.cbr_client import CbrClient
+
+DATA_DIR = Path(__file__).parent / "data"
+DAILY_XML = DATA_DIR / "XML_daily.xml"
+
+
+class StubFeedServer:
+    """HTTP-сервер, отдающий записанный XML с курсами.
+
+    Атрибуты:
+        body: Отдаваемый документ.
+        requests: Количество полученных запросов.
+        not_modified: Количество ответов 304.
+    """
+
+    def __init__(self, body: Optional[bytes] = None) -> None:
+        """Запускает сервер на свободном порту в фоновом потоке."""
+        self.requests = 0
+        self.not_modified = 0
+        self.set_body(body if body is not None else DAILY_XML.read_bytes())
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Обработчик заглушки: отдаёт документ или 304."""
+
+            def do_GET(self) -> None:
+                """Отвечает на условный или обычный GET-запрос."""
+                stub.requests += 1
+                if self.headers.get("If-None-Match") == stub.etag:
+                    stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", stub.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml; charset=windows-1251")
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.send_header("ETag", stub.etag)
+                self.send_header("Last-Modified", stub.last_modified)
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format: str, *args) -> None:
+                """Не выводит журнал запросов заглушки."""
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/scripts/XML_daily.asp"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def set_body(self, body: bytes) -> None:
+        """Заменяет отдаваемый документ (меняются ETag и Last-Modified)."""
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.last_modified = formatdate(usegmt=True)
+
+    def close(self) -> None:
+        """Останавливает сервер."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+
+_previous_client: Optional[CbrClient] = None
+_active_stub: Optional[StubFeedServer] = None
+
+
+def install_stub_feed() -> StubFeedServer:
+    """Запускает заглушку, направляет на неё get_currencies и загружает курсы."""
+    global _previous_client, _active_stub
+    _active_stub = StubFeedServer()
+    _previous_client = currencies_api.get_client()
+    currencies_api.set_client(CbrClient(url=_active_stub.url))
+    currencies_api.rates.refresh()
+    return _active_stub
+
+
+def get_active_stub() -> Optional[StubFeedServer]:
+    """Возвращает заглушку, запущенную install_stub_feed (или None)."""
+    return _active_stub
+
+
+def uninstall_stub_feed() -> None:
+    """Останавливает заглушку и возвращает прежнего клиента."""
+    global _previous_client, _active_stub
+    if _active_stub is not None:
+        currencies_api.get_client().close()
+        _active_stub.close()
+        _active_stub = None
+    if _previous_client is not None:
+        currencies_api.set_client(_previous_client)
+        _previous_client = None
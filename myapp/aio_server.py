@@ -0,0 +1,390 @@
+"""Модуль асинхронного HTTP-сервера на asyncio.
+
+Сервер держит тысячи постоянных (keep-alive) соединений в одном
+процессе без отдельного потока на соединение: ожидание данных
+от клиента стоит только одну сопрограмму.
+
+Маршруты задаёт класс обработчика (в приложении — MyRequestHandler,
+его передаёт run_server): каждый запрос передаётся обработчику в пуле
+потоков, поэтому блокирующая работа (например, запросы к базе)
+никогда не останавливает цикл событий. Тело запроса
+обработчик читает из соединения сам, а ответ уходит клиенту по мере
+записи (потоковые страницы — частями chunked), без буферизации целиком.
+Оставить ли соединение открытым, решает обработчик (close_connection).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Awaitable, Optional, Tuple, Type, TypeVar
+
+from .utils.metrics import CountingWriter
+
+T = TypeVar("T")
+
+
+def _parse_headers(head: bytes) -> dict:
+    """Разбирает заголовки запроса; имена приводятся к нижнему регистру."""
+    headers = {}
+    for line in head.decode("iso-8859-1").split("\r\n")[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _content_length(headers: dict) -> int:
+    """Возвращает длину тела из Content-Length (-1, если она неверна)."""
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        return -1
+    return int(value)
+
+
+def _error_response(status: int, reason: str) -> bytes:
+    """Возвращает ответ об ошибке без тела, после которого соединение закрывается."""
+    return (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Length: 0\r\nConnection: close\r\n\r\n"
+    ).encode("ascii")
+
+
+class _ConnectionIO:
+    """Доступ к соединению asyncio из потока обработчика.
+
+    Каждая операция выполняется в цикле событий и ждёт завершения
+    не дольше timeout секунд; по истечении бросается TimeoutError.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout: float,
+    ) -> None:
+        """Запоминает цикл событий, потоки соединения и таймаут."""
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+
+    def call(self, operation: Awaitable[T]) -> T:
+        """Выполняет operation в цикле событий и возвращает результат."""
+        return asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(operation, self.timeout), self.loop
+        ).result()
+
+
+class _RequestFile:
+    """Поток запроса: заголовок из буфера, тело — из соединения по мере чтения.
+
+    Атрибуты:
+        remaining: Сколько байтов тела обработчик ещё не прочитал.
+    """
+
+    def __init__(self, head: bytes, length: int, connection: _ConnectionIO) -> None:
+        """Запоминает уже прочитанный заголовок и длину тела."""
+        self._head = io.BytesIO(head)
+        self._connection = connection
+        self.remaining = length
+
+    def readline(self, limit: int = -1) -> bytes:
+        """Читает строку заголовка."""
+        return self._head.readline(limit)
+
+    def read(self, size: int = -1) -> bytes:
+        """Читает до size байтов тела (всё тело, если size < 0)."""
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        try:
+            data = self._connection.call(self._connection.reader.readexactly(size))
+        except asyncio.IncompleteReadError as error:
+            data = error.partial
+            self.remaining = 0
+        self.remaining -= len(data)
+        return data
+
+
+class _ResponseFile:
+    """Поток ответа: каждая запись сразу уходит в соединение.
+
+    Запись ждёт, пока буфер транспорта освободится (drain), поэтому
+    медленный клиент задерживает обработчик, а не копит ответ в памяти.
+    """
+
+    closed = False
+
+    def __init__(self, connection: _ConnectionIO) -> None:
+        """Запоминает соединение."""
+        self._connection = connection
+
+    def write(self, data: bytes) -> int:
+        """Отправляет data клиенту."""
+        if data:
+            self._connection.call(self._send(data))
+        return len(data)
+
+    async def _send(self, data: bytes) -> None:
+        """Пишет data в транспорт и ждёт освобождения буфера."""
+        self._connection.writer.write(data)
+        await self._connection.writer.drain()
+
+    def flush(self) -> None:
+        """Данные уже отправлены — сбрасывать нечего."""
+
+
+def connection_handler(
+    handler_class: Type[BaseHTTPRequestHandler],
+) -> Type[BaseHTTPRequestHandler]:
+    """Возвращает подкласс handler_class для одного запроса соединения AsyncHTTPServer.
+
+    Подкласс отвечает прямо в соединение: заголовки и тело
+    отправляются по мере записи. После обработки close_connection
+    сообщает, можно ли принимать следующий запрос.
+    """
+
+    class ConnectionRequestHandler(handler_class):  # type: ignore[valid-type, misc]
+        """handler_class, обслуживающий один запрос соединения asyncio."""
+
+        def __init__(
+            self,
+            rfile: _RequestFile,
+            wfile: CountingWriter,
+            client_address: Tuple[str, int],
+            server: Any,
+            last_request: bool = False,
+        ) -> None:
+            """Обрабатывает запрос из rfile и пишет ответ в wfile.
+
+            Аргументы:
+                rfile: Поток запроса.
+                wfile: Поток ответа.
+                client_address: Адрес клиента.
+                server: Объект сервера (доступен обработчику как self.server).
+                last_request: Последний ли это запрос соединения
+                    (тогда ответ получит Connection: close).
+            """
+            self.request = None
+            self.client_address = client_address
+            self.server = server
+            self.rfile = rfile
+            self.wfile = wfile
+            self.close_connection = True
+            self._last_request = last_request
+            self.handle_one_request()
+
+    ConnectionRequestHandler.__name__ = f"Connection{handler_class.__name__}"
+    return ConnectionRequestHandler
+
+
+class AsyncHTTPServer:
+    """Асинхронный HTTP/1.1-сервер с постоянными соединениями.
+
+    Атрибуты:
+        handler_class: Класс обработчика запросов (подкласс
+            BaseHTTPRequestHandler, например MyRequestHandler).
+        host: Адрес сервера.
+        port: Порт сервера (0 — выбрать свободный).
+        threads: Размер пула потоков для обработчиков.
+        keepalive_timeout: Сколько секунд ждать следующего запроса.
+        max_requests: Сколько запросов обслуживать в одном соединении.
+        max_body_size: Максимальный размер тела запроса в байтах.
+    """
+
+    header_limit = 64 * 1024
+    backlog = 1024
+
+    def __init__(
+        self,
+        handler_class: Type[BaseHTTPRequestHandler],
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        threads: int = 8,
+        keepalive_timeout: float = 75.0,
+        max_body_size: int = 64 * 1024 * 1024,
+        max_requests: int = 100,
+    ) -> None:
+        """Сохраняет параметры сервера и создаёт пул потоков."""
+        self.handler_class = handler_class
+        self._connection_handler = connection_handler(handler_class)
+        self.host = host
+        self.port = port
+        self.threads = threads
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+        self.max_requests = max_requests
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="aio-handler"
+        )
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Открывает слушающий сокет и начинает принимать соединения."""
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+            limit=self.header_limit,
+            backlog=self.backlog,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Прекращает приём соединений и останавливает пул потоков."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Обработчики пишут ответ через цикл событий: ждать их, блокируя цикл, нельзя
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def serve_forever(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Обслуживает соединения до установки события stop."""
+        if self._server is None:
+            await self.start()
+        stop = stop or asyncio.Event()
+        try:
+            await stop.wait()
+        finally:
+            await self.close()
+
+    def _serve(
+        self,
+        rfile: _RequestFile,
+        connection: _ConnectionIO,
+        peer: Tuple[str, int],
+        last_request: bool,
+    ) -> bool:
+        """Выполняет запрос обработчиком (в пуле потоков).
+
+        Если обработчик упал с исключением до начала ответа, отправляет
+        ответ 500.
+
+        Возвращает:
+            True, если соединение можно использовать для следующего запроса.
+        """
+        wfile = CountingWriter(_ResponseFile(connection))
+        try:
+            handler = self._connection_handler(rfile, wfile, peer, self, last_request)
+        except Exception:
+            if not wfile.bytes_written:
+                try:
+                    wfile.write(_error_response(500, "Internal Server Error"))
+                except Exception:
+                    pass
+            return False
+        # Непрочитанный остаток тела нельзя принять за следующий запрос
+        return not handler.close_connection and not rfile.remaining
+
+    def _reject(self, headers: dict, length: int) -> Optional[bytes]:
+        """Возвращает ответ на запрос, который сервер не принимает, или None.
+
+        Тело принимается только с Content-Length не больше
+        max_body_size (неверный Content-Length — 400); тело
+        с Transfer-Encoding (например, chunked) не поддерживается —
+        иначе его части разбирались бы как следующие запросы.
+        После такого ответа соединение закрывается.
+        """
+        if "transfer-encoding" in headers:
+            return _error_response(411, "Length Required")
+        if length < 0:
+            return _error_response(400, "Bad Request")
+        if length > self.max_body_size:
+            return _error_response(413, "Payload Too Large")
+        return None
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Обслуживает все запросы одного соединения."""
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info("peername") or ("", 0)
+        connection = _ConnectionIO(loop, reader, writer, self.keepalive_timeout)
+        served = 0
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+                    )
+                except asyncio.LimitOverrunError:
+                    # Заголовок длиннее header_limit: отвечаем, прежде чем закрыть
+                    writer.write(_error_response(431, "Request Header Fields Too Large"))
+                    await writer.drain()
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                headers = _parse_headers(head)
+                length = _content_length(headers)
+                rejection = self._reject(headers, length)
+                if rejection is not None:
+                    writer.write(rejection)
+                    await writer.drain()
+                    break
+                served += 1
+                rfile = _RequestFile(head, length, connection)
+                keep_alive = await loop.run_in_executor(
+                    self._executor,
+                    self._serve,
+                    rfile,
+                    connection,
+                    peer[:2],
+                    served >= self.max_requests,
+                )
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def run_async_server(
+    handler_class: Type[BaseHTTPRequestHandler],
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    threads: int = 8,
+    keepalive_timeout: float = 75.0,
+    max_requests: int = 100,
+) -> None:
+    """Запускает асинхронный сервер и обслуживает запросы до SIGTERM/Ctrl+C.
+
+    Аргументы:
+        handler_class: Класс обработчика запросов.
+    """
+
+    async def main() -> None:
+        server = AsyncHTTPServer(
+            handler_class,
+            host,
+            port,
+            threads=threads,
+            keepalive_timeout=keepalive_timeout,
+            max_requests=max_requests,
+        )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await server.start()
+        print(
+            f"Асинхронный сервер запущен на http://{host}:{server.port}/ "
+            "(нажмите Ctrl+C для остановки)"
+        )
+        await server.serve_forever(stop)
+
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Заполнение истории курсов архивом ЦБ РФ из командной строки.
+
+Примеры:
+    python -m myapp.backfill --from 2015-01-01 --to 2024-12-31
+    python -m myapp.backfill --from 2024-01-01 --to 2024-12-31 --source recorded/
+
+Источник — адрес архива ЦБ РФ (по умолчанию) или его заглушки либо
+каталог с записанными файлами ГГГГ-ММ-ДД.xml. Прерванную загрузку
+можно запустить снова с теми же аргументами: она продолжится
+с последнего сохранённого дня. Дни раньше первого сохранённого
+(архив прошлых лет, когда сервер уже пишет историю) добавляются
+в её начало; запускать загрузку можно при работающем сервере.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import sys
+from typing import List, Optional
+
+import requests
+
+from .utils.backfill import BackfillReport, backfill
+from .utils.cbr_client import CBR_DAILY_URL
+from .utils.history import HistoryStore
+
+
+def _print_progress(report: BackfillReport) -> None:
+    """Выводит, до какого дня дописана история."""
+    print(f"записано дней: {report.written}, последний день: {report.last_date}", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Разбирает аргументы, заполняет историю и возвращает код возврата."""
+    parser = argparse.ArgumentParser(description="Заполнение истории курсов ЦБ РФ.")
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=dt.date.fromisoformat,
+        required=True,
+        help="первый день (ГГГГ-ММ-ДД)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=dt.date.fromisoformat,
+        default=dt.date.today(),
+        help="последний день (ГГГГ-ММ-ДД, по умолчанию сегодня)",
+    )
+    parser.add_argument(
+        "--source", default=CBR_DAILY_URL, help="адрес архива или каталог с файлами XML"
+    )
+    parser.add_argument(
+        "--history",
+        default=os.environ.get("MYAPP_HISTORY", "history"),
+        help="каталог истории курсов",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="число процессов (по умолчанию — все ядра)"
+    )
+    parser.add_argument("--batch", type=int, default=256, help="дней в одной записи")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.history)
+    try:
+        report = backfill(
+            store,
+            args.start,
+            args.end,
+            source=args.source,
+            workers=args.workers,
+            batch_days=args.batch,
+            progress=_print_progress,
+        )
+    except (requests.RequestException, ValueError) as error:
+        # Уже записанные пакеты сохранены: повторный запуск продолжит с них
+        print(f"Ошибка: {error}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(
+        f"Запрошено дней: {report.requested}, загружено документов: {report.loaded}, "
+        f"записано дней: {report.written}, последний день: {report.last_date}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
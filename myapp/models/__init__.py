@@ -1,7 +1,7 @@
 """Пакет моделей предметной области приложения.
 
 Здесь собираются все классы моделей:
-Author, App, User, Currency, UserCurrency.
+Author, App, User, Currency, UserCurrency, CurrencyTable.
 """
 
 from .author import Author
@@ -9,5 +9,6 @@ from .app import App
 from .user import User
 from .currency import Currency
 from .user_currency import UserCurrency
+from .currency_table import CurrencyTable
 
-_all_ = ["Author", "App", "User", "Currency", "UserCurrency"]
\ No newline at end of file
+_all_ = ["Author", "App", "User", "Currency", "UserCurrency", "CurrencyTable"]
\ No newline at end of file
@@ -19,6 +19,8 @@ class App:
         author: Объект автора приложения (экземпляр класса Author).
     """
 
+    __slots__ = ("_name", "_version", "_author")
+
     def __init__(self, name: str, version: str, author: Author) -> None:
         """Инициализирует новый объект App.
 
@@ -15,6 +15,8 @@ class Author:
         group: Учебная группа автора (например, "P3123").
     """
 
+    __slots__ = ("_name", "_group")
+
     def __init__(self, name: str, group: str) -> None:
         """Инициализация объекта Author.
 
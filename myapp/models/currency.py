@@ -6,6 +6,8 @@
 
 from __future__ import annotations
 
+from typing import Iterable, List, Sequence
+
 
 class Currency:
     """Класс Currency — описывает валюту.
@@ -19,6 +21,8 @@ class Currency:
         nominal: Номинал, за какое количество единиц указан курс.
     """
 
+    __slots__ = ("_id", "_num_code", "_char_code", "_name", "_value", "_nominal")
+
     def __init__(
         self,
         currency_id: int,
@@ -50,6 +54,51 @@ class Currency:
         self.value = value
         self.nominal = nominal
 
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[object]]) -> List[Currency]:
+        """Создаёт список валют из строк (id, num_code, char_code, name, value, nominal).
+
+        Строки проверяются и превращаются в объекты за один проход:
+        проверки встроены в цикл, а атрибуты заполняются напрямую, без
+        вызова сеттеров. Строка, не прошедшая быструю проверку (или со
+        значением подкласса int/str), создаётся обычным конструктором,
+        поэтому ошибка (тип и текст) будет той же, что и для одного объекта.
+
+        Исключения:
+            TypeError: если типы значений неверные.
+            ValueError: если числовые значения неположительные
+                или строки пустые.
+        """
+        new = object.__new__
+        result: List[Currency] = []
+        append = result.append
+        for row in rows:
+            try:
+                currency_id, num_code, char_code, name, value, nominal = row
+            except ValueError:
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            value_type = value.__class__
+            if not (
+                currency_id.__class__ is int and currency_id > 0
+                and num_code.__class__ is int and num_code > 0
+                and char_code.__class__ is str and char_code.strip()
+                and name.__class__ is str and name.strip()
+                and (value_type is float or value_type is int) and value > 0
+                and nominal.__class__ is int and nominal > 0
+            ):
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            currency = new(cls)
+            currency._id = currency_id
+            currency._num_code = num_code
+            currency._char_code = char_code
+            currency._name = name
+            currency._value = float(value)
+            currency._nominal = nominal
+            append(currency)
+        return result
+
     @property
     def id(self) -> int:
         """Возвращает идентификатор валюты."""
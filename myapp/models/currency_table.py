@@ -0,0 +1,249 @@
+"""Модуль столбцовой таблицы валют.
+
+Здесь определён класс CurrencyTable, который хранит курсы
+в непрерывных массивах NumPy (по одному массиву на поле)
+и словарь «символьный код -> номер строки». Это основа для
+векторных расчётов (конвертация, аналитика) по всем валютам сразу.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .currency import Currency
+
+
+def _frozen(column: Sequence, dtype: type) -> np.ndarray:
+    """Копирует столбец в новый массив NumPy и запрещает его изменение."""
+    array = np.array(column, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+class CurrencyTable:
+    """Класс CurrencyTable — курсы валют по столбцам.
+
+    Числовые массивы доступны только для чтения.
+
+    Атрибуты:
+        ids: Идентификаторы валют (int64).
+        num_codes: Цифровые коды валют (int64).
+        nominals: Номиналы (int64).
+        values: Курсы за номинал (float64).
+        char_codes: Символьные коды валют.
+        names: Названия валют.
+    """
+
+    __slots__ = (
+        "ids",
+        "num_codes",
+        "nominals",
+        "values",
+        "char_codes",
+        "names",
+        "_index",
+        "_id_index",
+        "_unit_rates",
+    )
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        num_codes: Sequence[int],
+        char_codes: Sequence[str],
+        names: Sequence[str],
+        values: Sequence[float],
+        nominals: Sequence[int],
+    ) -> None:
+        """Создаёт таблицу из столбцов одинаковой длины.
+
+        Исключения:
+            ValueError: если длины столбцов различаются, номиналы
+                или курсы неположительные, либо коды повторяются.
+        """
+        self.ids = _frozen(ids, np.int64)
+        self.num_codes = _frozen(num_codes, np.int64)
+        self.nominals = _frozen(nominals, np.int64)
+        self.values = _frozen(values, np.float64)
+        self.char_codes = list(char_codes)
+        self.names = list(names)
+        size = len(self.char_codes)
+        for column in (self.ids, self.num_codes, self.nominals, self.values, self.names):
+            if len(column) != size:
+                raise ValueError("Все столбцы таблицы валют должны быть одной длины.")
+        if size and (self.nominals.min() <= 0 or self.values.min() <= 0):
+            raise ValueError("Номиналы и курсы валют должны быть больше нуля.")
+        self._index: Optional[Dict[str, int]] = None
+        self._id_index: Optional[Dict[int, int]] = None
+        self._unit_rates: Optional[np.ndarray] = None
+        if len(self.index) != size:
+            raise ValueError("Символьные коды валют не должны повторяться.")
+
+    @classmethod
+    def from_currencies(cls, currencies: Sequence[Currency]) -> CurrencyTable:
+        """Создаёт таблицу из списка объектов Currency."""
+        return cls(
+            [c.id for c in currencies],
+            [c.num_code for c in currencies],
+            [c.char_code for c in currencies],
+            [c.name for c in currencies],
+            [c.value for c in currencies],
+            [c.nominal for c in currencies],
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        ids: np.ndarray,
+        num_codes: np.ndarray,
+        char_codes: Sequence[str],
+        names: Sequence[str],
+        values: np.ndarray,
+        nominals: np.ndarray,
+        unit_rates: Optional[np.ndarray] = None,
+    ) -> CurrencyTable:
+        """Создаёт таблицу поверх готовых массивов без копирования.
+
+        Используется для массивов в общей памяти: они должны быть
+        только для чтения и уже проверены тем, кто их записал.
+
+        Исключения:
+            ValueError: если какой-либо массив доступен для записи.
+        """
+        arrays = [ids, num_codes, values, nominals]
+        if unit_rates is not None:
+            arrays.append(unit_rates)
+        if any(array.flags.writeable for array in arrays):
+            raise ValueError("Массивы таблицы валют должны быть только для чтения.")
+        table = object.__new__(cls)
+        table.ids = ids
+        table.num_codes = num_codes
+        table.nominals = nominals
+        table.values = values
+        table.char_codes = list(char_codes)
+        table.names = list(names)
+        table._index = None
+        table._id_index = None
+        table._unit_rates = unit_rates
+        return table
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """Возвращает словарь «символьный код -> номер строки» (строится один раз)."""
+        if self._index is None:
+            self._index = {code: row for row, code in enumerate(self.char_codes)}
+        return self._index
+
+    @property
+    def id_index(self) -> Dict[int, int]:
+        """Возвращает словарь «идентификатор валюты -> номер строки»."""
+        if self._id_index is None:
+            self._id_index = {
+                currency_id: row for row, currency_id in enumerate(self.ids.tolist())
+            }
+        return self._id_index
+
+    def __len__(self) -> int:
+        """Возвращает количество валют в таблице."""
+        return len(self.char_codes)
+
+    def __contains__(self, char_code: object) -> bool:
+        """Проверяет наличие валюты с указанным символьным кодом."""
+        return char_code in self.index
+
+    def row_of(self, char_code: str) -> int:
+        """Возвращает номер строки валюты по символьному коду за O(1).
+
+        Исключения:
+            KeyError: если валюты с таким кодом нет.
+        """
+        return self.index[char_code]
+
+    def unit_rates(self) -> np.ndarray:
+        """Возвращает курсы за одну единицу валюты (value / nominal).
+
+        Массив вычисляется один раз и доступен только для чтения.
+        """
+        if self._unit_rates is None:
+            rates = self.values / self.nominals
+            rates.flags.writeable = False
+            self._unit_rates = rates
+        return self._unit_rates
+
+    def unit_rate(self, char_code: str) -> float:
+        """Возвращает курс одной единицы валюты по символьному коду.
+
+        Исключения:
+            KeyError: если валюты с таким кодом нет.
+        """
+        return float(self.unit_rates()[self.index[char_code]])
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Currency, CurrencyTable]:
+        """Возвращает строку (Currency) по номеру или подтаблицу по срезу.
+
+        Срез не копирует числовые массивы: подтаблица ссылается
+        на те же данные, а её индекс строится при первом обращении.
+        """
+        if isinstance(key, slice):
+            table = object.__new__(CurrencyTable)
+            table.ids = self.ids[key]
+            table.num_codes = self.num_codes[key]
+            table.nominals = self.nominals[key]
+            table.values = self.values[key]
+            table.char_codes = self.char_codes[key]
+            table.names = self.names[key]
+            table._index = None
+            table._id_index = None
+            table._unit_rates = None
+            return table
+        return self.currency(key)
+
+    def currency(self, row: int) -> Currency:
+        """Возвращает строку таблицы в виде объекта Currency."""
+        return Currency.from_rows([self._row_tuple(row)])[0]
+
+    def get(self, char_code: str) -> Optional[Currency]:
+        """Возвращает валюту по символьному коду или None."""
+        row = self.index.get(char_code)
+        return None if row is None else self.currency(row)
+
+    def select_ids(self, currency_ids: Iterable[int]) -> List[Currency]:
+        """Возвращает валюты с указанными идентификаторами в порядке таблицы.
+
+        Неизвестные идентификаторы пропускаются.
+        """
+        id_index = self.id_index
+        rows = sorted(id_index[i] for i in currency_ids if i in id_index)
+        return Currency.from_rows([self._row_tuple(row) for row in rows])
+
+    def _row_tuple(self, row: int) -> tuple:
+        """Возвращает значения строки в порядке аргументов Currency."""
+        return (
+            int(self.ids[row]),
+            int(self.num_codes[row]),
+            self.char_codes[row],
+            self.names[row],
+            float(self.values[row]),
+            int(self.nominals[row]),
+        )
+
+    def to_currencies(self) -> List[Currency]:
+        """Возвращает все строки таблицы в виде списка Currency (для шаблонов)."""
+        return Currency.from_rows(
+            list(
+                zip(
+                    self.ids.tolist(),
+                    self.num_codes.tolist(),
+                    self.char_codes,
+                    self.names,
+                    self.values.tolist(),
+                    self.nominals.tolist(),
+                )
+            )
+        )
+
+    def __iter__(self) -> Iterator[Currency]:
+        """Перебирает строки таблицы в виде объектов Currency."""
+        return iter(self.to_currencies())
@@ -6,6 +6,8 @@
 
 from __future__ import annotations
 
+from typing import Iterable, List, Sequence
+
 
 class User:
     """Класс User — представляет пользователя приложения.
@@ -15,6 +17,8 @@ class User:
         name: Имя пользователя.
     """
 
+    __slots__ = ("_id", "_name")
+
     def __init__(self, user_id: int, name: str) -> None:
         """Инициализирует нового пользователя.
 
@@ -29,6 +33,40 @@ class User:
         self.id = user_id
         self.name = name
 
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[object]]) -> List[User]:
+        """Создаёт список пользователей из строк (user_id, name).
+
+        Проверки встроены в один проход по строкам, атрибуты
+        заполняются без сеттеров. Строка, не прошедшая быструю проверку,
+        создаётся обычным конструктором, чтобы исключение совпадало
+        с исключением конструктора.
+
+        Исключения:
+            TypeError: если типы значений неверные.
+            ValueError: если id <= 0 или имя пустое.
+        """
+        new = object.__new__
+        result: List[User] = []
+        append = result.append
+        for row in rows:
+            try:
+                user_id, name = row
+            except ValueError:
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            if not (
+                user_id.__class__ is int and user_id > 0
+                and name.__class__ is str and name.strip()
+            ):
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            user = new(cls)
+            user._id = user_id
+            user._name = name
+            append(user)
+        return result
+
     @property
     def id(self) -> int:
         """Возвращает идентификатор пользователя."""
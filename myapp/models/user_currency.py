@@ -6,6 +6,8 @@
 
 from __future__ import annotations
 
+from typing import Iterable, List, Sequence
+
 
 class UserCurrency:
     """Класс UserCurrency — связь пользователя и валюты.
@@ -16,6 +18,8 @@ class UserCurrency:
         currency_id: Внешний ключ на валюту (ID из Currency).
     """
 
+    __slots__ = ("_id", "_user_id", "_currency_id")
+
     def __init__(self, relation_id: int, user_id: int, currency_id: int) -> None:
         """Инициализирует связь между пользователем и валютой.
 
@@ -32,6 +36,42 @@ class UserCurrency:
         self.user_id = user_id
         self.currency_id = currency_id
 
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[object]]) -> List[UserCurrency]:
+        """Создаёт список связей из строк (relation_id, user_id, currency_id).
+
+        Проверки встроены в один проход по строкам, атрибуты
+        заполняются без сеттеров. Строка, не прошедшая быструю проверку,
+        создаётся обычным конструктором, чтобы исключение совпадало
+        с исключением конструктора.
+
+        Исключения:
+            TypeError: если значения не являются целыми числами.
+            ValueError: если какие-либо ID меньше или равны нулю.
+        """
+        new = object.__new__
+        result: List[UserCurrency] = []
+        append = result.append
+        for row in rows:
+            try:
+                relation_id, user_id, currency_id = row
+            except ValueError:
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            if not (
+                relation_id.__class__ is int and relation_id > 0
+                and user_id.__class__ is int and user_id > 0
+                and currency_id.__class__ is int and currency_id > 0
+            ):
+                append(cls(*row))  # type: ignore[arg-type]
+                continue
+            link = new(cls)
+            link._id = relation_id
+            link._user_id = user_id
+            link._currency_id = currency_id
+            append(link)
+        return result
+
     @property
     def id(self) -> int:
         """Возвращает идентификатор записи связи."""
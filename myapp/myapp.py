@@ -2,19 +2,49 @@
 
 Запускает HTTP-сервер, настраивает окружение Jinja2
 и обрабатывает основные маршруты:
-'/', '/users', '/user', '/currencies', '/author'.
+'/', '/users', '/user', '/user/<id>', '/currencies', '/author',
+'/currency/<code>/stats' (скользящая статистика курса), а также
+JSON-маршруты '/currency/<code>' (с параметрами from и to —
+история курса за период), '/currency/<code>/stats.json' и '/convert'
+(GET — одна сумма, POST — пакет сумм в CSV или JSON).
+Маршруты перечислены в таблице ROUTER; метрики сервера
+в формате Prometheus доступны по адресу '/metrics'.
 """
 
 from __future__ import annotations
 
+import argparse
+import datetime as dt
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from urllib.parse import urlparse, parse_qs
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from jinja2 import Environment, PackageLoader, Template, select_autoescape
 
 from .models import Author, App, User
-from .utils.currencies_api import get_currencies
+from .router import Router
+from .servers import PreforkServer, ThreadPoolHTTPServer
+from .utils.batch import BodyReader, convert_batch, iter_csv_rows, iter_json_rows
+from .utils.currencies_api import (
+    RatesUnavailable,
+    analytics,
+    get_snapshot,
+    history,
+    rates,
+    use_shared_rates,
+)
+from .utils.compression import MIN_COMPRESS_SIZE, compress, negotiate
+from .utils.metrics import REGISTRY, CountingWriter
+from .utils.page_cache import PageCache
+from .utils.profiling import RouteProfiler
+from .utils.repository import MAX_ID, Repository
+from .utils.shared_rates import SharedRatesWriter
 
 
 # --- Глобальные объекты предметной области ---
@@ -28,19 +58,24 @@ app_info = App(
     author=main_author,
 )
 
-# Простейший список пользователей (пока без базы данных)
-USERS: List[User] = [
-    User(1, "Ali"),
-    User(2, "Ivan"),
-    User(3, "Maria"),
-]
 
-# Подписки: user_id -> список символьных кодов валют
-USER_SUBSCRIPTIONS: Dict[int, List[str]] = {
-    1: ["USD", "EUR"],
-    2: ["USD"],
-    3: [],
-}
+def seed_repository(repository: Repository) -> None:
+    """Заполняет пустую базу начальными пользователями и подписками."""
+    repository.add_users([
+        User(1, "Ali"),
+        User(2, "Ivan"),
+        User(3, "Maria"),
+    ])
+    # Валюта задаётся цифровым кодом: 840 — USD, 978 — EUR
+    repository.add_subscriptions([(1, 840), (1, 978), (2, 840)])
+
+
+# Пользователи и подписки хранятся в SQLite; путь к базе задаётся
+# переменной окружения MYAPP_DB. Соединения открываются при первом запросе.
+REPOSITORY = Repository(
+    os.environ.get("MYAPP_DB", "myapp.sqlite3"),
+    seed=seed_repository,
+)
 
 # --- Настройка Jinja2 Environment ---
 
@@ -54,6 +89,55 @@ template_users = env.get_template("users.html")
 template_currencies = env.get_template("currencies.html")
 template_user_detail = env.get_template("user_detail.html")
 template_author = env.get_template("author.html")
+template_currency_stats = env.get_template("currency_stats.html")
+
+
+# Отрисованные страницы по ключу (маршрут, версия данных)
+PAGES = PageCache()
+
+# Страницы, где строк больше STREAM_MIN_ROWS, не кэшируются целиком,
+# а отдаются по частям (chunked) размером около STREAM_CHUNK_SIZE байтов
+STREAM_MIN_ROWS = 1000
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Размер страницы списка пользователей по умолчанию и наибольший допустимый
+USERS_PAGE_SIZE = 50
+MAX_USERS_PAGE_SIZE = 10000
+
+# Через сколько секунд клиенту повторить запрос, если курсов ещё нет (ответ 503)
+RATES_RETRY_AFTER = 5
+
+# Сколько секунд ждать следующего запроса в постоянном соединении. В режимах
+# threaded и prefork простаивающее соединение занимает поток пула, поэтому
+# таймаут короткий: иначе несколько молчащих клиентов задерживают остальных
+KEEPALIVE_TIMEOUT = 5.0
+
+
+# Выборочное профилирование запросов (None — выключено, см. RouteProfiler.from_environ)
+PROFILER = RouteProfiler.from_environ()
+
+
+# --- Метрики ---
+
+REQUESTS = REGISTRY.counter(
+    "myapp_requests_total", "Количество обработанных запросов.", ("route", "method", "status")
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "myapp_request_duration_seconds", "Время обработки запроса.", ("route",)
+)
+RESPONSE_BYTES = REGISTRY.counter(
+    "myapp_response_bytes_total", "Отправлено байтов ответа.", ("route",)
+)
+IN_FLIGHT = REGISTRY.gauge("myapp_requests_in_flight", "Запросы, обрабатываемые сейчас.")
+TEMPLATE_RENDER = REGISTRY.histogram(
+    "myapp_template_render_seconds", "Время отрисовки шаблона.", ("template",)
+)
+
+
+def render_template(template: Template, **context: Any) -> str:
+    """Отрисовывает шаблон, учитывая время отрисовки в метриках."""
+    with TEMPLATE_RENDER.time((template.name,)):
+        return template.render(**context)
 
 
 def build_navigation() -> List[Dict[str, Any]]:
@@ -67,85 +151,314 @@ def build_navigation() -> List[Dict[str, Any]]:
 
 
 def find_user_by_id(user_id: int) -> Optional[User]:
-    """Ищет пользователя в списке USERS по его ID."""
-    for user in USERS:
-        if user.id == user_id:
-            return user
-    return None
+    """Ищет пользователя в базе по его ID (поиск по первичному ключу)."""
+    return REPOSITORY.get_user(user_id)
+
+
+def currency_stats(code: str) -> Optional[Dict[str, Any]]:
+    """Возвращает скользящую статистику курса валюты (None, если истории нет).
+
+    Статистика сначала догоняет историю курсов: в рабочих процессах
+    prefork новые дни дописывает главный процесс.
+    """
+    analytics.sync(history)
+    return analytics.stats(code.upper())
 
 
 class MyRequestHandler(BaseHTTPRequestHandler):
-    """Обработчик HTTP-запросов для нашего приложения."""
+    """Обработчик HTTP-запросов для нашего приложения.
+
+    Работает по HTTP/1.1: соединение остаётся открытым между
+    запросами, поэтому каждый ответ (включая ошибки) содержит
+    Content-Length.
+
+    Атрибуты:
+        timeout: Сколько секунд ждать следующего запроса в соединении.
+        max_requests: Сколько запросов обслуживается в одном соединении;
+            в ответ на последний сервер отправляет Connection: close.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными write(); без TCP_NODELAY второй
+    # сегмент ждёт отложенного ACK клиента (~40 мс на запрос в keep-alive)
+    disable_nagle_algorithm = True
+    timeout: Optional[float] = KEEPALIVE_TIMEOUT
+    max_requests = 100
+    _last_request = False
+    # Время начала обработки маршрута (выставляет timing_middleware)
+    request_started: Optional[float] = None
+    # Код статуса последнего отправленного ответа
+    status_code: Optional[int] = None
+
+    def setup(self) -> None:
+        """Подготавливает потоки соединения; ответ пишется через CountingWriter."""
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+
+    def handle(self) -> None:
+        """Обслуживает запросы одного соединения, пока клиент его не закроет."""
+        self.close_connection = True
+        served = 0
+        while True:
+            served += 1
+            self._last_request = served >= self.max_requests
+            self.handle_one_request()
+            if self.close_connection:
+                break
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        """Отправляет строку статуса; на последний запрос соединения — с Connection: close."""
+        super().send_response(code, message)
+        self.status_code = code
+        if self._last_request:
+            self.send_header("Connection", "close")
+
+    def end_headers(self) -> None:
+        """Завершает заголовки, добавляя Server-Timing, если время замерялось."""
+        if self.request_started is not None:
+            elapsed = (time.perf_counter() - self.request_started) * 1000
+            self.send_header("Server-Timing", f"app;dur={elapsed:.1f}")
+        super().end_headers()
 
     def _send_html(self, html: str, status_code: int = 200) -> None:
-        """Отправляет HTML-ответ клиенту."""
-        self.send_response(status_code)
+        """Отправляет HTML-ответ клиенту (большие страницы — сжатыми)."""
+        self._send_body(html.encode("utf-8"), "text/html; charset=utf-8", status_code)
+
+    def _send_page(self, route: str, version: Any, render: Callable[[], str]) -> None:
+        """Отправляет страницу из кэша PAGES с заголовками ETag и Last-Modified.
+
+        Сжатый вариант тела выбирается по Accept-Encoding и берётся
+        из кэша страницы. Если ETag из If-None-Match совпадает с ETag
+        этого варианта, клиент получает 304 без тела; шаблон при этом
+        не отрисовывается, пока версия данных маршрута не изменилась.
+        """
+        page = PAGES.get(route, version, render)
+        encoding, body = page.encoded(negotiate(self.headers.get("Accept-Encoding")))
+        if page.not_modified(
+            self.headers.get("If-None-Match"),
+            self.headers.get("If-Modified-Since"),
+            encoding,
+        ):
+            self.send_response(304)
+            self.send_header("ETag", page.etag_for(encoding))
+            self.send_header("Last-Modified", page.last_modified_header)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-type", page.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", page.etag_for(encoding))
+        self.send_header("Last-Modified", page.last_modified_header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_html(self, template: Template, **context: Any) -> None:
+        """Отправляет страницу по частям по мере отрисовки Template.generate().
+
+        Клиентам HTTP/1.1 ответ идёт с Transfer-Encoding: chunked, и
+        соединение остаётся открытым; остальным — до закрытия соединения.
+        Ни страница целиком, ни её закодированная копия в памяти
+        не собираются. Из способов сжатия здесь поддерживается gzip.
+        """
+        chunked = self.protocol_version == "HTTP/1.1" and self.request_version == "HTTP/1.1"
+        encoding = negotiate(self.headers.get("Accept-Encoding"), ("gzip",))
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31) if encoding else None
+
+        def send(data: bytes) -> None:
+            """Пишет готовую порцию тела, оформляя её как chunk."""
+            if data:
+                self.wfile.write(b"%x\r\n%b\r\n" % (len(data), data) if chunked else data)
+
+        def write(data: bytes) -> None:
+            """Пишет порцию тела, предварительно сжимая её."""
+            send(compressor.compress(data) if compressor is not None else data)
+
+        self.send_response(200)
         self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
         self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+
+        try:
+            pieces: List[str] = []
+            size = 0
+            # Время отрисовки здесь включает и отправку частей клиенту
+            with TEMPLATE_RENDER.time((template.name,)):
+                for piece in template.generate(**context):
+                    pieces.append(piece)
+                    size += len(piece)
+                    if size >= STREAM_CHUNK_SIZE:
+                        write("".join(pieces).encode("utf-8"))
+                        pieces = []
+                        size = 0
+                write("".join(pieces).encode("utf-8"))
+            if compressor is not None:
+                send(compressor.flush())
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except Exception:
+            # Заголовки уже отправлены: ответ можно только оборвать
+            self.close_connection = True
+            raise
+
+    def _send_json(self, data: Any, status_code: int = 200) -> None:
+        """Отправляет JSON-ответ клиенту."""
+        self._send_json_bytes(json.dumps(data, ensure_ascii=False).encode("utf-8"), status_code)
+
+    def _send_json_bytes(self, body: bytes, status_code: int = 200) -> None:
+        """Отправляет уже закодированный JSON-ответ клиенту."""
+        self._send_body(body, "application/json; charset=utf-8", status_code)
+
+    def _send_body(self, body: bytes, content_type: str, status_code: int = 200) -> None:
+        """Отправляет тело ответа клиенту.
+
+        Большие ответы сжимаются, если клиент это поддерживает.
+        """
+        compressible = len(body) >= MIN_COMPRESS_SIZE
+        encoding = negotiate(self.headers.get("Accept-Encoding")) if compressible else None
+        if encoding is not None:
+            body = compress(body, encoding)
+        self.send_response(status_code)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if compressible:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        self.wfile.write(body)
 
     def do_GET(self) -> None:
         """Обрабатывает все входящие GET-запросы."""
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        """Обрабатывает все входящие POST-запросы."""
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        """Передаёт запрос обработчику из таблицы ROUTER.
+
+        Если путь известен, но для другого метода, отвечает 405,
+        иначе — 404.
+        """
+        self.request_started = None
         parsed_url = urlparse(self.path)
         path = parsed_url.path
-        query = parse_qs(parsed_url.query)
-
-        if path == "/":
-            self.handle_index()
-        elif path == "/users":
-            self.handle_users()
-        elif path == "/currencies":
-            self.handle_currencies()
-        elif path == "/author":
-            self.handle_author()
-        elif path == "/user":
-            self.handle_user_detail(query)
+        if ROUTER.dispatch(self, method, path, parse_qs(parsed_url.query)):
+            return
+        if self.headers.get("Content-Length", "0") != "0" or "Transfer-Encoding" in self.headers:
+            # Тело запроса не прочитано, поэтому соединение нельзя переиспользовать
+            self.close_connection = True
+        # Неизвестные пути учитываются под одной меткой, чтобы не плодить ряды метрик
+        metrics_middleware(self, "unmatched", lambda: self._reject(path))
+
+    def _reject(self, path: str) -> None:
+        """Отвечает 405, если путь известен для других методов, иначе 404."""
+        allowed = ROUTER.allowed_methods(path)
+        if allowed:
+            self.handle_method_not_allowed(allowed)
         else:
             self.handle_not_found()
 
-    def handle_index(self) -> None:
+    def handle_index(self, query: Dict[str, List[str]]) -> None:
         """Обрабатывает маршрут '/' (главная страница)."""
-        html_content = template_index.render(
+        self._send_page("/", app_info.version, lambda: render_template(
+            template_index,
             app_name=app_info.name,
             app_version=app_info.version,
             author_name=main_author.name,
             group=main_author.group,
             navigation=build_navigation(),
-        )
-        self._send_html(html_content)
+        ))
 
-    def handle_users(self) -> None:
-        """Обрабатывает маршрут '/users' — список пользователей."""
-        html_content = template_users.render(
-            app_name=app_info.name,
-            author_name=main_author.name,
-            group=main_author.group,
-            navigation=build_navigation(),
-            users=USERS,
-        )
-        self._send_html(html_content)
+    def handle_users(self, query: Dict[str, List[str]]) -> None:
+        """Обрабатывает маршрут '/users?after=ID&limit=N&q=префикс' — список пользователей.
 
-    def handle_currencies(self) -> None:
+        Список выдаётся страницами: after — id последнего пользователя
+        предыдущей страницы, limit — размер страницы, q — начало имени.
+        """
+        try:
+            after = int(query.get("after", ["0"])[0])
+            limit = int(query.get("limit", [str(USERS_PAGE_SIZE)])[0])
+        except ValueError:
+            self._send_html("<h1>Ошибка: after и limit должны быть числами</h1>", status_code=400)
+            return
+        if not 0 <= after <= MAX_ID or not 1 <= limit <= MAX_USERS_PAGE_SIZE:
+            self._send_html(
+                f"<h1>Ошибка: after должен быть от 0 до {MAX_ID}, "
+                f"limit — от 1 до {MAX_USERS_PAGE_SIZE}</h1>",
+                status_code=400,
+            )
+            return
+        prefix = query.get("q", [""])[0].strip()
+
+        def context() -> Dict[str, Any]:
+            """Собирает параметры шаблона (страница читается при отрисовке)."""
+            return dict(
+                app_name=app_info.name,
+                author_name=main_author.name,
+                group=main_author.group,
+                navigation=build_navigation(),
+                page=REPOSITORY.users_page(after, limit, prefix),
+                query=prefix,
+                limit=limit,
+            )
+
+        if limit > STREAM_MIN_ROWS:
+            self._stream_html(template_users, **context())
+        elif after == 0 and limit == USERS_PAGE_SIZE and not prefix:
+            # Первая страница кэшируется; её версия — номер ревизии таблицы пользователей
+            self._send_page(
+                "/users",
+                REPOSITORY.users_revision(),
+                lambda: render_template(template_users, **context()),
+            )
+        else:
+            self._send_html(render_template(template_users, **context()))
+
+    def handle_currencies(self, query: Dict[str, List[str]]) -> None:
         """Обрабатывает маршрут '/currencies' — список валют."""
-        currencies = get_currencies()
-        html_content = template_currencies.render(
+        # Версия страницы — версия снимка курсов: она меняется только с новыми курсами
+        snapshot = get_snapshot()
+        currencies = snapshot.currencies
+        if len(currencies) > STREAM_MIN_ROWS:
+            self._stream_html(
+                template_currencies,
+                app_name=app_info.name,
+                author_name=main_author.name,
+                group=main_author.group,
+                navigation=build_navigation(),
+                currencies=currencies,
+            )
+            return
+        self._send_page("/currencies", snapshot.version, lambda: render_template(
+            template_currencies,
             app_name=app_info.name,
             author_name=main_author.name,
             group=main_author.group,
             navigation=build_navigation(),
             currencies=currencies,
-        )
-        self._send_html(html_content)
+        ))
 
-    def handle_author(self) -> None:
+    def handle_author(self, query: Dict[str, List[str]]) -> None:
         """Обрабатывает маршрут '/author' — информация об авторе."""
-        html_content = template_author.render(
+        self._send_page("/author", app_info.version, lambda: render_template(
+            template_author,
             app_name=app_info.name,
             author_name=main_author.name,
             group=main_author.group,
             navigation=build_navigation(),
-        )
-        self._send_html(html_content)
+        ))
 
     def handle_user_detail(self, query: Dict[str, List[str]]) -> None:
         """Обрабатывает маршрут '/user?id=...' — страница пользователя."""
@@ -160,19 +473,22 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self._send_html("<h1>Ошибка: id должен быть числом</h1>", status_code=400)
             return
 
+        self.handle_user_page(query, user_id)
+
+    def handle_user_page(self, query: Dict[str, List[str]], user_id: int) -> None:
+        """Обрабатывает маршрут '/user/<id>' — страница пользователя."""
         user = find_user_by_id(user_id)
         if user is None:
             self._send_html("<h1>Пользователь не найден</h1>", status_code=404)
             return
 
-        # Получаем все валюты и фильтруем только те, на которые подписан пользователь
-        all_currencies = get_currencies()
-        subscribed_codes = USER_SUBSCRIPTIONS.get(user.id, [])
-        subscriptions = [
-            c for c in all_currencies if c.char_code in subscribed_codes
-        ]
+        # Берём только валюты, на которые подписан пользователь, по индексу таблицы
+        subscriptions = get_snapshot().table.select_ids(
+            REPOSITORY.subscriptions.currencies_of(user.id)
+        )
 
-        html_content = template_user_detail.render(
+        html_content = render_template(
+            template_user_detail,
             app_name=app_info.name,
             author_name=main_author.name,
             group=main_author.group,
@@ -182,6 +498,164 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         )
         self._send_html(html_content)
 
+    def handle_currency(self, query: Dict[str, List[str]], code: str) -> None:
+        """Обрабатывает маршрут '/currency/<code>' — курс одной валюты (JSON).
+
+        С параметрами from и/или to (даты ГГГГ-ММ-ДД) отвечает историей
+        курса за период: столбцы dates, values и nominals.
+        """
+        table = get_snapshot().table
+        currency = table.get(code.upper())
+        if currency is None:
+            self._send_json({"error": "неизвестная валюта"}, status_code=404)
+            return
+        if "from" in query or "to" in query:
+            self._send_currency_history(currency.char_code, query)
+            return
+        self._send_json({
+            "id": currency.id,
+            "num_code": currency.num_code,
+            "char_code": currency.char_code,
+            "name": currency.name,
+            "value": currency.value,
+            "nominal": currency.nominal,
+            "unit_rate": table.unit_rate(currency.char_code),
+        })
+
+    def _send_currency_history(self, char_code: str, query: Dict[str, List[str]]) -> None:
+        """Отправляет историю курса char_code за период from..to (JSON)."""
+        try:
+            start = dt.date.fromisoformat(query["from"][0]) if "from" in query else None
+            end = dt.date.fromisoformat(query["to"][0]) if "to" in query else None
+            series = history.series(char_code, start, end)
+        except ValueError:
+            self._send_json(
+                {"error": "from и to должны быть датами ГГГГ-ММ-ДД, from не позже to"},
+                status_code=400,
+            )
+            return
+        data = series.to_json()
+        data["from"] = start.isoformat() if start else None
+        data["to"] = end.isoformat() if end else None
+        self._send_json(data)
+
+    def handle_currency_stats(self, query: Dict[str, List[str]], code: str) -> None:
+        """Обрабатывает маршрут '/currency/<code>/stats' — статистика курса (HTML)."""
+        stats = currency_stats(code)
+        if stats is None:
+            self._send_html("<h1>Нет истории курса валюты</h1>", status_code=404)
+            return
+        self._send_html(render_template(
+            template_currency_stats,
+            app_name=app_info.name,
+            author_name=main_author.name,
+            group=main_author.group,
+            navigation=build_navigation(),
+            currency=get_snapshot().index.get(stats["char_code"]),
+            stats=stats,
+        ))
+
+    def handle_currency_stats_json(self, query: Dict[str, List[str]], code: str) -> None:
+        """Обрабатывает маршрут '/currency/<code>/stats.json' — статистика курса (JSON)."""
+        stats = currency_stats(code)
+        if stats is None:
+            self._send_json({"error": "нет истории курса валюты"}, status_code=404)
+            return
+        self._send_json(stats)
+
+    def handle_convert(self, query: Dict[str, List[str]]) -> None:
+        """Обрабатывает маршрут '/convert?from=USD&to=EUR&amount=100'.
+
+        Отвечает JSON с кросс-курсом и результатом конвертации.
+        Если amount не указан, переводится одна единица валюты.
+        """
+        if "from" not in query or "to" not in query:
+            self._send_json({"error": "параметры from и to обязательны"}, status_code=400)
+            return
+
+        from_code = query["from"][0].upper()
+        to_code = query["to"][0].upper()
+        try:
+            amount = float(query.get("amount", ["1"])[0])
+        except ValueError:
+            self._send_json({"error": "amount должен быть числом"}, status_code=400)
+            return
+
+        matrix = get_snapshot().matrix
+        try:
+            result = matrix.convert(from_code, to_code, amount)
+        except KeyError:
+            self._send_json({"error": "неизвестная валюта"}, status_code=404)
+            return
+        except ValueError:
+            self._send_json({"error": "amount должен быть конечным числом"}, status_code=400)
+            return
+
+        self._send_json({
+            "from": from_code,
+            "to": to_code,
+            "amount": amount,
+            "rate": matrix.rate(from_code, to_code),
+            "result": result,
+        })
+
+    def handle_convert_batch(self, query: Dict[str, List[str]]) -> None:
+        """Обрабатывает POST '/convert' — пакетную конвертацию сумм.
+
+        Тело — CSV (text/csv, строки from,to,amount) или JSON
+        (application/json, массив троек). Тело читается и разбирается
+        по частям, а ответ возвращается в том же формате.
+        """
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type in ("text/csv", "application/csv"):
+            parse_rows = iter_csv_rows
+        elif content_type == "application/json":
+            parse_rows = iter_json_rows
+        else:
+            self.close_connection = True
+            self._send_json(
+                {"error": "ожидается тело text/csv или application/json"}, status_code=415
+            )
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json({"error": "требуется заголовок Content-Length"}, status_code=411)
+            return
+
+        body = BodyReader(self.rfile, length)
+        try:
+            batch = convert_batch(get_snapshot().matrix, parse_rows(body))
+        except ValueError as error:
+            if body.remaining:
+                self.close_connection = True
+            self._send_json({"error": str(error)}, status_code=400)
+            return
+
+        if parse_rows is iter_json_rows:
+            self._send_json_bytes(batch.to_json())
+            return
+        chunks = list(batch.iter_csv())
+        self.send_response(200)
+        self.send_header("Content-type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(sum(map(len, chunks))))
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+
+    def handle_metrics(self, query: Dict[str, List[str]]) -> None:
+        """Обрабатывает маршрут '/metrics' — метрики в формате Prometheus."""
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def handle_not_found(self) -> None:
         """Отправляет простую страницу 404, если маршрут не найден."""
         html_content = (
@@ -190,14 +664,283 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         )
         self._send_html(html_content, status_code=404)
 
+    def handle_rates_unavailable(self) -> None:
+        """Отправляет 503, если курсы валют ещё не загружены."""
+        if self.headers.get("Content-Length", "0") != "0" or "Transfer-Encoding" in self.headers:
+            # Тело запроса не прочитано, поэтому соединение нельзя переиспользовать
+            self.close_connection = True
+        body = "<h1>503 — Курсы валют временно недоступны</h1>".encode("utf-8")
+        self.send_response(503)
+        self.send_header("Retry-After", str(RATES_RETRY_AFTER))
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-def run_server(host: str = "127.0.0.1", port: int = 8000) -> None:
-    """Запускает HTTP-сервер на указанном хосте и порту."""
-    server_address = (host, port)
-    httpd = HTTPServer(server_address, MyRequestHandler)
-    print(f"Сервер запущен на http://{host}:{port}/ (нажмите Ctrl+C для остановки)")
-    httpd.serve_forever()
+    def handle_method_not_allowed(self, allowed: List[str]) -> None:
+        """Отправляет 405 с заголовком Allow, если путь есть, но для других методов."""
+        body = "<h1>405 — Метод не поддерживается</h1>".encode("utf-8")
+        self.send_response(405)
+        self.send_header("Allow", ", ".join(allowed))
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def metrics_middleware(
+    request: MyRequestHandler, route: str, call_next: Callable[[], None]
+) -> None:
+    """Учитывает запрос в метриках: количество, длительность и объём ответа.
+
+    Метка route — шаблон маршрута ('/user/<int:user_id>'), а не сам
+    путь, поэтому число рядов метрик не зависит от запросов клиентов.
+    """
+    written = request.wfile.bytes_written
+    request.status_code = None
+    IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        call_next()
+    finally:
+        REQUEST_DURATION.observe(time.perf_counter() - started, (route,))
+        IN_FLIGHT.dec()
+        status = str(request.status_code or 500)
+        REQUESTS.inc((route, request.command, status))
+        RESPONSE_BYTES.inc((route,), request.wfile.bytes_written - written)
+        REGISTRY.maybe_dump()
+
+
+def rates_middleware(
+    request: MyRequestHandler, route: str, call_next: Callable[[], None]
+) -> None:
+    """Отвечает 503, если обработчику нужны курсы, а их ещё нет.
+
+    Обработчики не ждут ленту: курсы загружает только фоновый поток.
+    """
+    try:
+        call_next()
+    except RatesUnavailable:
+        if request.status_code is not None:
+            # Ответ уже начат: его можно только оборвать
+            raise
+        request.handle_rates_unavailable()
+
+
+def timing_middleware(
+    request: MyRequestHandler, route: str, call_next: Callable[[], None]
+) -> None:
+    """Замеряет время обработки маршрута (заголовок Server-Timing)."""
+    request.request_started = time.perf_counter()
+    call_next()
+
+
+def profiling_middleware(
+    request: MyRequestHandler, route: str, call_next: Callable[[], None]
+) -> None:
+    """Профилирует запрос, если его выбрал PROFILER (каждый N-й или по флагу ?_profile=)."""
+    profiler = PROFILER
+    if profiler is None:
+        call_next()
+        return
+    forced = False
+    if "_profile=" in request.path:
+        token = parse_qs(urlparse(request.path).query).get("_profile", [""])[0]
+        forced = profiler.authorized(token)
+    if profiler.should_profile(forced):
+        profiler.profile(f"{request.command} {route}", call_next)
+    else:
+        call_next()
+
+
+# --- Таблица маршрутов ---
+
+ROUTER = Router()
+for _method, _path, _handler in (
+    ("GET", "/", MyRequestHandler.handle_index),
+    ("GET", "/users", MyRequestHandler.handle_users),
+    ("GET", "/currencies", MyRequestHandler.handle_currencies),
+    ("GET", "/author", MyRequestHandler.handle_author),
+    ("GET", "/user", MyRequestHandler.handle_user_detail),
+    ("GET", "/user/<int:user_id>", MyRequestHandler.handle_user_page),
+    ("GET", "/currency/<code>", MyRequestHandler.handle_currency),
+    ("GET", "/currency/<code>/stats", MyRequestHandler.handle_currency_stats),
+    ("GET", "/currency/<code>/stats.json", MyRequestHandler.handle_currency_stats_json),
+    ("GET", "/convert", MyRequestHandler.handle_convert),
+    ("POST", "/convert", MyRequestHandler.handle_convert_batch),
+    ("GET", "/metrics", MyRequestHandler.handle_metrics),
+):
+    ROUTER.add(_method, _path, _handler)
+ROUTER.use(metrics_middleware)
+ROUTER.use(timing_middleware)
+ROUTER.use(profiling_middleware)
+ROUTER.use(rates_middleware)
+ROUTER.compile()
+
+
+SERVER_MODES = ("single", "threaded", "prefork", "asyncio")
+
+
+def start_worker_metrics() -> None:
+    """Готовит метрики рабочего процесса prefork (вызывается после fork).
+
+    Унаследованные значения главного процесса сбрасываются — он сохраняет
+    их в своём снимке, — и запускается периодическое сохранение снимка.
+    """
+    REGISTRY.reset()
+    REGISTRY.start_dumping()
+
+
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    mode: str = "single",
+    workers: Optional[int] = None,
+    threads: int = 8,
+    keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+    max_requests: int = 100,
+) -> None:
+    """Запускает HTTP-сервер на указанном хосте и порту.
+
+    Аргументы:
+        host: Адрес, на котором слушает сервер.
+        port: Порт сервера.
+        mode: Режим работы: 'single' — один поток,
+            'threaded' — пул из threads потоков,
+            'prefork' — workers процессов по threads потоков в каждом,
+            'asyncio' — асинхронный сервер с пулом из threads потоков.
+        workers: Количество процессов для режима 'prefork'.
+        threads: Количество потоков для остальных режимов.
+        keepalive_timeout: Сколько секунд ждать следующего запроса
+            в постоянном соединении. В режимах threaded и prefork
+            простаивающее соединение всё это время занимает поток.
+        max_requests: Сколько запросов обслуживать в одном соединении.
+
+    Исключения:
+        ValueError: если указан неизвестный режим или неверные
+            параметры соединений.
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Неизвестный режим сервера: {mode}.")
+    if keepalive_timeout <= 0 or max_requests <= 0:
+        raise ValueError("Таймаут и число запросов на соединение должны быть больше нуля.")
+
+    # Курсы загружаются до приёма соединений, дальше их обновляет фоновый поток
+    rates.start()
+    try:
+        if mode == "asyncio":
+            from .aio_server import run_async_server
+
+            # Класс передаётся явно: при запуске через python -m myapp.myapp этот
+            # модуль — __main__, и повторный импорт создал бы второй набор метрик
+            run_async_server(
+                MyRequestHandler,
+                host,
+                port,
+                threads=threads,
+                keepalive_timeout=keepalive_timeout,
+                max_requests=max_requests,
+            )
+            return
+
+        MyRequestHandler.timeout = keepalive_timeout
+        MyRequestHandler.max_requests = max_requests
+        server_address = (host, port)
+        if mode == "prefork":
+            # Рабочий процесс сохраняет снимок метрик периодически и при выходе,
+            # а не только после запросов
+            server = PreforkServer(
+                server_address,
+                MyRequestHandler,
+                workers=workers,
+                threads=threads,
+                on_child_start=start_worker_metrics,
+                on_child_exit=REGISTRY.stop_dumping,
+            )
+            # Курсы загружает только главный процесс и публикует их в общую память;
+            # рабочие процессы читают снимок оттуда: при follow_fork=False они
+            # не запрашивают ленту и не вызывают подписчиков (единственный писатель)
+            shared_rates = SharedRatesWriter()
+            rates.follow_fork = False
+            rates.subscribe(shared_rates.publish)
+            if rates.snapshot is not None:
+                shared_rates.publish(rates.snapshot)
+            use_shared_rates(shared_rates.reader())
+            # Процессы обмениваются метриками через файлы снимков в общем каталоге
+            metrics_directory = None
+            if REGISTRY.directory is None:
+                metrics_directory = tempfile.mkdtemp(prefix="myapp-metrics-")
+                REGISTRY.directory = metrics_directory
+            # Главный процесс загружает курсы: его метрики тоже нужны в снимках
+            REGISTRY.start_dumping()
+            print(
+                f"Сервер запущен на http://{host}:{port}/ "
+                f"({server.workers} процессов, нажмите Ctrl+C для остановки)"
+            )
+            try:
+                server.serve_forever()
+            finally:
+                REGISTRY.stop_dumping()
+                rates.unsubscribe(shared_rates.publish)
+                rates.follow_fork = True
+                use_shared_rates(None)
+                shared_rates.close()
+                if metrics_directory is not None:
+                    REGISTRY.directory = None
+                    shutil.rmtree(metrics_directory, ignore_errors=True)
+            return
+
+        if mode == "threaded":
+            httpd: HTTPServer = ThreadPoolHTTPServer(
+                server_address, MyRequestHandler, max_workers=threads
+            )
+        else:
+            httpd = HTTPServer(server_address, MyRequestHandler)
+        print(f"Сервер запущен на http://{host}:{port}/ (нажмите Ctrl+C для остановки)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+    finally:
+        rates.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Точка входа командной строки: разбирает аргументы и запускает сервер."""
+    parser = argparse.ArgumentParser(description="Сервер приложения CurrenciesListApp.")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес сервера")
+    parser.add_argument("--port", type=int, default=8000, help="порт сервера")
+    parser.add_argument(
+        "--mode", choices=SERVER_MODES, default="single", help="режим работы сервера"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="число процессов (режим prefork)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=8, help="число потоков (threaded, prefork, asyncio)"
+    )
+    parser.add_argument(
+        "--keepalive-timeout",
+        type=float,
+        default=KEEPALIVE_TIMEOUT,
+        help="сколько секунд держать простаивающее соединение",
+    )
+    parser.add_argument(
+        "--max-requests", type=int, default=100, help="число запросов на одно соединение"
+    )
+    args = parser.parse_args(argv)
+    run_server(
+        args.host,
+        args.port,
+        args.mode,
+        args.workers,
+        args.threads,
+        args.keepalive_timeout,
+        args.max_requests,
+    )
 
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    main()
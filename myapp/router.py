@@ -0,0 +1,193 @@
+"""Модуль маршрутизации HTTP-запросов.
+
+Здесь определён класс Router, который сопоставляет метод и путь
+запроса с функцией-обработчиком:
+- статические пути ('/users') ищутся в словаре за O(1);
+- пути с параметрами ('/user/<int:id>', '/currency/<code>')
+  группируются по методу и первому сегменту пути; каждая группа
+  собирается в одно регулярное выражение, которое компилируется
+  один раз, а сработавший маршрут определяется по имени группы
+  без перебора списка маршрутов;
+- перед обработчиком вызывается цепочка промежуточных слоёв
+  (middleware), например для замера времени.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import unquote
+
+Handler = Callable[..., None]
+Middleware = Callable[[Any, str, Callable[[], None]], None]
+
+# Конвертеры параметров пути: регулярное выражение и функция преобразования
+CONVERTERS: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    "int": (r"[0-9]+", int),
+    "str": (r"[^/]+", unquote),
+}
+
+_PARAMETER = re.compile(r"<(?:(\w+):)?(\w+)>")
+
+
+class Router:
+    """Таблица маршрутов с учётом HTTP-метода и цепочкой middleware."""
+
+    def __init__(self) -> None:
+        """Создаёт пустую таблицу маршрутов."""
+        self._static: Dict[Tuple[str, str], Handler] = {}
+        self._patterns: Dict[Tuple[str, Optional[str]], List[Tuple[str, Handler]]] = {}
+        self._compiled: Dict[Tuple[str, Optional[str]], Tuple[Pattern[str], Dict[str, tuple]]] = {}
+        self._middleware: List[Middleware] = []
+
+    def add(self, method: str, path: str, handler: Handler) -> None:
+        """Регистрирует обработчик handler для метода method и пути path.
+
+        В пути можно указать параметры вида <name> или <int:name>;
+        их значения передаются обработчику именованными аргументами.
+
+        Исключения:
+            ValueError: если маршрут уже зарегистрирован или
+                указан неизвестный конвертер.
+        """
+        method = method.upper()
+        if _PARAMETER.search(path) is None:
+            if (method, path) in self._static:
+                raise ValueError(f"Маршрут {method} {path} уже зарегистрирован.")
+            self._static[(method, path)] = handler
+            return
+        for converter, _ in _PARAMETER.findall(path):
+            if converter and converter not in CONVERTERS:
+                raise ValueError(f"Неизвестный конвертер параметра: {converter}.")
+        key = (method, _first_segment(path))
+        routes = self._patterns.setdefault(key, [])
+        if any(existing == path for existing, _ in routes):
+            raise ValueError(f"Маршрут {method} {path} уже зарегистрирован.")
+        routes.append((path, handler))
+        self._compiled.pop(key, None)
+
+    def get(self, path: str) -> Callable[[Handler], Handler]:
+        """Декоратор: регистрирует обработчик GET-запросов."""
+        return self._decorator("GET", path)
+
+    def post(self, path: str) -> Callable[[Handler], Handler]:
+        """Декоратор: регистрирует обработчик POST-запросов."""
+        return self._decorator("POST", path)
+
+    def _decorator(self, method: str, path: str) -> Callable[[Handler], Handler]:
+        """Возвращает декоратор, регистрирующий обработчик и возвращающий его же."""
+        def register(handler: Handler) -> Handler:
+            self.add(method, path, handler)
+            return handler
+        return register
+
+    def use(self, middleware: Middleware) -> None:
+        """Добавляет промежуточный слой в конец цепочки.
+
+        middleware(request, route, call_next) получает объект запроса,
+        шаблон сработавшего маршрута (например, '/user/<int:user_id>')
+        и функцию без аргументов, вызывающую следующий слой
+        (последний слой вызывает сам обработчик).
+        """
+        self._middleware.append(middleware)
+
+    def compile(self) -> None:
+        """Собирает регулярные выражения для путей с параметрами."""
+        for key in self._patterns:
+            if key not in self._compiled:
+                self._compiled[key] = self._compile_group(key)
+
+    def _compile_group(
+        self, key: Tuple[str, Optional[str]]
+    ) -> Tuple[Pattern[str], Dict[str, tuple]]:
+        """Собирает одно выражение из всех шаблонов группы key.
+
+        Каждый маршрут — именованная группа _rN; её имя (lastgroup)
+        указывает на обработчик и параметры маршрута.
+        """
+        alternatives = []
+        routes: Dict[str, tuple] = {}
+        for number, (path, handler) in enumerate(self._patterns[key]):
+            group = f"_r{number}"
+            params = []
+            parts = []
+            position = 0
+            for match in _PARAMETER.finditer(path):
+                converter = match.group(1) or "str"
+                pattern, convert = CONVERTERS[converter]
+                param_group = f"{group}_{len(params)}"
+                parts.append(re.escape(path[position:match.start()]))
+                parts.append(f"(?P<{param_group}>{pattern})")
+                params.append((match.group(2), param_group, convert))
+                position = match.end()
+            parts.append(re.escape(path[position:]))
+            alternatives.append(f"(?P<{group}>{''.join(parts)})")
+            routes[group] = (path, handler, params)
+        return re.compile("|".join(alternatives)), routes
+
+    def resolve(self, method: str, path: str) -> Optional[Tuple[Handler, Dict[str, Any]]]:
+        """Находит обработчик и параметры пути; None, если маршрута нет."""
+        matched = self.match(method, path)
+        return None if matched is None else matched[1:]
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, Handler, Dict[str, Any]]]:
+        """Находит шаблон маршрута, обработчик и параметры пути; None, если маршрута нет."""
+        handler = self._static.get((method, path))
+        if handler is not None:
+            return path, handler, {}
+        # Сначала группа с тем же первым сегментом, затем шаблоны, начинающиеся с параметра
+        for key in ((method, _first_segment(path)), (method, None)):
+            if key not in self._patterns:
+                continue
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                compiled = self._compiled[key] = self._compile_group(key)
+            regex, routes = compiled
+            match = regex.fullmatch(path)
+            if match is not None:
+                route, handler, params = routes[match.lastgroup]
+                return route, handler, {
+                    name: convert(match.group(group)) for name, group, convert in params
+                }
+        return None
+
+    def allowed_methods(self, path: str) -> List[str]:
+        """Возвращает методы, для которых путь path зарегистрирован."""
+        methods = {method for method, _ in self._static}
+        methods.update(method for method, _ in self._patterns)
+        return sorted(method for method in methods if self.resolve(method, path) is not None)
+
+    def dispatch(self, request: Any, method: str, path: str, *args: Any) -> bool:
+        """Вызывает обработчик маршрута через цепочку middleware.
+
+        Обработчик получает request, дополнительные аргументы args
+        и параметры пути именованными аргументами.
+
+        Возвращает:
+            False, если маршрут не найден (обработчик не вызывался).
+        """
+        matched = self.match(method, path)
+        if matched is None:
+            return False
+        route, handler, params = matched
+
+        def call() -> None:
+            handler(request, *args, **params)
+
+        for middleware in reversed(self._middleware):
+            call = _bind(middleware, request, route, call)
+        call()
+        return True
+
+
+def _first_segment(path: str) -> Optional[str]:
+    """Возвращает первый сегмент пути или None, если он содержит параметр."""
+    segment = path[1:].partition("/")[0]
+    return None if "<" in segment else segment
+
+
+def _bind(
+    middleware: Middleware, request: Any, route: str, call_next: Callable[[], None]
+) -> Callable[[], None]:
+    """Возвращает функцию, вызывающую middleware со следующим слоем call_next."""
+    return lambda: middleware(request, route, call_next)
@@ -0,0 +1,274 @@
+"""Модуль серверов для разных режимов обслуживания запросов.
+
+Здесь определены:
+- ThreadPoolHTTPServer — HTTP-сервер с ограниченным пулом потоков;
+- PreforkServer — несколько рабочих процессов, которые делят
+  один слушающий сокет (унаследованный дескриптор или SO_REUSEPORT).
+
+Обработчик запросов (например, MyRequestHandler) не меняется:
+оба сервера вызывают его так же, как стандартный HTTPServer.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """HTTP-сервер, обрабатывающий соединения в пуле потоков.
+
+    Количество потоков фиксировано (max_workers), а очередь принятых
+    соединений ограничена (queue_size): если все потоки заняты
+    и очередь заполнена, приём новых соединений приостанавливается.
+
+    Поток обслуживает соединение целиком, включая ожидание следующего
+    запроса в постоянном (keep-alive) соединении. Поэтому одновременно
+    обслуживается не больше max_workers соединений, даже простаивающих:
+    следующее ждёт в очереди, пока одно из них не закроется или не
+    истечёт таймаут обработчика (MyRequestHandler.timeout). Пул должен
+    быть больше ожидаемого числа одновременных keep-alive клиентов;
+    для тысяч постоянных соединений подходит асинхронный сервер.
+    """
+
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class: Type[BaseHTTPRequestHandler],
+        max_workers: int = 8,
+        queue_size: int = 256,
+        bind_and_activate: bool = True,
+    ) -> None:
+        """Создаёт сервер и запускает рабочие потоки.
+
+        Аргументы:
+            server_address: Пара (хост, порт).
+            handler_class: Класс обработчика запросов.
+            max_workers: Количество рабочих потоков.
+            queue_size: Максимальная длина очереди соединений.
+            bind_and_activate: Нужно ли сразу занять адрес.
+
+        Исключения:
+            ValueError: если max_workers или queue_size меньше единицы.
+        """
+        if max_workers <= 0:
+            raise ValueError("Количество потоков должно быть больше нуля.")
+        if queue_size <= 0:
+            raise ValueError("Размер очереди должен быть больше нуля.")
+        self.max_workers = max_workers
+        self._requests: "queue.Queue[Optional[Tuple[socket.socket, Tuple[str, int]]]]" = (
+            queue.Queue(maxsize=queue_size)
+        )
+        self._workers: List[threading.Thread] = []
+        super().__init__(server_address, handler_class, bind_and_activate)
+        for number in range(max_workers):
+            worker = threading.Thread(
+                target=self._work,
+                name=f"http-worker-{number}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def process_request(self, request, client_address) -> None:  # type: ignore[override]
+        """Ставит соединение в очередь вместо обработки в текущем потоке."""
+        self._requests.put((request, client_address))
+
+    def _work(self) -> None:
+        """Цикл рабочего потока: берёт соединения из очереди и обслуживает их."""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Закрывает сокет и дожидается завершения рабочих потоков."""
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+
+class PreforkServer:
+    """Сервер с предварительным запуском рабочих процессов (pre-fork).
+
+    Главный процесс открывает слушающий сокет и запускает workers
+    дочерних процессов. Каждый дочерний процесс обслуживает запросы
+    через ThreadPoolHTTPServer. Упавший процесс перезапускается,
+    а по SIGTERM/SIGINT все процессы завершаются корректно.
+    """
+
+    restart_delay = 1.0
+    shutdown_timeout = 10.0
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class: Type[BaseHTTPRequestHandler],
+        workers: Optional[int] = None,
+        threads: int = 8,
+        reuse_port: bool = False,
+        on_child_start: Optional[Callable[[], None]] = None,
+        on_child_exit: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Сохраняет параметры сервера.
+
+        Аргументы:
+            server_address: Пара (хост, порт).
+            handler_class: Класс обработчика запросов.
+            workers: Количество процессов (по умолчанию — число ядер).
+            threads: Количество потоков в каждом процессе.
+            reuse_port: Если True, каждый процесс открывает свой сокет
+                с SO_REUSEPORT, иначе все наследуют сокет родителя.
+            on_child_start: Функция, которая вызывается в рабочем
+                процессе перед приёмом соединений (например, чтобы
+                запустить в нём фоновые потоки).
+            on_child_exit: Функция, которая вызывается в рабочем
+                процессе после остановки сервера, перед выходом.
+
+        Исключения:
+            ValueError: если workers меньше единицы.
+            OSError: если SO_REUSEPORT не поддерживается системой.
+        """
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        if workers <= 0:
+            raise ValueError("Количество процессов должно быть больше нуля.")
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise OSError("SO_REUSEPORT не поддерживается этой системой.")
+        self.server_address = server_address
+        self.handler_class = handler_class
+        self.workers = workers
+        self.threads = threads
+        self.reuse_port = reuse_port
+        self.on_child_start = on_child_start
+        self.on_child_exit = on_child_exit
+        self.socket: Optional[socket.socket] = None
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+
+    def _listen(self) -> socket.socket:
+        """Открывает слушающий сокет на адресе сервера."""
+        return socket.create_server(
+            self.server_address,
+            backlog=ThreadPoolHTTPServer.request_queue_size,
+            reuse_port=self.reuse_port,
+        )
+
+    def serve_forever(self) -> None:
+        """Запускает рабочие процессы и следит за ними до остановки."""
+        self.socket = self._listen()
+        self.server_address = self.socket.getsockname()[:2]
+        previous = {
+            signum: signal.signal(signum, self._request_stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for _ in range(self.workers):
+                self._spawn()
+            self._supervise()
+        finally:
+            self._stop_children()
+            self.socket.close()
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def _request_stop(self, signum, frame) -> None:
+        """Обработчик сигнала: помечает сервер для остановки."""
+        self._stopping = True
+
+    def _spawn(self) -> None:
+        """Запускает один рабочий процесс."""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_child()
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+
+    def _run_child(self) -> None:
+        """Тело рабочего процесса: обслуживает запросы до SIGTERM."""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        httpd = ThreadPoolHTTPServer(
+            self.server_address,
+            self.handler_class,
+            max_workers=self.threads,
+            bind_and_activate=False,
+        )
+        httpd.socket.close()
+        if self.reuse_port:
+            httpd.socket = self._listen()
+        else:
+            httpd.socket = self.socket  # type: ignore[assignment]
+        httpd.server_address = httpd.socket.getsockname()[:2]
+        httpd.server_name = socket.getfqdn(httpd.server_address[0])
+        httpd.server_port = httpd.server_address[1]
+        signal.signal(
+            signal.SIGTERM,
+            lambda signum, frame: threading.Thread(target=httpd.shutdown).start(),
+        )
+        if self.on_child_start is not None:
+            self.on_child_start()
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+            if self.on_child_exit is not None:
+                self.on_child_exit()
+
+    def _supervise(self) -> None:
+        """Перезапускает завершившиеся процессы, пока не пришёл сигнал остановки."""
+        while not self._stopping:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == 0 or pid not in self._children:
+                time.sleep(0.2)
+                continue
+            started = self._children.pop(pid)
+            if self._stopping:
+                break
+            # Не даём процессу, падающему сразу при старте, перезапускаться в цикле
+            if time.monotonic() - started < self.restart_delay:
+                time.sleep(self.restart_delay)
+            self._spawn()
+
+    def _stop_children(self) -> None:
+        """Отправляет SIGTERM всем процессам и дожидается их завершения."""
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self._children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(0.05)
+            else:
+                self._children.pop(pid, None)
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children = {}
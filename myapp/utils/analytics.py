@@ -0,0 +1,291 @@
+"""Модуль скользящей статистики курсов.
+
+Здесь определены:
+- RollingStats — статистика курса одной валюты за последние window
+  дней: скользящее среднее, стандартное отклонение дневных изменений,
+  минимум и максимум;
+- RateAnalytics — статистика всех валют, которая догоняет историю
+  курсов (HistoryStore) по мере появления новых дней.
+
+Новый день обновляет статистику валюты за O(1): суммы значений,
+изменений и квадратов изменений пересчитываются вычитанием
+выбывшего и прибавлением нового значения, а минимум и максимум
+хранятся в монотонных очередях (амортизированно O(1)). Вся история
+читается только при первом построении (rebuild) — одним срезом
+записей и векторными расчётами NumPy, например после заполнения
+истории архивом.
+
+Курсы берутся за единицу валюты (value / nominal), поэтому смена
+номинала не выглядит скачком курса.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .history import HistoryStore, day_from_number
+
+
+class RollingStats:
+    """Скользящая статистика курса одной валюты за window последних значений.
+
+    Атрибуты:
+        window: Размер окна (число дней с курсом).
+    """
+
+    __slots__ = (
+        "window",
+        "_values",
+        "_sum",
+        "_changes",
+        "_change_sum",
+        "_change_squares",
+        "_minima",
+        "_maxima",
+        "_seen",
+    )
+
+    def __init__(self, window: int) -> None:
+        """Создаёт пустую статистику.
+
+        Исключения:
+            ValueError: если window меньше двух.
+        """
+        if window < 2:
+            raise ValueError("Окно статистики должно быть не меньше двух дней.")
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._sum = 0.0
+        self._changes: Deque[float] = deque()
+        self._change_sum = 0.0
+        self._change_squares = 0.0
+        # Монотонные очереди пар (номер значения, значение)
+        self._minima: Deque[Tuple[int, float]] = deque()
+        self._maxima: Deque[Tuple[int, float]] = deque()
+        self._seen = 0
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, window: int) -> RollingStats:
+        """Строит статистику по ряду values сразу, без поочерёдного добавления.
+
+        Суммы считаются векторно по последним window значениям ряда.
+        """
+        stats = cls(window)
+        tail = np.asarray(values, dtype=np.float64)[-window:]
+        if not len(tail):
+            return stats
+        changes = np.diff(tail)
+        stats._values.extend(tail.tolist())
+        stats._sum = float(tail.sum())
+        stats._changes.extend(changes.tolist())
+        stats._change_sum = float(changes.sum())
+        stats._change_squares = float(np.dot(changes, changes))
+        stats._seen = len(values) - len(tail)
+        for value in stats._values:
+            stats._push_extremes(value)
+            stats._seen += 1
+        return stats
+
+    def push(self, value: float) -> None:
+        """Добавляет курс следующего дня (амортизированно O(1))."""
+        values = self._values
+        if values:
+            change = value - values[-1]
+            self._changes.append(change)
+            self._change_sum += change
+            self._change_squares += change * change
+            if len(self._changes) >= self.window:
+                change = self._changes.popleft()
+                self._change_sum -= change
+                self._change_squares -= change * change
+        values.append(value)
+        self._sum += value
+        if len(values) > self.window:
+            self._sum -= values.popleft()
+        self._push_extremes(value)
+        self._seen += 1
+
+    def _push_extremes(self, value: float) -> None:
+        """Добавляет значение в очереди минимума и максимума."""
+        position = self._seen
+        oldest = position - self.window
+        minima = self._minima
+        while minima and minima[-1][1] >= value:
+            minima.pop()
+        minima.append((position, value))
+        if minima[0][0] <= oldest:
+            minima.popleft()
+        maxima = self._maxima
+        while maxima and maxima[-1][1] <= value:
+            maxima.pop()
+        maxima.append((position, value))
+        if maxima[0][0] <= oldest:
+            maxima.popleft()
+
+    def __len__(self) -> int:
+        """Возвращает число значений в окне."""
+        return len(self._values)
+
+    @property
+    def last(self) -> Optional[float]:
+        """Последнее значение или None."""
+        return self._values[-1] if self._values else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Скользящее среднее или None, если значений ещё нет."""
+        return self._sum / len(self._values) if self._values else None
+
+    @property
+    def change_std(self) -> Optional[float]:
+        """Стандартное отклонение дневных изменений или None, если изменений нет."""
+        count = len(self._changes)
+        if not count:
+            return None
+        mean = self._change_sum / count
+        # Накопленная ошибка округления может дать чуть отрицательную дисперсию
+        return math.sqrt(max(self._change_squares / count - mean * mean, 0.0))
+
+    @property
+    def minimum(self) -> Optional[float]:
+        """Минимум за окно или None."""
+        return self._minima[0][1] if self._minima else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        """Максимум за окно или None."""
+        return self._maxima[0][1] if self._maxima else None
+
+
+class RateAnalytics:
+    """Скользящая статистика курсов всех валют, построенная по истории.
+
+    Атрибуты:
+        window: Размер окна (число дней с курсом).
+        first_date: Первый день истории при последнем rebuild или None.
+        last_date: Последний учтённый день или None.
+        updates: Количество дней, учтённых поочерёдно (после rebuild).
+    """
+
+    def __init__(self, window: int = 30) -> None:
+        """Создаёт пустую статистику с окном window дней.
+
+        Исключения:
+            ValueError: если window меньше двух.
+        """
+        if window < 2:
+            raise ValueError("Окно статистики должно быть не меньше двух дней.")
+        self.window = window
+        self.first_date: Optional[dt.date] = None
+        self.last_date: Optional[dt.date] = None
+        self.updates = 0
+        self._stats: Dict[str, RollingStats] = {}
+        self._lock = threading.Lock()
+
+    def update(self, day: dt.date, rows: Iterable[Tuple[str, float, int]]) -> bool:
+        """Учитывает курсы дня day: тройки (код, курс, номинал).
+
+        Возвращает:
+            False, если день не позже последнего учтённого, иначе True.
+        """
+        with self._lock:
+            return self._update(day, rows)
+
+    def _update(self, day: dt.date, rows: Iterable[Tuple[str, float, int]]) -> bool:
+        """Учитывает курсы дня day (под self._lock)."""
+        if self.last_date is not None and day <= self.last_date:
+            return False
+        stats = self._stats
+        for code, value, nominal in rows:
+            current = stats.get(code)
+            if current is None:
+                current = stats[code] = RollingStats(self.window)
+            current.push(value / nominal)
+        self.last_date = day
+        self.updates += 1
+        return True
+
+    def sync(self, store: HistoryStore) -> int:
+        """Догоняет историю store и возвращает число учтённых новых дней.
+
+        При первом вызове статистика строится заново (rebuild), затем
+        читаются только дни после последнего учтённого. Если в начало
+        истории добавлены более ранние дни (HistoryStore.prepend),
+        статистика тоже строится заново.
+        """
+        with self._lock:
+            first, last = store.first_date(), store.last_date()
+            if last is None:
+                return 0
+            if self.last_date is None or first != self.first_date:
+                return self._rebuild(store)
+            if last <= self.last_date:
+                return 0
+            records = store.records(start=self.last_date + dt.timedelta(days=1))
+            days = records["day"].tolist()
+            codes = records["code"].tolist()
+            values = records["value"].tolist()
+            nominals = records["nominal"].tolist()
+            added = 0
+            start = 0
+            # Записи одного дня идут подряд
+            for end in range(1, len(days) + 1):
+                if end == len(days) or days[end] != days[start]:
+                    rows = (
+                        (codes[row].decode("ascii"), values[row], nominals[row])
+                        for row in range(start, end)
+                    )
+                    added += self._update(day_from_number(days[start]), rows)
+                    start = end
+            return added
+
+    def rebuild(self, store: HistoryStore) -> int:
+        """Строит статистику заново по всей истории store (векторно).
+
+        Возвращает:
+            Число валют в статистике.
+        """
+        with self._lock:
+            return self._rebuild(store)
+
+    def _rebuild(self, store: HistoryStore) -> int:
+        """Строит статистику заново (под self._lock)."""
+        records = store.records()
+        stats: Dict[str, RollingStats] = {}
+        if len(records):
+            codes, inverse = np.unique(records["code"], return_inverse=True)
+            rates = records["value"] / records["nominal"]
+            # Устойчивая сортировка по коду сохраняет порядок дней внутри валюты
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(codes) + 1))
+            for number, code in enumerate(codes.tolist()):
+                rows = order[bounds[number]:bounds[number + 1]][-self.window:]
+                stats[code.decode("ascii")] = RollingStats.from_values(rates[rows], self.window)
+            self.first_date = day_from_number(records["day"][0])
+            self.last_date = day_from_number(records["day"][-1])
+        self._stats = stats
+        return len(stats)
+
+    def stats(self, char_code: str) -> Optional[Dict[str, Any]]:
+        """Возвращает статистику валюты char_code (словарь для JSON) или None."""
+        with self._lock:
+            current = self._stats.get(char_code)
+            if current is None or not len(current):
+                return None
+            return {
+                "char_code": char_code,
+                "date": self.last_date.isoformat() if self.last_date else None,
+                "window": self.window,
+                "count": len(current),
+                "last": current.last,
+                "moving_average": current.mean,
+                "change_std": current.change_std,
+                "min": current.minimum,
+                "max": current.maximum,
+            }
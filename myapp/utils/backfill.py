@@ -0,0 +1,279 @@
+"""Модуль загрузки архива курсов ЦБ РФ в историю курсов.
+
+Здесь определены:
+- load_day — загрузка и разбор документа ValCurs за один день из
+  архива ЦБ РФ (XML_daily.asp?date_req=ДД/ММ/ГГГГ) или из каталога
+  записанных файлов ГГГГ-ММ-ДД.xml;
+- backfill — заполнение HistoryStore за период.
+
+Загрузка и разбор XML выполняются в пуле процессов, а результаты
+собираются в порядке дат и дописываются в историю пакетами по
+batch_days дней. Каждый записанный пакет фиксируется в истории,
+поэтому прерванную загрузку можно просто запустить снова: она
+продолжится с дня, следующего за последним сохранённым, а уже
+сохранённые дни не будут записаны повторно.
+
+История только дописывается в конец, поэтому дни раньше первого
+сохранённого (например, архив прошлых лет после того, как сервер уже
+записал сегодняшний день) собираются в отдельной истории в подкаталоге
+STAGING_DIRECTORY, а в конце добавляются в начало основной
+(HistoryStore.prepend — файлы подменяются атомарно, работающий сервер
+замечает это сам). Прерванная загрузка таких дней тоже продолжается
+с последнего сохранённого в подкаталоге дня.
+
+На запрос выходного или праздничного дня ЦБ РФ возвращает курсы
+последнего рабочего дня; такие повторы по дате документа
+отбрасываются.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import requests
+
+from ..models import Currency
+from .cbr_client import CBR_DAILY_URL, parse_daily_xml
+from .history import HistoryStore
+
+# Подкаталог истории, в котором собираются дни раньше первого сохранённого
+STAGING_DIRECTORY = "backfill"
+
+ARCHIVE_DATE_FORMAT = "%d/%m/%Y"
+DOCUMENT_DATE_FORMAT = "%d.%m.%Y"
+
+# Сессия requests процесса (в рабочих процессах пула — своя)
+_session: Optional[requests.Session] = None
+
+
+def is_url(source: str) -> bool:
+    """Проверяет, является ли источник адресом HTTP(S), а не каталогом."""
+    return source.startswith(("http://", "https://"))
+
+
+def archive_url(source: str, day: dt.date) -> str:
+    """Возвращает адрес документа за день day.
+
+    Если в source есть подстановка {date}, в неё подставляется дата
+    в формате ДД/ММ/ГГГГ; иначе дата передаётся параметром date_req.
+    """
+    date = day.strftime(ARCHIVE_DATE_FORMAT)
+    if "{date}" in source:
+        return source.format(date=date)
+    separator = "&" if "?" in source else "?"
+    return f"{source}{separator}date_req={date}"
+
+
+def load_day(source: str, day: dt.date) -> Optional[Tuple[dt.date, List[Currency]]]:
+    """Загружает и разбирает документ с курсами за день day.
+
+    Аргументы:
+        source: Адрес архива ЦБ РФ (или его заглушки) либо каталог
+            с файлами ГГГГ-ММ-ДД.xml.
+        day: Запрошенный день.
+
+    Возвращает:
+        Дату курсов из документа (она может быть раньше day) и список
+        валют; None, если в каталоге нет файла за этот день или
+        документ не содержит курсов.
+
+    Исключения:
+        requests.RequestException: если архив недоступен.
+        ValueError: если документ не удалось разобрать.
+    """
+    global _session
+    if is_url(source):
+        if _session is None:
+            _session = requests.Session()
+        response = _session.get(archive_url(source, day), timeout=(3.05, 30.0))
+        response.raise_for_status()
+        data = response.content
+    else:
+        path = os.path.join(source, f"{day.isoformat()}.xml")
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+    date, currencies = parse_daily_xml(data)
+    if not date or not currencies:
+        return None
+    return dt.datetime.strptime(date, DOCUMENT_DATE_FORMAT).date(), currencies
+
+
+def _load_day_task(task: Tuple[str, dt.date]) -> Optional[Tuple[dt.date, List[Currency]]]:
+    """Загружает один день в рабочем процессе пула."""
+    return load_day(*task)
+
+
+def _init_worker() -> None:
+    """Не даёт рабочему процессу пользоваться соединениями родителя."""
+    global _session
+    _session = None
+
+
+def days_between(start: dt.date, end: dt.date) -> Iterator[dt.date]:
+    """Перебирает дни от start до end включительно."""
+    for offset in range((end - start).days + 1):
+        yield start + dt.timedelta(days=offset)
+
+
+class BackfillReport:
+    """Итог заполнения истории.
+
+    Атрибуты:
+        requested: Сколько дней запрошено (без уже сохранённых).
+        loaded: Сколько документов загружено и разобрано.
+        written: Сколько новых дней записано в историю.
+        last_date: Последний сохранённый день после загрузки.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустой итог."""
+        self.requested = 0
+        self.loaded = 0
+        self.written = 0
+        self.last_date: Optional[dt.date] = None
+
+    def __repr__(self) -> str:
+        """Возвращает краткое описание итога."""
+        return (
+            f"BackfillReport(requested={self.requested}, loaded={self.loaded}, "
+            f"written={self.written}, last_date={self.last_date})"
+        )
+
+
+def _write_batch(
+    store: HistoryStore,
+    batch: List[Tuple[dt.date, List[Currency]]],
+    report: BackfillReport,
+    progress: Optional[Callable[[BackfillReport], None]],
+) -> None:
+    """Дописывает пакет дней в историю и учитывает его в report.
+
+    Исключения:
+        ValueError: если часть дней не записана — во время загрузки
+            в историю дописан более поздний день.
+    """
+    written = store.append_many(batch)
+    report.written += written
+    if written < len(batch):
+        raise ValueError(
+            f"Курсы за {len(batch) - written} дн. не записаны: во время загрузки "
+            f"в историю дописан день {store.last_date()}; запустите загрузку снова."
+        )
+    if progress is not None:
+        report.last_date = batch[-1][0]
+        progress(report)
+
+
+def backfill(
+    store: HistoryStore,
+    start: dt.date,
+    end: dt.date,
+    source: str = CBR_DAILY_URL,
+    workers: Optional[int] = None,
+    batch_days: int = 256,
+    progress: Optional[Callable[[BackfillReport], None]] = None,
+) -> BackfillReport:
+    """Заполняет историю store курсами за дни от start до end.
+
+    Загружаются дни после последнего сохранённого и дни раньше
+    первого сохранённого; вторые собираются в подкаталоге
+    STAGING_DIRECTORY и добавляются в начало истории одной подменой
+    файлов (HistoryStore.prepend). Ошибка загрузки любого дня прерывает
+    работу; пакеты, записанные до неё, сохраняются (ранние дни —
+    в подкаталоге) и при повторном запуске не загружаются снова.
+
+    Аргументы:
+        store: История курсов.
+        start: Первый день периода.
+        end: Последний день периода.
+        source: Адрес архива или каталог с файлами ГГГГ-ММ-ДД.xml.
+        workers: Число процессов (None — по числу процессоров,
+            1 — без пула, в текущем процессе).
+        batch_days: Сколько дней дописывается в историю за раз.
+        progress: Функция, которая вызывается после каждого пакета.
+
+    Исключения:
+        ValueError: если start позже end, workers или batch_days
+            меньше единицы, документ не удалось разобрать либо в пустую
+            историю во время загрузки дописан более поздний день
+            (повторный запуск добавит остальные дни в её начало).
+        requests.RequestException: если архив недоступен.
+    """
+    if start > end:
+        raise ValueError("Начало периода позже его конца.")
+    if batch_days < 1 or (workers is not None and workers < 1):
+        raise ValueError("Число процессов и размер пакета должны быть больше нуля.")
+    report = BackfillReport()
+    first, last = store.first_date(), store.last_date()
+    days = list(days_between(start, end))
+    staging: Optional[HistoryStore] = None
+    if first is not None and last is not None:
+        # Дни с first по last уже загружены; остаются дни до first и после last
+        days = [day for day in days if day < first or day > last]
+        if days and days[0] < first:
+            staging = HistoryStore(os.path.join(store.directory, STAGING_DIRECTORY))
+            staged = staging.last_date()
+            if staged is not None:
+                days = [day for day in days if day > staged]
+    tasks = [(source, day) for day in days]
+    report.requested = len(tasks)
+
+    executor = None
+    if tasks and workers != 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        if executor is not None:
+            # map выдаёт результаты в порядке дней, хотя дни загружаются параллельно
+            results = executor.map(_load_day_task, tasks, chunksize=8)
+        else:
+            results = map(_load_day_task, tasks)
+        batch: List[Tuple[dt.date, List[Currency]]] = []
+        previous: Optional[dt.date] = staging.last_date() if staging is not None else None
+        target = staging if staging is not None else store
+        for result in results:
+            if result is None:
+                continue
+            report.loaded += 1
+            date, currencies = result
+            # Выходные дни повторяют курсы последнего рабочего дня
+            if previous is not None and date <= previous:
+                continue
+            previous = date
+            if first is not None and last is not None and first <= date <= last:
+                continue
+            if target is staging and last is not None and date > last:
+                # Ранние дни закончились: добавляем их в начало истории
+                if batch:
+                    _write_batch(target, batch, report, progress)
+                    batch = []
+                _merge_staging(store, target)
+                target = store
+            batch.append((date, currencies))
+            if len(batch) >= batch_days:
+                _write_batch(target, batch, report, progress)
+                batch = []
+        if batch:
+            _write_batch(target, batch, report, progress)
+        if target is not store:
+            _merge_staging(store, target)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if staging is not None:
+            staging.close()
+    report.last_date = store.last_date()
+    return report
+
+
+def _merge_staging(store: HistoryStore, staging: HistoryStore) -> None:
+    """Добавляет дни из подкаталога staging в начало истории store и удаляет его."""
+    store.prepend(staging)
+    staging.close()
+    shutil.rmtree(staging.directory)
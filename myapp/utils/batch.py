@@ -0,0 +1,272 @@
+"""Модуль пакетной конвертации валют.
+
+Здесь собраны функции для POST-запроса с тройками
+(from, to, amount) в формате CSV или JSON:
+- BodyReader читает тело запроса не дальше Content-Length;
+- iter_csv_rows и iter_json_rows разбирают тело по частям,
+  не держа его целиком в памяти в виде строки;
+- convert_batch переводит все суммы одним векторным проходом
+  по матрице кросс-курсов.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import re
+from array import array
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .conversion import RateMatrix
+
+Row = Tuple[str, str, object]
+
+# Наибольший размер одного элемента JSON-массива в символах: незавершённый
+# элемент разбирается заново после каждой порции, поэтому размер ограничен
+MAX_ITEM_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+class BodyReader(io.RawIOBase):
+    """Поток, читающий из rfile не больше length байтов тела запроса."""
+
+    def __init__(self, rfile: BinaryIO, length: int) -> None:
+        """Запоминает исходный поток и длину тела."""
+        super().__init__()
+        self._rfile = rfile
+        self.remaining = length
+
+    def readable(self) -> bool:
+        """Поток доступен для чтения."""
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        """Читает очередную порцию тела в buffer."""
+        if self.remaining <= 0:
+            return 0
+        size = min(len(buffer), self.remaining)
+        data = self._rfile.read(size)
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+        if not data:
+            self.remaining = 0
+        return len(data)
+
+
+def _row(item: object, number: int) -> Row:
+    """Приводит элемент JSON ([from, to, amount] или объект) к тройке.
+
+    Исключения:
+        ValueError: если элемент имеет неверную форму.
+    """
+    if isinstance(item, dict):
+        try:
+            return item["from"], item["to"], item["amount"]
+        except KeyError:
+            pass
+    elif isinstance(item, list) and len(item) == 3:
+        return item[0], item[1], item[2]
+    raise ValueError(f"Строка {number}: ожидалась тройка from, to, amount.")
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Row]:
+    """Выдаёт тройки из CSV-тела (UTF-8), читая его построчно.
+
+    Первая строка from,to,amount считается заголовком и пропускается.
+
+    Исключения:
+        ValueError: если в строке не три поля или CSV некорректен
+            (например, поле длиннее csv.field_size_limit()).
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding="utf-8", newline="")
+    reader = csv.reader(text)
+    try:
+        for number, fields in enumerate(reader, start=1):
+            if not fields:
+                continue
+            if number == 1 and [f.strip().lower() for f in fields] == ["from", "to", "amount"]:
+                continue
+            if len(fields) != 3:
+                raise ValueError(f"Строка {number}: ожидалось три поля from, to, amount.")
+            yield fields[0], fields[1], fields[2]
+    except csv.Error as error:
+        raise ValueError(f"Строка {reader.line_num}: некорректный CSV ({error}).") from error
+    except UnicodeDecodeError as error:
+        raise ValueError("Тело запроса должно быть в кодировке UTF-8.") from error
+
+
+def iter_json_rows(
+    stream: BinaryIO, chunk_size: int = 64 * 1024, max_item_size: int = MAX_ITEM_SIZE
+) -> Iterator[Row]:
+    """Выдаёт тройки из JSON-массива, разбирая его по элементам.
+
+    Элемент массива — [from, to, amount] или
+    {"from": ..., "to": ..., "amount": ...}. В памяти держится
+    только ещё не разобранный остаток очередной порции данных.
+
+    Исключения:
+        ValueError: если тело не является JSON-массивом троек
+            или элемент длиннее max_item_size символов.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> None:
+        """Дочитывает следующую порцию, отбрасывая уже разобранную часть буфера."""
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    def skip_whitespace() -> str:
+        """Пропускает пробелы и возвращает следующий символ ('' в конце)."""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    try:
+        if skip_whitespace() != "[":
+            raise ValueError("Тело запроса должно быть JSON-массивом.")
+        pos += 1
+        number = 0
+        expect_value = True
+        while True:
+            char = skip_whitespace()
+            if char == "]" and (number == 0 or not expect_value):
+                pos += 1
+                break
+            if not expect_value:
+                if char != ",":
+                    raise ValueError("Ожидалась запятая между элементами массива.")
+                pos += 1
+                expect_value = True
+                continue
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # Значение, упёршееся в конец буфера, может продолжаться в следующей порции
+                    if end < len(buffer) or eof:
+                        break
+                if len(buffer) - pos > max_item_size:
+                    raise ValueError(
+                        f"Строка {number + 1}: элемент длиннее {max_item_size} символов."
+                    )
+                fill()
+            pos = end
+            number += 1
+            expect_value = False
+            yield _row(item, number)
+        if skip_whitespace():
+            raise ValueError("Лишние данные после JSON-массива.")
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Некорректный JSON: {error.msg}.") from error
+    except UnicodeDecodeError as error:
+        raise ValueError("Тело запроса должно быть в кодировке UTF-8.") from error
+
+
+class BatchResult:
+    """Результат пакетной конвертации.
+
+    Атрибуты:
+        from_rows: Номера строк матрицы исходных валют.
+        to_rows: Номера строк матрицы целевых валют.
+        amounts: Исходные суммы.
+        results: Суммы после конвертации.
+    """
+
+    __slots__ = ("from_rows", "to_rows", "amounts", "results", "_codes")
+
+    def __init__(
+        self,
+        matrix: RateMatrix,
+        from_rows: np.ndarray,
+        to_rows: np.ndarray,
+        amounts: np.ndarray,
+    ) -> None:
+        """Выполняет конвертацию всех сумм одной векторной операцией."""
+        self.from_rows = from_rows
+        self.to_rows = to_rows
+        self.amounts = amounts
+        self.results = matrix.matrix[from_rows, to_rows] * amounts
+        self._codes = matrix.codes
+
+    def __len__(self) -> int:
+        """Возвращает количество сконвертированных строк."""
+        return len(self.results)
+
+    def to_json(self) -> bytes:
+        """Возвращает результат в виде JSON {"results": [...]}."""
+        return json.dumps({"results": self.results.tolist()}).encode("utf-8")
+
+    def iter_csv(self, rows_per_chunk: int = 4096) -> Iterator[bytes]:
+        """Выдаёт CSV (from,to,amount,result) порциями по rows_per_chunk строк."""
+        codes = self._codes
+        yield b"from,to,amount,result\r\n"
+        columns = (
+            self.from_rows.tolist(),
+            self.to_rows.tolist(),
+            self.amounts.tolist(),
+            self.results.tolist(),
+        )
+        for start in range(0, len(self), rows_per_chunk):
+            stop = start + rows_per_chunk
+            lines: List[str] = [
+                f"{codes[f]},{codes[t]},{a!r},{r!r}\r\n"
+                for f, t, a, r in zip(*(column[start:stop] for column in columns))
+            ]
+            yield "".join(lines).encode("utf-8")
+
+
+def convert_batch(matrix: RateMatrix, rows: Iterable[Row]) -> BatchResult:
+    """Переводит все тройки (from, to, amount) по матрице кросс-курсов.
+
+    При разборе строки превращаются в компактные массивы номеров
+    валют и сумм, а сама конвертация выполняется одной операцией NumPy.
+
+    Исключения:
+        ValueError: если валюта неизвестна или сумма не является
+            конечным числом (в тексте указан номер строки).
+    """
+    index = matrix.index
+    from_rows = array("q")
+    to_rows = array("q")
+    amounts = array("d")
+    for number, (from_code, to_code, amount) in enumerate(rows, start=1):
+        try:
+            from_rows.append(index[str(from_code).strip().upper()])
+            to_rows.append(index[str(to_code).strip().upper()])
+        except KeyError:
+            raise ValueError(f"Строка {number}: неизвестная валюта.") from None
+        try:
+            if isinstance(amount, bool):
+                raise TypeError
+            amounts.append(float(amount))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            raise ValueError(f"Строка {number}: сумма должна быть числом.") from None
+
+    amount_array = np.frombuffer(amounts, dtype=np.float64)
+    if not np.isfinite(amount_array).all():
+        bad = int(np.argmin(np.isfinite(amount_array))) + 1
+        raise ValueError(f"Строка {bad}: сумма должна быть конечным числом.")
+    return BatchResult(
+        matrix,
+        np.frombuffer(from_rows, dtype=np.int64),
+        np.frombuffer(to_rows, dtype=np.int64),
+        amount_array,
+    )
@@ -0,0 +1,118 @@
+"""Модуль клиента ежедневных курсов ЦБ РФ.
+
+Здесь определён класс CbrClient, который загружает XML-документ
+с курсами валют (https://www.cbr.ru/scripts/XML_daily.asp) и
+превращает его в список объектов Currency. Ответ разбирается
+потоком (см. cbr_parser) по мере получения, без чтения всего тела.
+
+Клиент переиспользует соединения через requests.Session,
+отправляет условные запросы (If-None-Match, If-Modified-Since)
+и при ответе 304 возвращает прежний список без разбора XML.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+from typing import List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..models import Currency
+from .cbr_parser import parse_currencies
+
+CBR_DAILY_URL = "https://www.cbr.ru/scripts/XML_daily.asp"
+
+
+def parse_daily_xml(data: bytes) -> Tuple[str, List[Currency]]:
+    """Разбирает документ ValCurs и возвращает дату курсов и список валют.
+
+    Исключения:
+        ValueError: если документ не является корректным ValCurs.
+    """
+    return parse_currencies(io.BytesIO(data))
+
+
+class CbrClient:
+    """Клиент XML-ленты ежедневных курсов ЦБ РФ.
+
+    Атрибуты:
+        url: Адрес ленты курсов.
+        timeout: Пара (тайм-аут соединения, тайм-аут чтения) в секундах.
+        date: Дата последних загруженных курсов (например, "17.10.2026").
+        requests_sent: Количество отправленных запросов.
+        not_modified: Количество ответов 304 (без разбора XML).
+    """
+
+    def __init__(
+        self,
+        url: str = CBR_DAILY_URL,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        pool_size: int = 4,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        """Создаёт клиента и пул соединений.
+
+        Аргументы:
+            url: Адрес ленты курсов.
+            connect_timeout: Тайм-аут установки соединения в секундах.
+            read_timeout: Тайм-аут чтения ответа в секундах.
+            pool_size: Максимальное число соединений в пуле.
+            session: Готовая сессия requests (по умолчанию создаётся новая).
+        """
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.date = ""
+        self.requests_sent = 0
+        self.not_modified = 0
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._currencies: Optional[List[Currency]] = None
+        self._lock = threading.Lock()
+
+    def fetch(self) -> List[Currency]:
+        """Загружает текущие курсы валют.
+
+        Если лента не изменилась (ответ 304), возвращает тот же
+        список, что и в прошлый раз.
+
+        Исключения:
+            requests.RequestException: при сетевой ошибке, тайм-ауте
+                или HTTP-статусе ошибки.
+            ValueError: если ответ не удалось разобрать.
+        """
+        with self._lock:
+            headers = {}
+            if self._currencies is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+
+            response = self.session.get(
+                self.url, headers=headers, timeout=self.timeout, stream=True
+            )
+            self.requests_sent += 1
+            with response:
+                if response.status_code == 304 and self._currencies is not None:
+                    self.not_modified += 1
+                    return self._currencies
+                response.raise_for_status()
+
+                response.raw.decode_content = True
+                self.date, self._currencies = parse_currencies(response.raw)
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
+            return self._currencies
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.session.close()
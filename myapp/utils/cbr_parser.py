@@ -0,0 +1,85 @@
+"""Модуль потокового разбора XML-документа с курсами ЦБ РФ.
+
+Здесь определён класс ValCursReader, который читает документ
+ValCurs по частям через xml.etree.ElementTree.iterparse и выдаёт
+объекты Currency по одному. Разобранные элементы сразу очищаются,
+поэтому в памяти не бывает ни полного дерева, ни всего тела ответа.
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, List, Tuple
+
+from ..models import Currency
+
+
+def _parse_valute(element: ET.Element) -> Currency:
+    """Превращает элемент Valute в объект Currency.
+
+    Идентификатором валюты служит её цифровой код, поэтому он
+    не меняется от одного дня к другому.
+
+    Исключения:
+        ValueError: если поля элемента отсутствуют или некорректны.
+    """
+    num_code = int(element.findtext("NumCode", ""))
+    return Currency(
+        currency_id=num_code,
+        num_code=num_code,
+        char_code=element.findtext("CharCode", ""),
+        name=element.findtext("Name", ""),
+        value=float(element.findtext("Value", "").replace(",", ".")),
+        nominal=int(element.findtext("Nominal", "")),
+    )
+
+
+class ValCursReader:
+    """Потоковый читатель документа ValCurs.
+
+    Итерация по объекту выдаёт валюты в порядке документа.
+    Дата курсов (атрибут Date) доступна в date сразу после
+    того, как прочитан открывающий тег ValCurs.
+
+    Атрибуты:
+        date: Дата курсов, например "17.10.2026".
+    """
+
+    def __init__(self, source: BinaryIO) -> None:
+        """Запоминает источник байтов (файл, ответ HTTP и т. п.)."""
+        self._source = source
+        self.date = ""
+
+    def __iter__(self) -> Iterator[Currency]:
+        """Читает документ по частям и выдаёт валюты по одной.
+
+        Исключения:
+            ValueError: если документ не является корректным ValCurs.
+        """
+        root = None
+        try:
+            for event, element in ET.iterparse(self._source, events=("start", "end")):
+                if root is None:
+                    if element.tag != "ValCurs":
+                        raise ValueError("Ожидался корневой элемент ValCurs.")
+                    root = element
+                    self.date = element.get("Date", "")
+                    continue
+                if event == "end" and element.tag == "Valute":
+                    yield _parse_valute(element)
+                    # Освобождаем разобранные элементы, чтобы дерево не росло
+                    element.clear()
+                    root.clear()
+        except ET.ParseError as error:
+            raise ValueError(f"Некорректный XML с курсами валют: {error}") from error
+
+
+def parse_currencies(source: BinaryIO) -> Tuple[str, List[Currency]]:
+    """Читает весь документ и возвращает дату курсов и список валют.
+
+    Исключения:
+        ValueError: если документ не является корректным ValCurs.
+    """
+    reader = ValCursReader(source)
+    currencies = list(reader)
+    return reader.date, currencies
@@ -0,0 +1,122 @@
+"""Модуль сжатия HTTP-ответов.
+
+Здесь собраны функции для согласования Accept-Encoding
+и сжатия тела ответа. gzip доступен всегда; brotli ("br")
+и zstd подключаются, только если установлены модули brotli
+и zstandard соответственно.
+
+Тела меньше MIN_COMPRESS_SIZE байтов не сжимаются: выигрыш
+в размере для них меньше затрат на сжатие.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # модуль необязательный
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # модуль необязательный
+    zstandard = None
+
+MIN_COMPRESS_SIZE = 1024
+
+# Для каждого способа: (быстрое сжатие, сильное сжатие). Сильное
+# используется для страниц из кэша, которые сжимаются один раз.
+_Compressor = Callable[[bytes], bytes]
+ENCODERS: Dict[str, Tuple[_Compressor, _Compressor]] = {}
+
+# Объекты ZstdCompressor потока: {уровень: ZstdCompressor}
+_zstd_local = threading.local()
+
+
+def _zstd(level: int) -> _Compressor:
+    """Возвращает функцию zstd-сжатия уровня level.
+
+    Один ZstdCompressor нельзя использовать из нескольких потоков
+    одновременно, поэтому у каждого потока свой объект на уровень.
+    """
+
+    def compress_zstd(body: bytes) -> bytes:
+        """Сжимает body компрессором текущего потока (создаёт его при первом вызове)."""
+        compressors = getattr(_zstd_local, "compressors", None)
+        if compressors is None:
+            compressors = _zstd_local.compressors = {}
+        compressor = compressors.get(level)
+        if compressor is None:
+            compressor = compressors[level] = zstandard.ZstdCompressor(level=level)
+        return compressor.compress(body)
+
+    return compress_zstd
+
+
+if brotli is not None:
+    ENCODERS["br"] = (
+        lambda body: brotli.compress(body, quality=5),
+        lambda body: brotli.compress(body, quality=11),
+    )
+if zstandard is not None:
+    ENCODERS["zstd"] = (_zstd(3), _zstd(19))
+ENCODERS["gzip"] = (
+    lambda body: gzip.compress(body, compresslevel=5, mtime=0),
+    lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+)
+
+
+def negotiate(
+    accept_encoding: Optional[str],
+    encodings: Iterable[str] = ENCODERS,
+) -> Optional[str]:
+    """Выбирает способ сжатия по заголовку Accept-Encoding.
+
+    Среди способов encodings, которые клиент принимает (q > 0),
+    выбирается первый по порядку предпочтения сервера (br, zstd, gzip).
+
+    Возвращает:
+        Имя способа сжатия или None, если ответ отправляется без сжатия.
+    """
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in encodings:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, thorough: bool = False) -> bytes:
+    """Сжимает body способом encoding.
+
+    Аргументы:
+        body: Исходное тело ответа.
+        encoding: Имя способа сжатия из ENCODERS.
+        thorough: Сжимать сильнее (медленнее) — для кэшируемых тел.
+
+    Исключения:
+        ValueError: если способ сжатия не поддерживается.
+    """
+    try:
+        fast, best = ENCODERS[encoding]
+    except KeyError:
+        raise ValueError(f"Неподдерживаемый способ сжатия: {encoding}.") from None
+    return (best if thorough else fast)(body)
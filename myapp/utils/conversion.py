@@ -0,0 +1,90 @@
+"""Модуль конвертации валют по матрице кросс-курсов.
+
+Здесь определён класс RateMatrix: по таблице курсов CurrencyTable
+один раз строится квадратная матрица, где элемент [i, j] — сколько
+единиц валюты j дают за одну единицу валюты i. Базовая валюта —
+российский рубль (RUB), курсы ЦБ РФ указаны именно к нему.
+
+Конвертация — это один поиск в словаре кодов, одно обращение
+к матрице и одно умножение.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List
+
+import numpy as np
+
+from ..models import CurrencyTable
+
+BASE_CURRENCY = "RUB"
+
+
+class RateMatrix:
+    """Матрица кросс-курсов для одного набора курсов.
+
+    Атрибуты:
+        codes: Символьные коды валют в порядке строк матрицы.
+        index: Словарь «символьный код -> номер строки».
+        matrix: Матрица кросс-курсов (только для чтения).
+    """
+
+    __slots__ = ("codes", "index", "matrix")
+
+    def __init__(self, table: CurrencyTable) -> None:
+        """Строит матрицу кросс-курсов по таблице курсов к рублю.
+
+        Если рубля нет в таблице, он добавляется с курсом 1.
+        """
+        unit_rates = table.unit_rates()
+        codes: List[str] = list(table.char_codes)
+        if BASE_CURRENCY not in table:
+            unit_rates = np.append(unit_rates, 1.0)
+            codes.append(BASE_CURRENCY)
+        matrix = unit_rates[:, np.newaxis] / unit_rates[np.newaxis, :]
+        matrix.flags.writeable = False
+        self.codes = codes
+        self.index: Dict[str, int] = {code: row for row, code in enumerate(codes)}
+        self.matrix = matrix
+
+    @classmethod
+    def from_matrix(cls, codes: List[str], matrix: np.ndarray) -> RateMatrix:
+        """Создаёт объект поверх готовой матрицы без копирования (например, в общей памяти).
+
+        Исключения:
+            ValueError: если матрица не квадратная по числу кодов
+                или доступна для записи.
+        """
+        if matrix.shape != (len(codes), len(codes)):
+            raise ValueError("Размер матрицы не совпадает с числом валют.")
+        if matrix.flags.writeable:
+            raise ValueError("Матрица кросс-курсов должна быть только для чтения.")
+        rate_matrix = object.__new__(cls)
+        rate_matrix.codes = list(codes)
+        rate_matrix.index = {code: row for row, code in enumerate(rate_matrix.codes)}
+        rate_matrix.matrix = matrix
+        return rate_matrix
+
+    def __contains__(self, char_code: object) -> bool:
+        """Проверяет, известна ли валюта матрице."""
+        return char_code in self.index
+
+    def rate(self, from_code: str, to_code: str) -> float:
+        """Возвращает кросс-курс: сколько to_code дают за одну единицу from_code.
+
+        Исключения:
+            KeyError: если одна из валют неизвестна.
+        """
+        return float(self.matrix[self.index[from_code], self.index[to_code]])
+
+    def convert(self, from_code: str, to_code: str, amount: float) -> float:
+        """Переводит сумму amount из валюты from_code в валюту to_code.
+
+        Исключения:
+            KeyError: если одна из валют неизвестна.
+            ValueError: если сумма не является конечным числом.
+        """
+        if not math.isfinite(amount):
+            raise ValueError("Сумма должна быть конечным числом.")
+        return float(self.matrix[self.index[from_code], self.index[to_code]] * amount)
@@ -1,44 +1,197 @@
 """Модуль для получения курсов валют.
 
-В этой простой версии функция get_currencies возвращает
-несколько тестовых валют. Позже сюда можно подключить
-реальный запрос к API (например, ЦБ РФ).
+Курсы загружаются из XML-ленты ЦБ РФ клиентом CbrClient.
+Адрес ленты можно переопределить переменной окружения
+CBR_DAILY_URL (например, для локальной заглушки).
+
+Курсы загружает фоновый поток rates (RatesRefresher) и публикует
+их неизменяемым снимком RatesSnapshot; обработчики запросов только
+читают текущий снимок через get_snapshot и не ждут загрузки. Пока
+курсов нет, get_snapshot вызывает RatesUnavailable.
+Из снимка же берутся список валют (get_currencies), столбцовая
+таблица для векторных расчётов (get_currency_table) и матрица
+кросс-курсов для конвертации (get_rate_matrix).
+
+В многопроцессном режиме курсы загружает только главный процесс,
+а рабочие читают снимок из общей памяти (см. use_shared_rates).
+
+Каждый новый набор курсов дописывается в историю курсов history
+(HistoryStore в каталоге MYAPP_HISTORY, по умолчанию "history"),
+а скользящая статистика analytics (окно MYAPP_STATS_WINDOW дней,
+по умолчанию 30) догоняет историю по одному дню.
+
+Время обращений к ленте и число неудачных обращений учитываются
+в метриках UPSTREAM_FETCH и UPSTREAM_ERRORS, обновления курсов
+(счётчики rates.refreshes, rates.errors и rates.failures) —
+в RATES_REFRESHES, RATES_REFRESH_ERRORS и RATES_REFRESH_FAILURES,
+ошибки записи истории — в HISTORY_ERRORS.
 """
 
 from __future__ import annotations
-from typing import List
-from ..models import Currency
+
+import datetime as dt
+import os
+from typing import List, Optional, Tuple
+
+from ..models import Currency, CurrencyTable
+from .cbr_client import CBR_DAILY_URL, CbrClient
+from .analytics import RateAnalytics
+from .conversion import RateMatrix
+from .history import HistoryStore
+from .metrics import REGISTRY
+from .rates import RatesRefresher, RatesSnapshot, RatesUnavailable
+from .shared_rates import SharedRatesReader
+
+UPSTREAM_FETCH = REGISTRY.histogram(
+    "myapp_upstream_fetch_seconds",
+    "Время загрузки ленты курсов ЦБ РФ.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "myapp_upstream_errors_total", "Неудачные загрузки ленты курсов ЦБ РФ."
+)
+HISTORY_ERRORS = REGISTRY.counter(
+    "myapp_history_errors_total", "Неудачные записи курсов в историю."
+)
+RATES_REFRESHES = REGISTRY.counter(
+    "myapp_rates_refreshes_total", "Успешные обновления курсов."
+)
+RATES_REFRESH_ERRORS = REGISTRY.counter(
+    "myapp_rates_refresh_errors_total", "Неудачные обновления курсов."
+)
+RATES_REFRESH_FAILURES = REGISTRY.gauge(
+    "myapp_rates_refresh_failures", "Неудачные обновления курсов подряд."
+)
+
+_client = CbrClient(url=os.environ.get("CBR_DAILY_URL", CBR_DAILY_URL))
+
+
+def get_client() -> CbrClient:
+    """Возвращает клиента ленты курсов, которым пользуется приложение."""
+    return _client
+
+
+def set_client(client: CbrClient) -> None:
+    """Заменяет клиента ленты курсов и сбрасывает текущий снимок курсов.
+
+    Исключения:
+        TypeError: если client не является CbrClient.
+    """
+    global _client
+    if not isinstance(client, CbrClient):
+        raise TypeError("Клиент должен быть экземпляром CbrClient.")
+    _client = client
+    rates.reset()
+
+
+def fetch_currencies() -> List[Currency]:
+    """Загружает актуальный список валют из ленты ЦБ РФ.
+
+    Исключения:
+        requests.RequestException: если лента недоступна.
+        ValueError: если ответ ленты не удалось разобрать.
+    """
+    with UPSTREAM_FETCH.time():
+        try:
+            return _client.fetch()
+        except Exception:
+            UPSTREAM_ERRORS.inc()
+            raise
+
+
+def _load_rates() -> Tuple[str, List[Currency]]:
+    """Загружает курсы: возвращает дату курсов и список валют.
+
+    Итог загрузки учитывается в метриках обновлений курсов так же,
+    как в счётчиках rates (refreshes, errors и failures).
+    """
+    try:
+        currencies = fetch_currencies()
+    except Exception:
+        RATES_REFRESH_ERRORS.inc()
+        RATES_REFRESH_FAILURES.inc()
+        raise
+    RATES_REFRESHES.inc()
+    RATES_REFRESH_FAILURES.set(0)
+    return _client.date, currencies
+
+
+# Текущие курсы; поток обновления запускается сервером (rates.start()).
+# CURRENCIES_TTL — наибольший промежуток между обновлениями в секундах.
+rates = RatesRefresher(_load_rates, interval=float(os.environ.get("CURRENCIES_TTL", "3600")))
+
+# История курсов: файлы открываются при первом обращении
+history = HistoryStore(os.environ.get("MYAPP_HISTORY", "history"))
+
+# Скользящая статистика курсов; строится по history при первом обращении
+analytics = RateAnalytics(int(os.environ.get("MYAPP_STATS_WINDOW", "30")))
+
+
+def _record_history(snapshot: RatesSnapshot) -> None:
+    """Дописывает курсы нового снимка в историю и обновляет статистику.
+
+    День берётся из даты ленты.
+
+    Ошибка записи не мешает публикации снимка: она только учитывается
+    в метрике HISTORY_ERRORS.
+    """
+    try:
+        day = dt.datetime.strptime(snapshot.date, "%d.%m.%Y").date()
+        if history.append(day, snapshot.currencies):
+            analytics.sync(history)
+    except (OSError, ValueError):
+        HISTORY_ERRORS.inc()
+
+
+rates.subscribe(_record_history)
+
+# Снимок курсов в общей памяти, который публикует главный процесс (или None)
+_shared: Optional[SharedRatesReader] = None
+
+
+def use_shared_rates(reader: Optional[SharedRatesReader]) -> None:
+    """Переключает get_snapshot на снимок из общей памяти (None — обратно на rates).
+
+    Пока в общей памяти нет ни одной версии, курсы загружаются
+    как обычно, через rates.
+    """
+    global _shared
+    _shared = reader
+
+
+def get_snapshot() -> RatesSnapshot:
+    """Возвращает текущий неизменяемый снимок курсов.
+
+    Обработчик, которому нужно несколько представлений курсов
+    (список, таблица, матрица), берёт их из одного снимка.
+
+    Исключения:
+        RatesUnavailable: если курсы ещё не загружены.
+    """
+    shared = _shared
+    if shared is not None:
+        snapshot = shared.read()
+        if snapshot is not None:
+            return snapshot
+    return rates.get()
 
 
 def get_currencies() -> List[Currency]:
-    """Возвращает список тестовых валют.
-
-    Сейчас данные «зашиты» в коде, чтобы упростить
-    разработку и демонстрацию работы шаблонов.
-    """
-    return [
-        Currency(
-            currency_id=1,
-            num_code=840,
-            char_code="USD",
-            name="Доллар США",
-            value=90.5,
-            nominal=1,
-        ),
-        Currency(
-            currency_id=2,
-            num_code=978,
-            char_code="EUR",
-            name="Евро",
-            value=95.2,
-            nominal=1,
-        ),
-        Currency(
-            currency_id=3,
-            num_code=643,
-            char_code="RUB",
-            name="Российский рубль",
-            value=1.0,
-            nominal=1,
-        ),
-    ]
\ No newline at end of file
+    """Возвращает список валют из текущего снимка курсов."""
+    return list(get_snapshot().currencies)
+
+
+def get_currency_table() -> CurrencyTable:
+    """Возвращает текущие курсы в виде столбцовой таблицы CurrencyTable.
+
+    Таблица строится один раз для каждого нового набора курсов.
+    """
+    return get_snapshot().table
+
+
+def get_rate_matrix() -> RateMatrix:
+    """Возвращает матрицу кросс-курсов для текущих курсов.
+
+    Матрица строится один раз для каждого нового набора курсов.
+    """
+    return get_snapshot().matrix
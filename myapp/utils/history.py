@@ -0,0 +1,451 @@
+"""Модуль хранилища истории курсов на диске.
+
+Здесь определены:
+- HistoryStore — хранилище ежедневных курсов, в которое данные
+  только дописываются, а читаются через mmap;
+- RateSeries — временной ряд курса одной валюты.
+
+Хранилище — два файла в каталоге directory:
+- rates.dat — записи фиксированной ширины (RECORD, 24 байта):
+  день, номинал, символьный код и курс; записи одного дня идут
+  подряд, дни — по возрастанию;
+- rates.idx — индекс дней (INDEX_ENTRY, 16 байтов): день, число
+  записей и номер первой записи дня.
+
+Запрос за период — два двоичных поиска по индексу и срез отображённого
+файла записей; файл целиком в память не читается. Новый день
+дописывается в конец: сначала записи, затем строка индекса, которая
+и фиксирует день. Хвост записей без строки индекса (после сбоя)
+отбрасывается при следующей записи.
+
+Дни раньше первого сохранённого добавляет prepend: он собирает оба
+файла заново во временном каталоге и подменяет ими прежние (os.replace)
+под блокировкой записи. Остальные экземпляры — в том числе в других
+процессах — замечают подмену по номеру inode файла индекса и открывают
+новые файлы.
+
+Дни хранятся как число дней от 1970-01-01 — то же представление,
+что у numpy.datetime64[D].
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import fcntl
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models import Currency
+
+RECORD = np.dtype([("day", "<i4"), ("nominal", "<i4"), ("code", "S8"), ("value", "<f8")])
+INDEX_ENTRY = np.dtype([("day", "<i4"), ("count", "<i4"), ("start", "<i8")])
+
+DATA_MAGIC = b"CBRHDAT1" + bytes(8)
+INDEX_MAGIC = b"CBRHIDX1" + bytes(8)
+HEADER_SIZE = 16
+
+_EPOCH = dt.date(1970, 1, 1)
+
+
+def day_number(day: dt.date) -> int:
+    """Возвращает номер дня от 1970-01-01."""
+    return (day - _EPOCH).days
+
+
+def day_from_number(number: int) -> dt.date:
+    """Возвращает дату по номеру дня от 1970-01-01."""
+    return _EPOCH + dt.timedelta(days=int(number))
+
+
+class RateSeries:
+    """Временной ряд курса одной валюты.
+
+    Атрибуты:
+        char_code: Символьный код валюты.
+        days: Даты (numpy.datetime64[D]).
+        values: Курсы за номинал (float64).
+        nominals: Номиналы (int32).
+    """
+
+    __slots__ = ("char_code", "days", "values", "nominals")
+
+    def __init__(
+        self, char_code: str, days: np.ndarray, values: np.ndarray, nominals: np.ndarray
+    ) -> None:
+        """Создаёт ряд из столбцов одинаковой длины."""
+        self.char_code = char_code
+        self.days = days
+        self.values = values
+        self.nominals = nominals
+
+    def __len__(self) -> int:
+        """Возвращает количество точек ряда."""
+        return len(self.days)
+
+    def unit_rates(self) -> np.ndarray:
+        """Возвращает курсы за одну единицу валюты (value / nominal)."""
+        return self.values / self.nominals
+
+    def to_json(self) -> Dict[str, Any]:
+        """Возвращает ряд в виде словаря для JSON (столбцами)."""
+        return {
+            "char_code": self.char_code,
+            "dates": np.datetime_as_string(self.days, unit="D").tolist(),
+            "values": self.values.tolist(),
+            "nominals": self.nominals.tolist(),
+        }
+
+
+class HistoryStore:
+    """Хранилище ежедневных курсов: запись только в конец, чтение через mmap.
+
+    Дописывать может несколько процессов: запись защищена
+    блокировкой fcntl.flock на файле индекса. Читатели замечают
+    новые дни по размеру файла индекса, а подмену файлов (prepend) —
+    по номеру inode файла индекса.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Запоминает каталог; файлы открываются при первом обращении."""
+        self.directory = directory
+        self.data_path = os.path.join(directory, "rates.dat")
+        self.index_path = os.path.join(directory, "rates.idx")
+        self._lock = threading.Lock()
+        self._index_file: Optional[Any] = None
+        self._data_file: Optional[Any] = None
+        self._index = np.empty(0, dtype=INDEX_ENTRY)
+        self._records = np.empty(0, dtype=RECORD)
+        self._index_size = -1
+
+    # --- Открытие и отображение файлов ---
+
+    def _open(self) -> None:
+        """Открывает (создавая при необходимости) файлы хранилища."""
+        if self._index_file is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for path, magic in ((self.data_path, DATA_MAGIC), (self.index_path, INDEX_MAGIC)):
+            descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+                if os.fstat(descriptor).st_size == 0:
+                    os.write(descriptor, magic)
+                    os.fsync(descriptor)
+                else:
+                    header = os.pread(descriptor, HEADER_SIZE, 0)
+                    if header != magic:
+                        raise ValueError(f"Файл {path} не является файлом истории курсов.")
+            finally:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+                os.close(descriptor)
+        while True:
+            index_file = open(self.index_path, "r+b")
+            # prepend подменяет файлы под исключительной блокировкой индекса:
+            # пока она разделяемая, индекс и записи относятся к одной версии
+            fcntl.flock(index_file.fileno(), fcntl.LOCK_SH)
+            if self._points_to(index_file):
+                break
+            index_file.close()
+        try:
+            self._data_file = open(self.data_path, "r+b")
+        finally:
+            fcntl.flock(index_file.fileno(), fcntl.LOCK_UN)
+        self._index_file = index_file
+
+    def _points_to(self, index_file: Any) -> bool:
+        """Проверяет, что путь индекса указывает на открытый файл index_file."""
+        try:
+            current = os.stat(self.index_path)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(index_file.fileno())
+        return (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
+
+    def _close_files(self) -> None:
+        """Закрывает файлы и забывает отображения (под self._lock)."""
+        self._index = np.empty(0, dtype=INDEX_ENTRY)
+        self._records = np.empty(0, dtype=RECORD)
+        self._index_size = -1
+        for file in (self._index_file, self._data_file):
+            if file is not None:
+                file.close()
+        self._index_file = None
+        self._data_file = None
+
+    def _refresh(self) -> None:
+        """Отображает файлы заново, если в них появились новые дни или их подменили."""
+        self._open()
+        if not self._points_to(self._index_file):
+            self._close_files()
+            self._open()
+        index_size = os.fstat(self._index_file.fileno()).st_size
+        if index_size == self._index_size:
+            return
+        entries = (index_size - HEADER_SIZE) // INDEX_ENTRY.itemsize
+        index = _map(self._index_file, INDEX_ENTRY, entries)
+        committed = int(index["start"][-1] + index["count"][-1]) if entries else 0
+        if committed > len(self._records):
+            # Отображаются только зафиксированные записи: недописанный хвост может быть обрезан
+            self._records = _map(self._data_file, RECORD, committed)
+        self._index = index
+        self._index_size = index_size
+
+    # --- Чтение ---
+
+    def __len__(self) -> int:
+        """Возвращает число сохранённых дней."""
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def first_date(self) -> Optional[dt.date]:
+        """Возвращает первый сохранённый день или None."""
+        with self._lock:
+            self._refresh()
+            return day_from_number(self._index["day"][0]) if len(self._index) else None
+
+    def last_date(self) -> Optional[dt.date]:
+        """Возвращает последний сохранённый день или None."""
+        with self._lock:
+            self._refresh()
+            return day_from_number(self._index["day"][-1]) if len(self._index) else None
+
+    def dates(self) -> np.ndarray:
+        """Возвращает все сохранённые дни (numpy.datetime64[D])."""
+        with self._lock:
+            self._refresh()
+            return self._index["day"].astype("datetime64[D]")
+
+    def records(
+        self, start: Optional[dt.date] = None, end: Optional[dt.date] = None
+    ) -> np.ndarray:
+        """Возвращает записи (RECORD) за дни от start до end включительно.
+
+        Результат — представление отображённого файла только для
+        чтения: записи идут по дням, внутри дня — по коду валюты.
+        Границы None означают «с первого дня» и «по последний день».
+
+        Исключения:
+            ValueError: если start позже end.
+        """
+        if start is not None and end is not None and start > end:
+            raise ValueError("Начало периода позже его конца.")
+        with self._lock:
+            self._refresh()
+            index = self._index
+            records = self._records
+        days = index["day"]
+        low = 0 if start is None else int(np.searchsorted(days, day_number(start), "left"))
+        high = len(days) if end is None else int(np.searchsorted(days, day_number(end), "right"))
+        if low >= high:
+            return records[:0]
+        first = int(index["start"][low])
+        last = int(index["start"][high - 1] + index["count"][high - 1])
+        return records[first:last]
+
+    def series(
+        self,
+        char_code: str,
+        start: Optional[dt.date] = None,
+        end: Optional[dt.date] = None,
+    ) -> RateSeries:
+        """Возвращает ряд курса валюты char_code за дни от start до end включительно.
+
+        Границы None означают «с первого дня» и «по последний день».
+        Дни, когда курс валюты не публиковался, в ряд не входят.
+
+        Исключения:
+            ValueError: если start позже end.
+        """
+        chunk = self.records(start, end)
+        selected = chunk[chunk["code"] == char_code.encode("ascii", "replace")]
+        return RateSeries(
+            char_code,
+            selected["day"].astype("datetime64[D]"),
+            selected["value"].astype(np.float64),
+            selected["nominal"].astype(np.int32),
+        )
+
+    # --- Запись ---
+
+    def append(self, day: dt.date, currencies: Sequence[Currency]) -> bool:
+        """Дописывает курсы за день day.
+
+        Возвращает:
+            False, если день day не позже последнего сохранённого
+            (повторная запись ничего не меняет), иначе True.
+        """
+        return self.append_many([(day, currencies)]) == 1
+
+    def append_many(self, days: Iterable[Tuple[dt.date, Sequence[Currency]]]) -> int:
+        """Дописывает несколько дней одной записью в каждый файл.
+
+        Дни не позже последнего сохранённого пропускаются, поэтому
+        повторный вызов с теми же данными ничего не меняет.
+
+        Возвращает:
+            Количество дописанных дней.
+
+        Исключения:
+            ValueError: если дни идут не по возрастанию.
+        """
+        batch = list(days)
+        for (previous, _), (current, _) in zip(batch, batch[1:]):
+            if current <= previous:
+                raise ValueError("Дни должны идти строго по возрастанию.")
+        with self._lock:
+            descriptor = self._lock_for_write()
+            try:
+                self._refresh()
+                last = int(self._index["day"][-1]) if len(self._index) else None
+                committed = (
+                    int(self._index["start"][-1] + self._index["count"][-1])
+                    if len(self._index)
+                    else 0
+                )
+                pending = [
+                    (day_number(day), currencies)
+                    for day, currencies in batch
+                    if last is None or day_number(day) > last
+                ]
+                if not pending:
+                    return 0
+                records, entries = _encode(pending, committed)
+                data = self._data_file
+                # Хвост без строки индекса остался от прерванной записи — отбрасываем
+                data.truncate(HEADER_SIZE + committed * RECORD.itemsize)
+                data.seek(0, os.SEEK_END)
+                data.write(records.tobytes())
+                data.flush()
+                os.fsync(data.fileno())
+                index_file = self._index_file
+                index_file.seek(HEADER_SIZE + len(self._index) * INDEX_ENTRY.itemsize)
+                index_file.truncate()
+                index_file.write(entries.tobytes())
+                index_file.flush()
+                os.fsync(index_file.fileno())
+                self._refresh()
+                return len(pending)
+            finally:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+
+    def prepend(self, older: HistoryStore) -> int:
+        """Добавляет в начало истории дни из older раньше первого сохранённого.
+
+        История только дописывается в конец, поэтому файлы собираются
+        заново: дни older, затем все дни этой истории (в том числе
+        дописанные другими процессами к моменту подмены). Готовые файлы
+        атомарно заменяют прежние; дни older не раньше первого дня этой
+        истории пропускаются.
+
+        Возвращает:
+            Количество добавленных дней.
+        """
+        with older._lock:
+            older._refresh()
+            older_index, older_records = older._index, older._records
+        with self._lock:
+            descriptor = self._lock_for_write()
+            try:
+                self._refresh()
+                index, records = self._index, self._records
+                if len(index):
+                    count = int(np.searchsorted(older_index["day"], index["day"][0], "left"))
+                else:
+                    count = len(older_index)
+                if not count:
+                    return 0
+                head = older_index[:count].copy()
+                head_records = older_records[: int(head["start"][-1] + head["count"][-1])]
+                tail = index.copy()
+                tail["start"] += len(head_records)
+                committed = int(index["start"][-1] + index["count"][-1]) if len(index) else 0
+                staging = tempfile.mkdtemp(prefix=".prepend-", dir=self.directory)
+                try:
+                    data_path = os.path.join(staging, "rates.dat")
+                    index_path = os.path.join(staging, "rates.idx")
+                    _write_file(data_path, DATA_MAGIC, head_records, records[:committed])
+                    _write_file(index_path, INDEX_MAGIC, head, tail)
+                    # Индекс подменяется последним: он фиксирует новую версию
+                    os.replace(data_path, self.data_path)
+                    os.replace(index_path, self.index_path)
+                    directory = os.open(self.directory, os.O_RDONLY)
+                    try:
+                        os.fsync(directory)
+                    finally:
+                        os.close(directory)
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+                return count
+            finally:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+                self._close_files()
+
+    def _lock_for_write(self) -> int:
+        """Берёт блокировку записи на действующий файл индекса (под self._lock).
+
+        Если файлы подменили, пока ожидалась блокировка, открывает
+        новые и ждёт снова.
+
+        Возвращает:
+            Дескриптор файла индекса, который нужно разблокировать.
+        """
+        while True:
+            self._open()
+            descriptor = self._index_file.fileno()
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            if self._points_to(self._index_file):
+                return descriptor
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+            self._close_files()
+
+    def close(self) -> None:
+        """Закрывает файлы хранилища."""
+        with self._lock:
+            self._close_files()
+
+
+def _write_file(path: str, magic: bytes, *parts: np.ndarray) -> None:
+    """Записывает файл хранилища: заголовок magic и массивы parts подряд."""
+    with open(path, "wb") as file:
+        file.write(magic)
+        for part in parts:
+            file.write(part.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _map(file: Any, dtype: np.dtype, count: int) -> np.ndarray:
+    """Отображает count записей dtype из файла file (после заголовка) только для чтения."""
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    length = HEADER_SIZE + count * dtype.itemsize
+    mapped = mmap.mmap(file.fileno(), length, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=dtype, count=count, offset=HEADER_SIZE)
+
+
+def _encode(
+    days: List[Tuple[int, Sequence[Currency]]], start: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Превращает дни в массив записей и строки индекса (записи дня — по коду)."""
+    total = sum(len(currencies) for _, currencies in days)
+    records = np.empty(total, dtype=RECORD)
+    entries = np.empty(len(days), dtype=INDEX_ENTRY)
+    position = 0
+    for number, (day, currencies) in enumerate(days):
+        ordered = sorted(currencies, key=lambda currency: currency.char_code)
+        count = len(ordered)
+        block = records[position:position + count]
+        block["day"] = day
+        block["nominal"] = [currency.nominal for currency in ordered]
+        block["code"] = [currency.char_code.encode("ascii") for currency in ordered]
+        block["value"] = [currency.value for currency in ordered]
+        entries[number] = (day, count, start + position)
+        position += count
+    return records, entries
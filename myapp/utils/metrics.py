@@ -0,0 +1,444 @@
+"""Модуль метрик приложения в формате Prometheus.
+
+Здесь определены:
+- Counter, Gauge и Histogram — метрики с метками, обновление
+  которых занимает доли микросекунды (словарь под блокировкой);
+- MetricsRegistry — набор метрик, который выводит их в текстовом
+  формате Prometheus и умеет объединять данные нескольких процессов;
+- CountingWriter — обёртка над потоком ответа, считающая байты.
+
+В многопроцессном режиме (prefork) у каждого процесса свои
+метрики. Если задан каталог registry.directory, процесс раз
+в dump_interval секунд (фоновым потоком start_dumping) и при
+завершении (stop_dumping) сохраняет снимок своих метрик в файл
+metrics-<pid>.json, а при запросе '/metrics' снимки всех процессов
+складываются. Главный процесс prefork тоже сохраняет свой снимок
+(например, загрузки ленты курсов), а рабочий процесс после fork
+начинает метрики с нуля (reset), чтобы не учесть их ещё раз.
+Счётчики завершившихся процессов сохраняются, а показатели Gauge
+учитываются только для живых процессов.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+# Границы корзин гистограмм по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Metric(abc.ABC):
+    """Общая часть метрик: имя, описание, имена меток и значения по меткам."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """Создаёт метрику без значений."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Удаляет все значения метрики; блокировка создаётся заново."""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def snapshot(self) -> List[list]:
+        """Возвращает значения метрики в виде списка [метки, значение]."""
+        with self._lock:
+            return [[list(labels), _copy(value)] for labels, value in self._values.items()]
+
+    @abc.abstractmethod
+    def merge(self, values: Dict[Labels, Any], other: List[list]) -> None:
+        """Добавляет к values значения из снимка другого процесса."""
+
+    @abc.abstractmethod
+    def lines(self, values: Dict[Labels, Any]) -> Iterator[str]:
+        """Выдаёт строки текстового формата для значений values."""
+
+    def _format_labels(self, labels: Labels, extra: str = "") -> str:
+        """Форматирует метки в виде {name="value",...}."""
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        """Увеличивает счётчик с метками labels на amount."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        """Возвращает текущее значение счётчика."""
+        return self._values.get(labels, 0)
+
+    def merge(self, values: Dict[Labels, Any], other: List[list]) -> None:
+        """Прибавляет значения из снимка другого процесса."""
+        for labels, value in other:
+            key = tuple(labels)
+            values[key] = values.get(key, 0) + value
+
+    def lines(self, values: Dict[Labels, Any]) -> Iterator[str]:
+        """Выдаёт строки текстового формата для значений values."""
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{self._format_labels(labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Показатель, который может расти и уменьшаться."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        """Уменьшает показатель на amount."""
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        """Устанавливает показатель равным value."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин.
+
+    Для каждого набора меток хранится список количеств наблюдений
+    по корзинам (последняя — +Inf) и сумма наблюдений.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Создаёт гистограмму с границами buckets (по возрастанию)."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """Добавляет наблюдение value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, labels: Labels = ()) -> _Timer:
+        """Возвращает контекстный менеджер, замеряющий длительность блока."""
+        return _Timer(self, labels)
+
+    def count(self, labels: Labels = ()) -> int:
+        """Возвращает количество наблюдений."""
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def merge(self, values: Dict[Labels, Any], other: List[list]) -> None:
+        """Прибавляет корзины и сумму из снимка другого процесса."""
+        for labels, (counts, total) in other:
+            key = tuple(labels)
+            state = values.get(key)
+            if state is None:
+                values[key] = [list(counts), total]
+            else:
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+
+    def lines(self, values: Dict[Labels, Any]) -> Iterator[str]:
+        """Выдаёт строки текстового формата (накопительные корзины, сумма, количество)."""
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = self._format_labels(labels, 'le="' + le + '"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(labels)} {_number(total)}"
+            yield f"{self.name}_count{self._format_labels(labels)} {cumulative}"
+
+
+class _Timer:
+    """Контекстный менеджер для Histogram.time()."""
+
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Labels) -> None:
+        """Запоминает гистограмму и метки."""
+        self._histogram = histogram
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> _Timer:
+        """Засекает время начала."""
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Записывает длительность блока (в том числе при исключении)."""
+        self._histogram.observe(time.perf_counter() - self._start, self._labels)
+
+
+class MetricsRegistry:
+    """Набор метрик процесса.
+
+    Атрибуты:
+        directory: Каталог для снимков метрик процессов (или None,
+            если процесс один).
+        dump_interval: Как часто (в секундах) сохранять снимок.
+    """
+
+    def __init__(self, directory: Optional[str] = None, dump_interval: float = 1.0) -> None:
+        """Создаёт пустой набор метрик."""
+        self.directory = directory
+        self.dump_interval = dump_interval
+        self._metrics: Dict[str, _Metric] = {}
+        self._last_dump = 0.0
+        self._dump_lock = threading.Lock()
+        self._dumper: Optional[threading.Thread] = None
+        self._dumper_stopped = threading.Event()
+
+    def register(self, metric: _Metric) -> Any:
+        """Добавляет метрику и возвращает её.
+
+        Исключения:
+            ValueError: если метрика с таким именем уже есть.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Создаёт и регистрирует Counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Создаёт и регистрирует Gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Создаёт и регистрирует Histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self) -> None:
+        """Обнуляет все метрики процесса.
+
+        Вызывается в рабочем процессе prefork сразу после fork: значения,
+        унаследованные от главного процесса, есть в его собственном снимке
+        и иначе учитывались бы по разу в каждом рабочем процессе.
+        Блокировки создаются заново — при fork их мог держать другой
+        поток родителя.
+        """
+        for metric in self._metrics.values():
+            metric.reset()
+        self._dump_lock = threading.Lock()
+        self._dumper = None
+        self._last_dump = 0.0
+
+    def snapshot(self) -> Dict[str, List[list]]:
+        """Возвращает значения всех метрик процесса."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def _dump_path(self, pid: int) -> str:
+        """Возвращает путь к файлу снимка процесса pid."""
+        return os.path.join(self.directory or "", f"metrics-{pid}.json")
+
+    def dump(self) -> None:
+        """Сохраняет снимок метрик процесса в каталог directory (атомарно)."""
+        if self.directory is None:
+            return
+        path = self._dump_path(os.getpid())
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"pid": os.getpid(), "metrics": self.snapshot()}, file)
+        os.replace(temporary, path)
+        self._last_dump = time.monotonic()
+
+    def maybe_dump(self) -> None:
+        """Сохраняет снимок, если с прошлого прошло не меньше dump_interval."""
+        if self.directory is None or time.monotonic() - self._last_dump < self.dump_interval:
+            return
+        if self._dump_lock.acquire(blocking=False):
+            try:
+                self.dump()
+            finally:
+                self._dump_lock.release()
+
+    def start_dumping(self) -> None:
+        """Запускает поток, сохраняющий снимок раз в dump_interval секунд.
+
+        Без него процесс, который не получает запросов, не обновлял
+        бы свой снимок. Ничего не делает, если каталог не задан или
+        поток уже запущен. В рабочем процессе prefork вызывается после
+        fork: потоки родителя в дочерний процесс не переходят.
+        """
+        if self.directory is None or (self._dumper is not None and self._dumper.is_alive()):
+            return
+        self._dumper_stopped = threading.Event()
+        self._dumper = threading.Thread(
+            target=self._dump_periodically,
+            args=(self._dumper_stopped,),
+            name="metrics-dump",
+            daemon=True,
+        )
+        self._dumper.start()
+
+    def stop_dumping(self) -> None:
+        """Останавливает поток start_dumping и сохраняет последний снимок."""
+        dumper = self._dumper
+        if dumper is not None:
+            self._dumper_stopped.set()
+            dumper.join()
+            self._dumper = None
+        if self.directory is not None:
+            try:
+                with self._dump_lock:
+                    self.dump()
+            except OSError:
+                pass
+
+    def _dump_periodically(self, stopped: threading.Event) -> None:
+        """Тело потока: сохраняет снимок, пока не вызван stop_dumping()."""
+        while not stopped.wait(self.dump_interval):
+            try:
+                self.maybe_dump()
+            except OSError:
+                # Каталог мог исчезнуть при остановке сервера
+                pass
+
+    def _collect(self) -> Dict[str, Dict[Labels, Any]]:
+        """Складывает значения метрик этого процесса и снимки остальных."""
+        if self.directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.dump()
+            snapshots = []
+            for path in glob.glob(self._dump_path("*")):
+                try:
+                    with open(path, encoding="utf-8") as file:
+                        data = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                alive = _alive(data.get("pid", 0))
+                metrics = data.get("metrics", {})
+                if not alive:
+                    # Текущие показатели завершившегося процесса уже не действуют
+                    metrics = {
+                        name: values for name, values in metrics.items()
+                        if name in self._metrics and self._metrics[name].kind != "gauge"
+                    }
+                snapshots.append(metrics)
+        merged: Dict[str, Dict[Labels, Any]] = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], values)
+        return merged
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        merged = self._collect()
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines(merged[name]))
+        return "\n".join(lines) + "\n"
+
+
+class CountingWriter:
+    """Обёртка над потоком ответа, считающая записанные байты.
+
+    Атрибуты:
+        bytes_written: Сколько байтов записано через обёртку.
+    """
+
+    def __init__(self, raw: BinaryIO) -> None:
+        """Оборачивает поток raw."""
+        self.raw = raw
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        """Записывает data и учитывает его размер."""
+        self.bytes_written += len(data)
+        return self.raw.write(data)
+
+    def flush(self) -> None:
+        """Сбрасывает буфер исходного потока."""
+        self.raw.flush()
+
+    def close(self) -> None:
+        """Закрывает исходный поток."""
+        self.raw.close()
+
+    @property
+    def closed(self) -> bool:
+        """Закрыт ли исходный поток."""
+        return self.raw.closed
+
+
+def _alive(pid: int) -> bool:
+    """Проверяет, жив ли процесс pid."""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _copy(value: Any) -> Any:
+    """Копирует значение метрики (для гистограмм — вложенные списки)."""
+    if isinstance(value, list):
+        return [list(value[0]), value[1]]
+    return value
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для текстового формата."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    """Форматирует число для текстового формата (целые — без дробной части)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Метрики процесса; модули приложения регистрируют в нём свои метрики
+REGISTRY = MetricsRegistry(os.environ.get("MYAPP_METRICS_DIR") or None)
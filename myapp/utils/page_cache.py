@@ -0,0 +1,157 @@
+"""Модуль кэша готовых HTML-страниц.
+
+Здесь определены:
+- CachedPage — закодированное тело страницы вместе с сильным ETag
+  и временем изменения (Last-Modified);
+- PageCache — кэш страниц по ключу (маршрут, версия данных).
+
+Версия — любое значение, которое меняется вместе с данными
+страницы: версия приложения для статичных страниц, счётчик
+ревизий пользователей, текущая таблица курсов. Пока версия
+маршрута не изменилась, шаблон повторно не отрисовывается,
+а сжатые варианты тела хранятся рядом с исходным и сжимаются
+один раз на версию.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from .compression import MIN_COMPRESS_SIZE, compress
+
+
+class CachedPage:
+    """Готовая к отправке страница.
+
+    Атрибуты:
+        body: Тело страницы в кодировке UTF-8.
+        etag: Сильный ETag (в кавычках), вычисленный по телу.
+        last_modified: Время отрисовки в секундах Unix (целое).
+        content_type: Значение заголовка Content-Type.
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "content_type", "_variants")
+
+    def __init__(
+        self,
+        body: bytes,
+        last_modified: Optional[int] = None,
+        content_type: str = "text/html; charset=utf-8",
+    ) -> None:
+        """Вычисляет ETag по телу и запоминает время изменения."""
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.last_modified = int(time.time()) if last_modified is None else last_modified
+        self.content_type = content_type
+        self._variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """Возвращает тело в кодировке encoding (сжимая его один раз).
+
+        Маленькие тела (меньше MIN_COMPRESS_SIZE) не сжимаются.
+
+        Возвращает:
+            Пару (фактический способ сжатия или None, тело).
+        """
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return None, self.body
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding, thorough=True)
+            self._variants[encoding] = variant
+        return encoding, variant
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Возвращает сильный ETag варианта тела с данным сжатием."""
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + "-" + encoding + '"'
+
+    @property
+    def last_modified_header(self) -> str:
+        """Возвращает Last-Modified в формате HTTP-даты."""
+        return formatdate(self.last_modified, usegmt=True)
+
+    def not_modified(
+        self,
+        if_none_match: Optional[str],
+        if_modified_since: Optional[str] = None,
+        encoding: Optional[str] = None,
+    ) -> bool:
+        """Проверяет условный запрос: можно ли ответить 304.
+
+        If-None-Match имеет приоритет; If-Modified-Since учитывается,
+        только если If-None-Match не передан. ETag сравнивается с ETag
+        варианта encoding, выбранного для ответа: у клиента с телом
+        в другом сжатии ответ 304 оставил бы неподходящее тело.
+        """
+        if if_none_match is not None:
+            etag = self.etag_for(encoding)
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"):
+                    tag = tag[2:]
+                if tag == "*" or tag == etag:
+                    return True
+            return False
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= since
+        return False
+
+
+class PageCache:
+    """Кэш страниц: для каждого маршрута хранится страница последней версии.
+
+    Атрибуты:
+        renders: Количество отрисовок (промахов кэша).
+        hits: Количество обращений, обслуженных из кэша.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустой кэш."""
+        self._pages: Dict[str, Tuple[Hashable, CachedPage]] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def get(self, route: str, version: Hashable, render: Callable[[], str]) -> CachedPage:
+        """Возвращает страницу маршрута для версии данных version.
+
+        Если в кэше страница другой версии (или её нет), вызывается
+        render, результат кодируется и сохраняется вместо прежнего.
+
+        Аргументы:
+            route: Маршрут (ключ кэша).
+            version: Версия данных страницы; сравнивается через ==.
+            render: Функция, возвращающая HTML страницы.
+        """
+        entry = self._pages.get(route)
+        if entry is not None and entry[0] == version:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+        page = CachedPage(render().encode("utf-8"))
+        with self._lock:
+            self.renders += 1
+            # Если данные не изменились по содержимому, сохраняем прежние ETag и дату
+            current = self._pages.get(route)
+            if current is not None and current[1].etag == page.etag:
+                page = current[1]
+            self._pages[route] = (version, page)
+        return page
+
+    def invalidate(self, route: Optional[str] = None) -> None:
+        """Удаляет страницу маршрута route или все страницы."""
+        with self._lock:
+            if route is None:
+                self._pages.clear()
+            else:
+                self._pages.pop(route, None)
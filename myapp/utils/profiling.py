@@ -0,0 +1,213 @@
+"""Модуль выборочного профилирования запросов.
+
+Здесь определён класс RouteProfiler: он профилирует каждый
+every-й запрос (или запрос с административным флагом
+?_profile=<токен>) и накапливает результаты по маршрутам.
+Для каждого маршрута в каталог directory сохраняются два файла:
+- <маршрут>.<pid>.pstats — статистика cProfile, которую читают
+  pstats, snakeviz и gprof2dot;
+- <маршрут>.<pid>.collapsed — свёрнутые стеки ("a;b;c число"),
+  собранные опросом стека потока; их читают flamegraph.pl,
+  speedscope и inferno.
+
+Профилирование включается переменными окружения (см. from_environ);
+если они не заданы, профилировщик не создаётся.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Callable, Dict, List, Mapping, Optional
+
+
+class RouteProfiler:
+    """Профилировщик запросов с накоплением результатов по маршрутам.
+
+    Одновременно профилируется не больше одного запроса: остальные
+    в это время выполняются как обычно.
+
+    Атрибуты:
+        directory: Каталог для файлов .pstats и .collapsed.
+        every: Профилировать каждый every-й запрос (0 — только по флагу).
+        token: Токен для флага ?_profile=<токен> (None — флаг отключён).
+        interval: Период опроса стека в секундах.
+        profiled: Сколько запросов профилировано по каждому маршруту.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        every: int = 0,
+        token: Optional[str] = None,
+        interval: float = 0.001,
+    ) -> None:
+        """Создаёт профилировщик.
+
+        Исключения:
+            ValueError: если every отрицательный или interval не больше нуля.
+        """
+        if every < 0:
+            raise ValueError("Период профилирования не может быть отрицательным.")
+        if interval <= 0:
+            raise ValueError("Период опроса стека должен быть больше нуля.")
+        self.directory = directory
+        self.every = every
+        self.token = token or None
+        self.interval = interval
+        self.profiled: Dict[str, int] = {}
+        self._counter = itertools.count(1)
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    @classmethod
+    def from_environ(
+        cls, environ: Mapping[str, str] = os.environ
+    ) -> Optional[RouteProfiler]:
+        """Создаёт профилировщик по переменным окружения.
+
+        MYAPP_PROFILE_EVERY — профилировать каждый N-й запрос;
+        MYAPP_PROFILE_TOKEN — токен для флага ?_profile=<токен>;
+        MYAPP_PROFILE_DIR — каталог результатов (по умолчанию profiles).
+
+        Возвращает:
+            RouteProfiler или None, если профилирование не включено.
+        """
+        every = int(environ.get("MYAPP_PROFILE_EVERY") or 0)
+        token = environ.get("MYAPP_PROFILE_TOKEN") or None
+        if every <= 0 and token is None:
+            return None
+        return cls(environ.get("MYAPP_PROFILE_DIR") or "profiles", every=every, token=token)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Проверяет токен административного флага ?_profile=."""
+        if self.token is None or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+
+    def should_profile(self, forced: bool = False) -> bool:
+        """Решает, профилировать ли очередной запрос.
+
+        Аргументы:
+            forced: Запрос пришёл с верным административным флагом.
+        """
+        if forced:
+            return True
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+    def profile(self, route: str, call: Callable[[], None]) -> None:
+        """Выполняет call под профилировщиком и учитывает результат для route.
+
+        Если другой запрос уже профилируется, call выполняется без
+        профилирования.
+        """
+        if not self._active.acquire(blocking=False):
+            call()
+            return
+        try:
+            profiler: Optional[cProfile.Profile] = cProfile.Profile()
+            sampler = _StackSampler(threading.get_ident(), sys._getframe(), self.interval)
+            sampler.start()
+            try:
+                try:
+                    profiler.enable()
+                except ValueError:  # уже работает другой профилировщик
+                    profiler = None
+                try:
+                    call()
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            finally:
+                sampler.stop()
+            self._record(route, profiler, sampler.stacks)
+        finally:
+            self._active.release()
+
+    def stats(self, route: str) -> Optional[pstats.Stats]:
+        """Возвращает накопленную статистику cProfile маршрута route."""
+        return self._stats.get(route)
+
+    def stacks(self, route: str) -> Dict[str, int]:
+        """Возвращает накопленные свёрнутые стеки маршрута route."""
+        with self._lock:
+            return dict(self._stacks.get(route, {}))
+
+    def _record(
+        self, route: str, profiler: Optional[cProfile.Profile], stacks: Counter
+    ) -> None:
+        """Добавляет результаты одного запроса к данным маршрута и сохраняет их."""
+        with self._lock:
+            self.profiled[route] = self.profiled.get(route, 0) + 1
+            if profiler is not None:
+                current = self._stats.get(route)
+                if current is None:
+                    self._stats[route] = pstats.Stats(profiler)
+                else:
+                    current.add(profiler)
+            self._stacks.setdefault(route, Counter()).update(
+                {f"{route};{stack}": count for stack, count in stacks.items()}
+            )
+            self._dump(route)
+
+    def _dump(self, route: str) -> None:
+        """Сохраняет файлы маршрута route (атомарно, под self._lock)."""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{_slug(route)}.{os.getpid()}")
+        stats = self._stats.get(route)
+        if stats is not None:
+            stats.dump_stats(base + ".pstats.tmp")
+            os.replace(base + ".pstats.tmp", base + ".pstats")
+        with open(base + ".collapsed.tmp", "w", encoding="utf-8") as file:
+            for stack, count in sorted(self._stacks.get(route, {}).items()):
+                file.write(f"{stack} {count}\n")
+        os.replace(base + ".collapsed.tmp", base + ".collapsed")
+
+
+class _StackSampler(threading.Thread):
+    """Поток, который периодически снимает стек профилируемого потока.
+
+    Учитываются только кадры, вызванные из кадра stop_frame
+    (то есть из RouteProfiler.profile); сам он в стек не входит.
+    """
+
+    def __init__(self, thread_id: int, stop_frame: FrameType, interval: float) -> None:
+        """Запоминает поток, граничный кадр и период опроса."""
+        super().__init__(name="myapp-stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.stop_frame = stop_frame
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """Снимает стек каждые interval секунд до вызова stop()."""
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            while frame is not None and frame is not self.stop_frame:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frame is not None and names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        """Останавливает опрос и дожидается завершения потока."""
+        self._stopped.set()
+        self.join()
+
+
+def _slug(route: str) -> str:
+    """Превращает шаблон маршрута в имя файла: '/user/<int:id>' -> 'user_int_id'."""
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "index"
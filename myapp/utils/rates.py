@@ -0,0 +1,377 @@
+"""Модуль текущих курсов: неизменяемый снимок и фоновое обновление.
+
+Здесь определены:
+- RatesSnapshot — неизменяемый набор курсов: список валют, индекс
+  по символьному коду, столбцовая таблица, матрица кросс-курсов
+  и номер версии. Всё, что нужно обработчику, берётся из одного
+  снимка, поэтому запрос никогда не видит смесь старых и новых курсов;
+- RatesRefresher — фоновый поток, который загружает курсы по
+  расписанию и публикует новый снимок заменой одной ссылки;
+- RatesUnavailable — исключение «курсов ещё нет».
+
+ЦБ РФ публикует курсы на следующий день в рабочие дни около
+15:30 по Москве (12:30 UTC). Обновление планируется на это время
+(с запасом settle), но не реже раза в interval секунд; к сроку
+добавляется случайная задержка jitter, чтобы процессы и узлы
+не обращались к ленте одновременно. После ошибки загрузки
+следующая попытка откладывается с экспоненциальным ростом
+(backoff, 2·backoff, ... до max_backoff), а прежний снимок
+продолжает обслуживать запросы. Пока ни одна загрузка не удалась,
+get() сразу вызывает RatesUnavailable, а не ждёт ленту.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import os
+import random
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from ..models import Currency, CurrencyTable
+from .conversion import RateMatrix
+
+# Время публикации курсов ЦБ РФ (15:30 по Москве)
+PUBLICATION_TIME_UTC = dt.time(12, 30)
+
+logger = logging.getLogger(__name__)
+
+
+class RatesUnavailable(RuntimeError):
+    """Курсы ещё не загружены (первая загрузка не удалась или не выполнялась)."""
+
+
+class RatesSnapshot:
+    """Неизменяемый набор курсов одной версии.
+
+    Атрибуты:
+        currencies: Валюты в порядке ленты (кортеж).
+        index: Словарь «символьный код -> Currency» (только для чтения).
+        table: Столбцовая таблица курсов.
+        matrix: Матрица кросс-курсов.
+        version: Номер версии; растёт с каждым новым набором курсов.
+        date: Дата курсов из ленты (например, "17.10.2026").
+        fetched_at: Время загрузки в секундах Unix.
+    """
+
+    __slots__ = ("currencies", "index", "table", "matrix", "version", "date", "fetched_at")
+
+    def __init__(
+        self,
+        currencies: Sequence[Currency],
+        version: int,
+        date: str = "",
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """Строит индекс, таблицу и матрицу для списка валют currencies."""
+        table = CurrencyTable.from_currencies(currencies)
+        self._fill(
+            currencies,
+            table,
+            RateMatrix(table),
+            version,
+            date,
+            time.time() if fetched_at is None else fetched_at,
+        )
+
+    @classmethod
+    def from_table(
+        cls,
+        table: CurrencyTable,
+        matrix: RateMatrix,
+        version: int,
+        date: str = "",
+        fetched_at: float = 0.0,
+    ) -> RatesSnapshot:
+        """Собирает снимок из готовых таблицы и матрицы (без их пересчёта)."""
+        snapshot = object.__new__(cls)
+        snapshot._fill(table.to_currencies(), table, matrix, version, date, fetched_at)
+        return snapshot
+
+    def _fill(
+        self,
+        currencies: Sequence[Currency],
+        table: CurrencyTable,
+        matrix: RateMatrix,
+        version: int,
+        date: str,
+        fetched_at: float,
+    ) -> None:
+        """Заполняет атрибуты снимка (в обход запрета на изменение)."""
+        values = (
+            ("currencies", tuple(currencies)),
+            ("index", MappingProxyType({c.char_code: c for c in currencies})),
+            ("table", table),
+            ("matrix", matrix),
+            ("version", version),
+            ("date", date),
+            ("fetched_at", fetched_at),
+        )
+        for name, value in values:
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """Запрещает изменение снимка."""
+        raise AttributeError("RatesSnapshot нельзя изменять.")
+
+    def __delattr__(self, name: str) -> None:
+        """Запрещает изменение снимка."""
+        raise AttributeError("RatesSnapshot нельзя изменять.")
+
+    def __repr__(self) -> str:
+        """Возвращает краткое описание снимка."""
+        return (
+            f"RatesSnapshot(version={self.version}, date={self.date!r}, "
+            f"currencies={len(self.currencies)})"
+        )
+
+
+def seconds_until_publication(
+    now: float, publication: dt.time = PUBLICATION_TIME_UTC, settle: float = 300.0
+) -> float:
+    """Возвращает, сколько секунд осталось до ближайшей публикации курсов.
+
+    Аргументы:
+        now: Текущее время в секундах Unix.
+        publication: Время публикации (UTC).
+        settle: Запас после публикации, в секундах.
+    """
+    current = dt.datetime.fromtimestamp(now, dt.timezone.utc)
+    moment = dt.datetime.combine(current.date(), publication, dt.timezone.utc)
+    moment += dt.timedelta(seconds=settle)
+    if moment <= current:
+        moment += dt.timedelta(days=1)
+    return (moment - current).total_seconds()
+
+
+class RatesRefresher:
+    """Фоновое обновление курсов с публикацией неизменяемых снимков.
+
+    Обработчики читают текущий снимок через get(): это чтение одной
+    ссылки без блокировок. Загружают курсы только start() и фоновый
+    поток; get() никогда не обращается к ленте.
+
+    Атрибуты:
+        interval: Наибольший промежуток между обновлениями, в секундах.
+        jitter: Наибольшая случайная добавка к сроку обновления, в секундах.
+        backoff: Задержка после первой ошибки, в секундах.
+        max_backoff: Наибольшая задержка после ошибок, в секундах.
+        refreshes: Количество успешных загрузок.
+        errors: Количество неудачных загрузок.
+        failures: Количество неудачных загрузок подряд.
+        follow_fork: Перезапускать ли поток обновления в дочернем
+            процессе после fork. Если нет, дочерний процесс курсы
+            не загружает: подписчики сбрасываются, а refresh()
+            вызывает RatesUnavailable.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Tuple[str, List[Currency]]],
+        interval: float = 3600.0,
+        jitter: float = 60.0,
+        backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        publication: dt.time = PUBLICATION_TIME_UTC,
+        settle: float = 300.0,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """Создаёт объект без снимка; поток запускается методом start().
+
+        Аргументы:
+            loader: Функция, возвращающая дату курсов и список валют.
+                Если курсы не изменились, она может вернуть тот же
+                список: тогда новый снимок не публикуется.
+
+        Исключения:
+            ValueError: если interval или backoff не больше нуля либо
+                jitter отрицательный.
+        """
+        if interval <= 0 or backoff <= 0 or max_backoff < backoff:
+            raise ValueError("Интервал и задержки обновления должны быть больше нуля.")
+        if jitter < 0:
+            raise ValueError("Случайная добавка не может быть отрицательной.")
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.publication = publication
+        self.settle = settle
+        self.refreshes = 0
+        self.errors = 0
+        self.failures = 0
+        self.follow_fork = True
+        self._subscribers: List[Callable[[RatesSnapshot], None]] = []
+        self._loader = loader
+        self._clock = clock
+        self._random = rng or random.Random()
+        self._snapshot: Optional[RatesSnapshot] = None
+        self._source: Optional[List[Currency]] = None
+        self._version = 0
+        self._load_lock = threading.Lock()
+        # Защищает запуск и остановку потока обновления
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._restart_after_fork = False
+        self._fork_hook = False
+        self._loading = True
+
+    @property
+    def snapshot(self) -> Optional[RatesSnapshot]:
+        """Текущий снимок или None, если курсы ещё не загружались."""
+        return self._snapshot
+
+    def get(self) -> RatesSnapshot:
+        """Возвращает текущий снимок, не обращаясь к ленте.
+
+        Исключения:
+            RatesUnavailable: если снимка ещё нет (фоновый поток
+                повторит загрузку сам).
+        """
+        if self._restart_after_fork:
+            with self._lock:
+                # Первые запросы процесса могут прийти одновременно: поток — один
+                if self._restart_after_fork:
+                    self._restart_after_fork = False
+                    self._start_thread()
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RatesUnavailable("Курсы валют ещё не загружены.")
+        return snapshot
+
+    def refresh(self) -> RatesSnapshot:
+        """Загружает курсы и публикует новый снимок, если они изменились.
+
+        Исключения:
+            RatesUnavailable: если курсы загружает родительский процесс
+                (дочерний процесс после fork при follow_fork=False).
+            Любое исключение загрузчика; текущий снимок при этом не меняется.
+        """
+        if not self._loading:
+            raise RatesUnavailable("Курсы загружает родительский процесс.")
+        with self._load_lock:
+            return self._load()
+
+    def _load(self) -> RatesSnapshot:
+        """Загружает курсы и заменяет снимок (под self._load_lock)."""
+        try:
+            date, currencies = self._loader()
+        except Exception:
+            self.errors += 1
+            self.failures += 1
+            raise
+        self.refreshes += 1
+        self.failures = 0
+        snapshot = self._snapshot
+        if snapshot is None or currencies is not self._source:
+            self._version += 1
+            snapshot = RatesSnapshot(currencies, self._version, date, self._clock())
+            self._source = currencies
+            # Публикация — замена одной ссылки: читатели видят старый или новый снимок целиком
+            self._snapshot = snapshot
+            for callback in list(self._subscribers):
+                # Ошибка одного подписчика не мешает остальным
+                try:
+                    callback(snapshot)
+                except Exception:
+                    logger.exception("Ошибка подписчика %r на снимок %r.", callback, snapshot)
+        return snapshot
+
+    def subscribe(self, callback: Callable[[RatesSnapshot], None]) -> None:
+        """Добавляет функцию, которая вызывается с каждым новым снимком.
+
+        Например, запись снимка в общую память или в историю курсов.
+        Функция вызывается в потоке загрузки сразу после публикации;
+        её исключение записывается в журнал и не прерывает загрузку.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[RatesSnapshot], None]) -> None:
+        """Удаляет функцию, добавленную subscribe()."""
+        self._subscribers.remove(callback)
+
+    def reset(self) -> None:
+        """Удаляет текущий снимок: до следующей загрузки get() вызывает RatesUnavailable."""
+        with self._load_lock:
+            self._snapshot = None
+            self._source = None
+
+    def next_delay(self) -> float:
+        """Возвращает паузу до следующего обновления, в секундах."""
+        if self.failures:
+            delay = min(self.backoff * 2 ** (self.failures - 1), self.max_backoff)
+            return self._random.uniform(delay / 2, delay)
+        delay = min(
+            self.interval,
+            seconds_until_publication(self._clock(), self.publication, self.settle),
+        )
+        return delay + self._random.uniform(0, self.jitter)
+
+    def start(self) -> None:
+        """Загружает курсы (если снимка ещё нет) и запускает фоновый поток.
+
+        Ошибка первой загрузки не прерывает запуск: поток повторит
+        попытку с задержкой backoff. Повторный вызов ничего не делает.
+        В дочернем процессе после fork поток перезапускается при
+        первом обращении к get().
+        """
+        if not self._loading or (self._thread is not None and self._thread.is_alive()):
+            return
+        if self._snapshot is None:
+            try:
+                self.refresh()
+            except Exception:
+                pass
+        if not self._fork_hook and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook = True
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._start_thread()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Останавливает фоновый поток (текущий снимок сохраняется)."""
+        with self._lock:
+            self._restart_after_fork = False
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopped.set()
+            self._thread = None
+        thread.join(timeout)
+
+    def _start_thread(self) -> None:
+        """Запускает поток обновления (под self._lock)."""
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rates-refresher", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        """В дочернем процессе отмечает, что поток обновления нужно запустить заново.
+
+        При follow_fork=False дочерний процесс только читает курсы:
+        подписчики родителя (например, запись в общую память и
+        в историю) в нём не вызываются, а загрузка отключается.
+        """
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        if not self.follow_fork:
+            self._subscribers = []
+            self._loading = False
+        if self._thread is not None:
+            self._thread = None
+            self._restart_after_fork = self.follow_fork
+
+    def _run(self) -> None:
+        """Тело потока: обновляет курсы, пока не вызван stop()."""
+        stopped = self._stopped
+        while not stopped.wait(self.next_delay()):
+            try:
+                self.refresh()
+            except Exception:
+                pass
@@ -0,0 +1,431 @@
+"""Модуль хранения моделей в базе данных SQLite.
+
+Здесь определён класс Repository — слой доступа к данным
+для User, Currency и UserCurrency:
+- таблицы с целочисленными первичными ключами и индексами
+  по внешним ключам, поэтому поиск по id — это поиск по индексу;
+- у каждого потока своё соединение (небольшой пул соединений),
+  база работает в режиме WAL, и читатели не блокируют друг друга;
+- SQL-запросы — постоянные строки, поэтому sqlite3 переиспользует
+  подготовленные выражения из кэша соединения;
+- пакетные вставки выполняются через executemany в одной транзакции;
+- список пользователей читается страницами по ключу (id > after),
+  а поиск по началу имени идёт по диапазону в индексе name_key.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import sqlite3
+import sys
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from ..models import Currency, User, UserCurrency
+from .subscriptions import SubscriptionStore
+
+# Границы id: INTEGER PRIMARY KEY в SQLite — 64-битное целое со знаком
+MIN_ID = -(2 ** 63)
+MAX_ID = 2 ** 63 - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL,
+    name_key TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS currencies (
+    id        INTEGER PRIMARY KEY,
+    num_code  INTEGER NOT NULL,
+    char_code TEXT NOT NULL UNIQUE,
+    name      TEXT NOT NULL,
+    value     REAL NOT NULL,
+    nominal   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_currency (
+    id          INTEGER PRIMARY KEY,
+    user_id     INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    currency_id INTEGER NOT NULL,
+    UNIQUE (user_id, currency_id)
+);
+CREATE INDEX IF NOT EXISTS user_currency_currency_id ON user_currency(currency_id);
+CREATE TABLE IF NOT EXISTS revisions (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revisions (name, value) VALUES ('users', 0);
+CREATE TRIGGER IF NOT EXISTS users_insert_revision AFTER INSERT ON users
+BEGIN UPDATE revisions SET value = value + 1 WHERE name = 'users'; END;
+CREATE TRIGGER IF NOT EXISTS users_update_revision AFTER UPDATE ON users
+BEGIN UPDATE revisions SET value = value + 1 WHERE name = 'users'; END;
+CREATE TRIGGER IF NOT EXISTS users_delete_revision AFTER DELETE ON users
+BEGIN UPDATE revisions SET value = value + 1 WHERE name = 'users'; END;
+"""
+
+# Индексы создаются после миграции старых баз (где ещё нет name_key)
+INDEXES = """
+CREATE INDEX IF NOT EXISTS users_name_key ON users(name_key, id);
+"""
+
+SQL_GET_USER = "SELECT id, name FROM users WHERE id = ?"
+SQL_LIST_USERS = "SELECT id, name FROM users ORDER BY id"
+SQL_USERS_PAGE = "SELECT id, name FROM users WHERE id > ? ORDER BY id LIMIT ?"
+SQL_USERS_SEARCH = (
+    "SELECT id, name FROM users "
+    "WHERE name_key >= ? AND name_key < ? "
+    "AND (name_key, id) > (?, ?) "
+    "ORDER BY name_key, id LIMIT ?"
+)
+SQL_USERS_SEARCH_FROM = (
+    "SELECT id, name FROM users "
+    "WHERE name_key >= ? "
+    "AND (name_key, id) > (?, ?) "
+    "ORDER BY name_key, id LIMIT ?"
+)
+SQL_GET_NAME_KEY = "SELECT name_key FROM users WHERE id = ?"
+SQL_INSERT_USER = "INSERT INTO users (id, name, name_key) VALUES (?, ?, ?)"
+SQL_INSERT_USER_NAME = "INSERT INTO users (name, name_key) VALUES (?, ?)"
+SQL_SET_NAME_KEY = "UPDATE users SET name_key = ? WHERE id = ?"
+SQL_DELETE_USER = "DELETE FROM users WHERE id = ?"
+SQL_COUNT_USERS = "SELECT COUNT(*) FROM users"
+SQL_USERS_REVISION = "SELECT value FROM revisions WHERE name = 'users'"
+SQL_UPSERT_CURRENCY = (
+    "INSERT INTO currencies (id, num_code, char_code, name, value, nominal) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET num_code = excluded.num_code, "
+    "char_code = excluded.char_code, name = excluded.name, "
+    "value = excluded.value, nominal = excluded.nominal"
+)
+SQL_LIST_CURRENCIES = (
+    "SELECT id, num_code, char_code, name, value, nominal FROM currencies ORDER BY id"
+)
+SQL_INSERT_LINK = (
+    "INSERT OR IGNORE INTO user_currency (user_id, currency_id) VALUES (?, ?)"
+)
+SQL_GET_LINK = "SELECT id FROM user_currency WHERE user_id = ? AND currency_id = ?"
+SQL_DELETE_LINK = "DELETE FROM user_currency WHERE user_id = ? AND currency_id = ?"
+SQL_LIST_LINKS = "SELECT id, user_id, currency_id FROM user_currency ORDER BY id"
+
+
+def name_key(name: str) -> str:
+    """Возвращает ключ имени для поиска без учёта регистра."""
+    return name.strip().casefold()
+
+
+def _prefix_range(prefix: str) -> Tuple[str, Optional[str]]:
+    """Возвращает границы [low, high) ключей, начинающихся с prefix.
+
+    high равна None, если верхней границы нет: prefix состоит
+    только из последнего символа Unicode (U+10FFFF).
+    """
+    low = name_key(prefix)
+    stem = low.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return low, None
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Суррогаты не кодируются в UTF-8: за U+D7FF в ключах идёт U+E000
+        following = 0xE000
+    return low, stem[:-1] + chr(following)
+
+
+class UserPage:
+    """Одна страница списка пользователей.
+
+    Пользователи читаются из базы пачками во время обхода страницы,
+    поэтому её можно отдавать по частям. Страницу можно обойти один раз.
+
+    Атрибуты:
+        after: id, после которого начинается страница.
+        limit: Максимальное количество пользователей на странице.
+        prefix: Начало имени для поиска (или None).
+        next_after: id для ссылки на следующую страницу; известен
+            после обхода и равен None, если страница последняя.
+    """
+
+    batch_size = 1000
+
+    def __init__(
+        self,
+        repository: Repository,
+        after: int,
+        limit: int,
+        prefix: Optional[str] = None,
+    ) -> None:
+        """Запоминает параметры страницы; запрос выполняется при обходе."""
+        self._repository = repository
+        self.after = after
+        self.limit = limit
+        self.prefix = prefix
+        self.next_after: Optional[int] = None
+
+    def __iter__(self) -> Iterator[User]:
+        """Выдаёт пользователей страницы (запрашивая на одного больше limit)."""
+        connection = self._repository.connection
+        if self.prefix:
+            low, high = _prefix_range(self.prefix)
+            # Позиция курсора в индексе (name_key, id) — ключ имени пользователя after;
+            # нижняя граница диапазона сдвигается к ней, чтобы не читать начало
+            row = connection.execute(SQL_GET_NAME_KEY, (self.after,)).fetchone()
+            key = row[0] if row else ""
+            if high is None:
+                cursor = connection.execute(
+                    SQL_USERS_SEARCH_FROM, (max(low, key), key, self.after, self.limit + 1)
+                )
+            else:
+                cursor = connection.execute(
+                    SQL_USERS_SEARCH, (max(low, key), high, key, self.after, self.limit + 1)
+                )
+        else:
+            cursor = connection.execute(SQL_USERS_PAGE, (self.after, self.limit + 1))
+        count = 0
+        last: Optional[User] = None
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            for user in User.from_rows(rows):
+                if count == self.limit:
+                    self.next_after = last.id if last is not None else None
+                    return
+                count += 1
+                last = user
+                yield user
+
+
+class Repository:
+    """Доступ к пользователям, валютам и подпискам в базе SQLite.
+
+    Атрибуты:
+        path: Путь к файлу базы данных.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        seed: Optional[Callable[[Repository], None]] = None,
+    ) -> None:
+        """Запоминает путь к базе; соединения открываются при первом запросе.
+
+        Аргументы:
+            path: Путь к файлу базы данных.
+            seed: Функция начального заполнения; вызывается один раз,
+                если таблица пользователей пуста.
+        """
+        self.path = path
+        self._seed = seed
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._subscriptions: Optional[SubscriptionStore] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает новое соединение с нужными настройками."""
+        # Соединение используется только своим потоком; check_same_thread
+        # отключён, чтобы close() мог закрыть соединения всех потоков.
+        connection = sqlite3.connect(
+            self.path, cached_statements=256, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока (открывает его при необходимости)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+                if not self._initialized:
+                    self._initialize(connection)
+                    self._initialized = True
+        return connection
+
+    def _initialize(self, connection: sqlite3.Connection) -> None:
+        """Создаёт схему и при пустой базе выполняет начальное заполнение.
+
+        Проверка пустоты и заполнение идут в одной транзакции BEGIN IMMEDIATE:
+        другой процесс (prefork-воркер) ждёт её окончания и уже видит
+        заполненную таблицу, а не вставляет те же строки повторно.
+        """
+        with connection:
+            connection.executescript(SCHEMA)
+            self._migrate(connection)
+            connection.executescript(INDEXES)
+        if self._seed is None:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        with connection:
+            if connection.execute(SQL_COUNT_USERS).fetchone()[0] == 0:
+                self._seed(self)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Возвращает соединение потока; изменения фиксируются при выходе.
+
+        Внутри уже открытой транзакции (начальное заполнение) изменения
+        фиксирует или откатывает она сама.
+        """
+        connection = self.connection
+        if connection.in_transaction:
+            yield connection
+            return
+        with connection:
+            yield connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        """Добавляет столбец name_key в базы, созданные до его появления."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(users)")}
+        if "name_key" in columns:
+            return
+        connection.execute("ALTER TABLE users ADD COLUMN name_key TEXT NOT NULL DEFAULT ''")
+        rows = connection.execute("SELECT id, name FROM users").fetchall()
+        connection.executemany(
+            SQL_SET_NAME_KEY, ((name_key(name), user_id) for user_id, name in rows)
+        )
+
+    def close(self) -> None:
+        """Закрывает все открытые соединения всех потоков."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+            self._local = threading.local()
+
+    # --- Пользователи ---
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        """Возвращает пользователя по id (поиск по первичному ключу) или None."""
+        if not MIN_ID <= user_id <= MAX_ID:
+            # Такого id в таблице быть не может, а sqlite3 не примет его как параметр
+            return None
+        row = self.connection.execute(SQL_GET_USER, (user_id,)).fetchone()
+        return None if row is None else User.from_rows([row])[0]
+
+    def list_users(self) -> List[User]:
+        """Возвращает всех пользователей в порядке id."""
+        return User.from_rows(self.connection.execute(SQL_LIST_USERS).fetchall())
+
+    def users_page(
+        self,
+        after: int = 0,
+        limit: int = 50,
+        prefix: Optional[str] = None,
+    ) -> UserPage:
+        """Возвращает страницу пользователей после id after.
+
+        Без prefix пользователи идут в порядке id, и страница читается
+        по первичному ключу (WHERE id > after) без пропуска предыдущих
+        строк. С prefix выбираются пользователи, чьё имя начинается
+        с prefix без учёта регистра, в порядке имени.
+
+        Исключения:
+            ValueError: если after вне диапазона от 0 до MAX_ID или limit
+                меньше единицы.
+        """
+        if not 0 <= after <= MAX_ID or limit < 1:
+            raise ValueError(f"after должен быть от 0 до {MAX_ID}, limit — положительным.")
+        return UserPage(self, after, limit, prefix.strip() if prefix else None)
+
+    def count_users(self) -> int:
+        """Возвращает количество пользователей."""
+        return self.connection.execute(SQL_COUNT_USERS).fetchone()[0]
+
+    def users_revision(self) -> int:
+        """Возвращает номер ревизии таблицы пользователей.
+
+        Номер увеличивается триггерами при каждом изменении таблицы,
+        поэтому изменения из других процессов тоже учитываются.
+        """
+        return self.connection.execute(SQL_USERS_REVISION).fetchone()[0]
+
+    def add_user(self, name: str) -> User:
+        """Создаёт пользователя с новым id и возвращает его.
+
+        Исключения:
+            TypeError, ValueError: если имя некорректно (проверки User).
+        """
+        User(1, name)
+        with self._transaction() as connection:
+            cursor = connection.execute(SQL_INSERT_USER_NAME, (name, name_key(name)))
+        return User(cursor.lastrowid, name)
+
+    def add_users(self, users: Iterable[User]) -> None:
+        """Добавляет пользователей одной транзакцией (executemany)."""
+        with self._transaction() as connection:
+            connection.executemany(
+                SQL_INSERT_USER, ((u.id, u.name, name_key(u.name)) for u in users)
+            )
+
+    def delete_user(self, user_id: int) -> bool:
+        """Удаляет пользователя и его подписки; возвращает False, если его не было."""
+        with self._transaction() as connection:
+            deleted = connection.execute(SQL_DELETE_USER, (user_id,)).rowcount > 0
+        if deleted and self._subscriptions is not None:
+            self._subscriptions.remove_user(user_id)
+        return deleted
+
+    # --- Валюты ---
+
+    def save_currencies(self, currencies: Iterable[Currency]) -> None:
+        """Сохраняет (добавляет или обновляет) валюты одной транзакцией."""
+        rows = (
+            (c.id, c.num_code, c.char_code, c.name, c.value, c.nominal)
+            for c in currencies
+        )
+        with self._transaction() as connection:
+            connection.executemany(SQL_UPSERT_CURRENCY, rows)
+
+    def list_currencies(self) -> List[Currency]:
+        """Возвращает все сохранённые валюты в порядке id."""
+        return Currency.from_rows(self.connection.execute(SQL_LIST_CURRENCIES).fetchall())
+
+    # --- Подписки ---
+
+    @property
+    def subscriptions(self) -> SubscriptionStore:
+        """Возвращает индекс подписок, загруженный из базы при первом обращении."""
+        if self._subscriptions is None:
+            store = SubscriptionStore(UserCurrency.from_rows(
+                self.connection.execute(SQL_LIST_LINKS).fetchall()
+            ))
+            with self._lock:
+                if self._subscriptions is None:
+                    self._subscriptions = store
+        return self._subscriptions
+
+    def add_subscriptions(self, pairs: Iterable[tuple]) -> None:
+        """Добавляет подписки (user_id, currency_id) одной транзакцией.
+
+        Уже существующие подписки пропускаются.
+        """
+        pairs = list(pairs)
+        with self._transaction() as connection:
+            connection.executemany(SQL_INSERT_LINK, pairs)
+        if self._subscriptions is not None:
+            for user_id, currency_id in pairs:
+                self._subscriptions.add_link(self._link(user_id, currency_id))
+
+    def _link(self, user_id: int, currency_id: int) -> UserCurrency:
+        """Возвращает сохранённую связь пользователя и валюты."""
+        row = self.connection.execute(SQL_GET_LINK, (user_id, currency_id)).fetchone()
+        return UserCurrency(row[0], user_id, currency_id)
+
+    def remove_subscription(self, user_id: int, currency_id: int) -> bool:
+        """Отменяет подписку; возвращает False, если её не было."""
+        with self._transaction() as connection:
+            removed = connection.execute(SQL_DELETE_LINK, (user_id, currency_id)).rowcount > 0
+        if removed and self._subscriptions is not None:
+            self._subscriptions.remove(user_id, currency_id)
+        return removed
+
+    def list_subscriptions(self) -> List[UserCurrency]:
+        """Возвращает все подписки в порядке id."""
+        return UserCurrency.from_rows(self.connection.execute(SQL_LIST_LINKS).fetchall())
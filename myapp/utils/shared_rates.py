@@ -0,0 +1,319 @@
+"""Модуль снимка курсов в общей памяти для многопроцессного режима.
+
+Один процесс (главный процесс prefork-сервера) загружает курсы и
+записывает каждый новый снимок в сегмент multiprocessing.shared_memory
+через SharedRatesWriter. Рабочие процессы читают его через
+SharedRatesReader: числовые столбцы таблицы и матрица кросс-курсов —
+это массивы NumPy только для чтения прямо поверх общей памяти, без
+копирования. Новая версия замечается по номеру в заголовке, без
+обращений к другим процессам; Python-объекты (индекс кодов, список
+Currency для шаблонов) строятся один раз на версию.
+
+Устройство сегмента:
+- заголовок: сигнатура, счётчик seqlock (нечётный — идёт запись),
+  номер версии, номер слота, число валют, ёмкость слота, дата
+  и время загрузки;
+- SLOTS слотов данных: столбцы ids, num_codes, nominals, values,
+  unit_rates, символьные коды, названия (UTF-8 со смещениями)
+  и матрица кросс-курсов.
+
+Версия N пишется в слот N % SLOTS, поэтому слот, на который
+ссылаются снимки читателей, перезаписывается только через SLOTS - 1
+новых версий (при обновлении раз в час — через несколько часов).
+Заголовок меняется под seqlock: читатель повторяет чтение, если
+счётчик изменился или был нечётным.
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..models import CurrencyTable
+from .conversion import BASE_CURRENCY, RateMatrix
+from .rates import RatesSnapshot
+
+SLOTS = 4
+MAGIC = 0x52415445  # "RATE"
+FORMAT_VERSION = 1
+CODE_SIZE = 8
+NAME_BYTES_PER_ROW = 128
+
+# Сигнатура, формат, seqlock, версия, слот, строк, время загрузки, байтов
+# названий, строк матрицы, ёмкость слота, дата курсов
+_HEADER = struct.Struct("<IIQQIIdIII12s")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+_VERSION_OFFSET = 16
+
+
+class _SlotLayout:
+    """Смещения столбцов внутри одного слота для ёмкости capacity строк."""
+
+    def __init__(self, capacity: int) -> None:
+        """Вычисляет смещения и размер слота (все поля выровнены на 8 байтов)."""
+        self.capacity = capacity
+        self.names_capacity = capacity * NAME_BYTES_PER_ROW
+        offset = 0
+        self.offsets = {}
+        for name, size in (
+            ("ids", 8 * capacity),
+            ("num_codes", 8 * capacity),
+            ("nominals", 8 * capacity),
+            ("values", 8 * capacity),
+            ("unit_rates", 8 * capacity),
+            ("name_offsets", 8 * (capacity + 1)),
+            ("codes", CODE_SIZE * capacity),
+            ("names", self.names_capacity),
+            ("matrix", 8 * (capacity + 1) ** 2),
+        ):
+            self.offsets[name] = offset
+            offset += (size + 7) // 8 * 8
+        self.size = offset
+
+
+def _segment_size(layout: _SlotLayout) -> int:
+    """Возвращает размер сегмента: заголовок и SLOTS слотов."""
+    return _HEADER.size + SLOTS * layout.size
+
+
+class SharedRatesWriter:
+    """Запись снимков курсов в сегмент общей памяти.
+
+    Атрибуты:
+        capacity: Наибольшее число валют в снимке.
+        published: Номер последней записанной версии (0 — ещё не было).
+    """
+
+    def __init__(self, capacity: int = 256, name: Optional[str] = None) -> None:
+        """Создаёт сегмент общей памяти на capacity валют.
+
+        Исключения:
+            ValueError: если capacity меньше единицы.
+            FileExistsError: если сегмент с именем name уже существует.
+        """
+        if capacity <= 0:
+            raise ValueError("Ёмкость снимка должна быть больше нуля.")
+        self.capacity = capacity
+        self.published = 0
+        self._layout = _SlotLayout(capacity)
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_segment_size(self._layout)
+        )
+        _HEADER.pack_into(
+            self._shm.buf, 0, MAGIC, FORMAT_VERSION, 0, 0, 0, 0, 0.0, 0, 0, capacity, b""
+        )
+
+    @property
+    def name(self) -> str:
+        """Имя сегмента общей памяти (для SharedRatesReader.attach)."""
+        return self._shm.name
+
+    def reader(self) -> SharedRatesReader:
+        """Возвращает читателя того же сегмента (для процессов, созданных через fork)."""
+        return SharedRatesReader(self._shm)
+
+    def publish(self, snapshot: RatesSnapshot) -> None:
+        """Записывает snapshot как следующую версию.
+
+        Исключения:
+            ValueError: если валют больше capacity, названия не
+                помещаются в слот или символьный код длиннее 8 байтов.
+        """
+        table = snapshot.table
+        rows = len(table)
+        if rows > self.capacity:
+            raise ValueError(f"В снимке {rows} валют, а ёмкость — {self.capacity}.")
+        encoded = [name.encode("utf-8") for name in table.names]
+        names = b"".join(encoded)
+        if len(names) > self._layout.names_capacity:
+            raise ValueError("Названия валют не помещаются в общую память.")
+        codes = [code.encode("ascii") for code in table.char_codes]
+        if any(len(code) > CODE_SIZE for code in codes):
+            raise ValueError("Символьный код валюты длиннее 8 байтов.")
+        matrix = snapshot.matrix.matrix
+        matrix_rows = len(snapshot.matrix.codes)
+
+        version = self.published + 1
+        slot = version % SLOTS
+        views = _slot_arrays(self._shm.buf, self._layout, slot, rows, len(names), matrix_rows)
+        views["ids"][:] = table.ids
+        views["num_codes"][:] = table.num_codes
+        views["nominals"][:] = table.nominals
+        views["values"][:] = table.values
+        views["unit_rates"][:] = table.unit_rates()
+        views["codes"][:] = codes
+        views["name_offsets"][:] = np.cumsum([0] + [len(name) for name in encoded])
+        views["names"][:] = np.frombuffer(names, dtype=np.uint8)
+        views["matrix"][:] = matrix
+        del views
+
+        # seqlock: нечётный счётчик — заголовок меняется, читатели ждут
+        buf = self._shm.buf
+        seq = _SEQ.unpack_from(buf, _SEQ_OFFSET)[0]
+        _SEQ.pack_into(buf, _SEQ_OFFSET, seq + 1)
+        _HEADER.pack_into(
+            buf,
+            0,
+            MAGIC,
+            FORMAT_VERSION,
+            seq + 1,
+            version,
+            slot,
+            rows,
+            snapshot.fetched_at,
+            len(names),
+            matrix_rows,
+            self.capacity,
+            snapshot.date.encode("ascii", "replace")[:12],
+        )
+        _SEQ.pack_into(buf, _SEQ_OFFSET, seq + 2)
+        self.published = version
+
+    def close(self, unlink: bool = True) -> None:
+        """Закрывает сегмент и (по умолчанию) удаляет его из системы."""
+        try:
+            self._shm.close()
+        except BufferError:  # на сегмент ещё ссылаются снимки читателей
+            pass
+        if unlink:
+            self._shm.unlink()
+
+
+class SharedRatesReader:
+    """Чтение снимков курсов из сегмента общей памяти без копирования.
+
+    Атрибуты:
+        capacity: Ёмкость снимка, с которой создан сегмент.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory) -> None:
+        """Оборачивает уже открытый сегмент shm.
+
+        Исключения:
+            ValueError: если сегмент не содержит снимка курсов.
+        """
+        self._shm = shm
+        self._buf = shm.buf.toreadonly()
+        header = _HEADER.unpack_from(self._buf, 0)
+        if header[:2] != (MAGIC, FORMAT_VERSION):
+            raise ValueError("Сегмент общей памяти не содержит снимка курсов.")
+        self.capacity = header[9]
+        self._layout = _SlotLayout(self.capacity)
+        self._version = 0
+        self._snapshot: Optional[RatesSnapshot] = None
+
+    @classmethod
+    def attach(cls, name: str) -> SharedRatesReader:
+        """Открывает сегмент по имени (в процессе, не унаследовавшем его через fork)."""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def version(self) -> int:
+        """Номер последней опубликованной версии (0 — снимка ещё нет)."""
+        return _SEQ.unpack_from(self._buf, _VERSION_OFFSET)[0]
+
+    def read(self) -> Optional[RatesSnapshot]:
+        """Возвращает текущий снимок или None, если он ещё не опубликован.
+
+        Пока версия не изменилась, возвращается тот же объект:
+        проверка — одно чтение номера версии из общей памяти.
+        """
+        if _SEQ.unpack_from(self._buf, _VERSION_OFFSET)[0] == self._version:
+            return self._snapshot
+        while True:
+            header = self._read_header()
+            version = header[3]
+            if version == 0:
+                return None
+            snapshot = self._build(header)
+            # Пока строился снимок, слот мог быть перезаписан только после SLOTS - 1 версий
+            if self.version - version < SLOTS - 1:
+                break
+        self._version = version
+        self._snapshot = snapshot
+        return snapshot
+
+    def close(self) -> None:
+        """Отпускает последний снимок и закрывает сегмент (не удаляя его).
+
+        Если на массивы сегмента ещё ссылаются снимки, сегмент
+        остаётся открытым до их удаления.
+        """
+        self._snapshot = None
+        self._version = 0
+        try:
+            self._buf.release()
+            self._shm.close()
+        except BufferError:
+            pass
+
+    def _read_header(self) -> Tuple:
+        """Читает согласованный заголовок по протоколу seqlock."""
+        while True:
+            before = _SEQ.unpack_from(self._buf, _SEQ_OFFSET)[0]
+            if before % 2:
+                time.sleep(0)
+                continue
+            header = _HEADER.unpack_from(self._buf, 0)
+            if _SEQ.unpack_from(self._buf, _SEQ_OFFSET)[0] == before:
+                return header
+
+    def _build(self, header: Tuple) -> RatesSnapshot:
+        """Собирает снимок поверх массивов слота из заголовка header."""
+        _, _, _, version, slot, rows, fetched_at, names_length, matrix_rows, _, date = header
+        views = _slot_arrays(self._buf, self._layout, slot, rows, names_length, matrix_rows)
+        offsets = views["name_offsets"].tolist()
+        names_blob = views["names"].tobytes()
+        names = [
+            names_blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])
+        ]
+        codes: List[str] = [code.decode("ascii") for code in views["codes"].tolist()]
+        table = CurrencyTable.from_arrays(
+            views["ids"],
+            views["num_codes"],
+            codes,
+            names,
+            views["values"],
+            views["nominals"],
+            unit_rates=views["unit_rates"],
+        )
+        matrix_codes = codes + [BASE_CURRENCY] if matrix_rows == rows + 1 else codes
+        matrix = RateMatrix.from_matrix(matrix_codes, views["matrix"])
+        return RatesSnapshot.from_table(
+            table, matrix, version, date.rstrip(b"\0").decode("ascii"), fetched_at
+        )
+
+
+def _slot_arrays(
+    buf: memoryview,
+    layout: _SlotLayout,
+    slot: int,
+    rows: int,
+    names_length: int,
+    matrix_rows: int,
+) -> dict:
+    """Возвращает массивы NumPy поверх полей слота slot (без копирования)."""
+    base = _HEADER.size + slot * layout.size
+    offsets = layout.offsets
+
+    def array(name: str, dtype: object, count: int) -> np.ndarray:
+        return np.frombuffer(buf, dtype=dtype, count=count, offset=base + offsets[name])
+
+    return {
+        "ids": array("ids", np.int64, rows),
+        "num_codes": array("num_codes", np.int64, rows),
+        "nominals": array("nominals", np.int64, rows),
+        "values": array("values", np.float64, rows),
+        "unit_rates": array("unit_rates", np.float64, rows),
+        "name_offsets": array("name_offsets", np.int64, rows + 1),
+        "codes": array("codes", f"S{CODE_SIZE}", rows),
+        "names": array("names", np.uint8, names_length),
+        "matrix": array("matrix", np.float64, matrix_rows * matrix_rows).reshape(
+            matrix_rows, matrix_rows
+        ),
+    }
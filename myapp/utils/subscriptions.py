@@ -0,0 +1,131 @@
+"""Модуль хранилища подписок пользователей на валюты.
+
+Здесь определён класс SubscriptionStore, который хранит связи
+UserCurrency сразу в двух индексах:
+- прямом: пользователь -> множество идентификаторов валют;
+- обратном: валюта -> множество идентификаторов пользователей.
+
+Оба индекса обновляются вместе при каждом добавлении и удалении,
+поэтому вопросы «на что подписан пользователь» и «кто подписан
+на валюту» решаются за O(1) без перебора всех пользователей.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from ..models import UserCurrency
+
+
+class SubscriptionStore:
+    """Хранилище подписок с прямым и обратным индексами."""
+
+    def __init__(self, links: Iterable[UserCurrency] = ()) -> None:
+        """Создаёт хранилище и загружает в него существующие связи.
+
+        Исключения:
+            TypeError: если элемент links не является UserCurrency.
+        """
+        self._by_user: Dict[int, Set[int]] = {}
+        self._by_currency: Dict[int, Set[int]] = {}
+        self._link_ids: Dict[Tuple[int, int], int] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for link in links:
+            self.add_link(link)
+
+    def add_link(self, link: UserCurrency) -> None:
+        """Добавляет готовую связь (например, загруженную из базы данных).
+
+        Исключения:
+            TypeError: если link не является UserCurrency.
+        """
+        if not isinstance(link, UserCurrency):
+            raise TypeError("Связь должна быть экземпляром UserCurrency.")
+        with self._lock:
+            self._insert(link.id, link.user_id, link.currency_id)
+            self._next_id = max(self._next_id, link.id + 1)
+
+    def add(self, user_id: int, currency_id: int) -> UserCurrency:
+        """Подписывает пользователя на валюту и возвращает связь.
+
+        Повторная подписка не создаёт новую связь, а возвращает прежнюю.
+
+        Исключения:
+            TypeError, ValueError: если идентификаторы некорректны
+                (те же проверки, что и в UserCurrency).
+        """
+        with self._lock:
+            link_id = self._link_ids.get((user_id, currency_id))
+            if link_id is None:
+                link_id = self._next_id
+                link = UserCurrency(link_id, user_id, currency_id)
+                self._next_id += 1
+                self._insert(link_id, user_id, currency_id)
+                return link
+        return UserCurrency(link_id, user_id, currency_id)
+
+    def _insert(self, link_id: int, user_id: int, currency_id: int) -> None:
+        """Записывает связь в оба индекса (вызывается под блокировкой)."""
+        self._link_ids[(user_id, currency_id)] = link_id
+        self._by_user.setdefault(user_id, set()).add(currency_id)
+        self._by_currency.setdefault(currency_id, set()).add(user_id)
+
+    def remove(self, user_id: int, currency_id: int) -> bool:
+        """Отменяет подписку; возвращает False, если её не было."""
+        with self._lock:
+            if self._link_ids.pop((user_id, currency_id), None) is None:
+                return False
+            self._discard(self._by_user, user_id, currency_id)
+            self._discard(self._by_currency, currency_id, user_id)
+            return True
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[int]], key: int, value: int) -> None:
+        """Удаляет value из множества index[key], убирая пустые множества."""
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
+
+    def remove_user(self, user_id: int) -> int:
+        """Удаляет все подписки пользователя; возвращает их количество."""
+        with self._lock:
+            currency_ids = self._by_user.pop(user_id, set())
+            for currency_id in currency_ids:
+                del self._link_ids[(user_id, currency_id)]
+                self._discard(self._by_currency, currency_id, user_id)
+            return len(currency_ids)
+
+    def currencies_of(self, user_id: int) -> FrozenSet[int]:
+        """Возвращает идентификаторы валют, на которые подписан пользователь."""
+        with self._lock:
+            return frozenset(self._by_user.get(user_id, ()))
+
+    def subscribers_of(self, currency_id: int) -> FrozenSet[int]:
+        """Возвращает идентификаторы пользователей, подписанных на валюту."""
+        with self._lock:
+            return frozenset(self._by_currency.get(currency_id, ()))
+
+    def subscriber_count(self, currency_id: int) -> int:
+        """Возвращает количество подписчиков валюты без копирования множества."""
+        return len(self._by_currency.get(currency_id, ()))
+
+    def is_subscribed(self, user_id: int, currency_id: int) -> bool:
+        """Проверяет, подписан ли пользователь на валюту."""
+        return (user_id, currency_id) in self._link_ids
+
+    def links(self) -> List[UserCurrency]:
+        """Возвращает все связи в виде объектов UserCurrency."""
+        with self._lock:
+            rows = [
+                (link_id, user_id, currency_id)
+                for (user_id, currency_id), link_id in self._link_ids.items()
+            ]
+        return UserCurrency.from_rows(rows)
+
+    def __len__(self) -> int:
+        """Возвращает общее количество подписок."""
+        return len(self._link_ids)
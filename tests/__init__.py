@@ -0,0 +1,16 @@
+"""Тесты приложения.
+
+База данных и история курсов приложения во время тестов создаются во временном
+каталоге, чтобы не трогать рабочие файлы приложения; при выходе из процесса
+каталог удаляется. Заглушку ленты курсов тесты берут из benchmarks/stub_feed.py.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="myapp-tests-")
+atexit.register(shutil.rmtree, _WORKDIR, ignore_errors=True)
+os.environ.setdefault("MYAPP_DB", os.path.join(_WORKDIR, "myapp.sqlite3"))
+os.environ.setdefault("MYAPP_HISTORY", os.path.join(_WORKDIR, "history"))
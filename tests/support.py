@@ -0,0 +1,79 @@
+"""Общие помощники тестов.
+
+BufferedRequestHandler, request, get, post и get_json выполняют запрос
+обработчиком приложения без сокета и разбирают ответ. Заглушку ленты
+курсов модули тестов запускают сами в setUpModule (benchmarks/stub_feed.py).
+"""
+
+from __future__ import annotations
+
+import io
+import json
+from typing import Any, Dict, Tuple
+
+from myapp.myapp import MyRequestHandler
+from myapp.utils.metrics import CountingWriter
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+class BufferedRequestHandler(MyRequestHandler):
+    """MyRequestHandler, который читает запрос из буфера и пишет ответ в буфер.
+
+    Обрабатывает ровно один запрос и отвечает по HTTP/1.0, поэтому ответ
+    в буфере всегда целый (без chunked).
+    """
+
+    protocol_version = "HTTP/1.0"
+
+    def __init__(
+        self, raw_request: bytes, client_address: Tuple[str, int], server: Any
+    ) -> None:
+        """Обрабатывает запрос raw_request и сохраняет ответ в self.wfile.
+
+        Аргументы:
+            raw_request: Строка запроса, заголовки и тело в виде байтов.
+            client_address: Адрес клиента.
+            server: Объект сервера (доступен обработчику как self.server).
+        """
+        self.request = None
+        self.client_address = client_address
+        self.server = server
+        self.rfile = io.BytesIO(raw_request)
+        self._response = io.BytesIO()
+        self.wfile = CountingWriter(self._response)
+        self.close_connection = True
+        self.handle_one_request()
+
+    def response_bytes(self) -> bytes:
+        """Возвращает весь записанный обработчиком ответ."""
+        return self._response.getvalue()
+
+
+def request(raw: bytes) -> Response:
+    """Выполняет запрос raw обработчиком приложения: возвращает статус, заголовки и тело."""
+    response = BufferedRequestHandler(raw, ("127.0.0.1", 0), None).response_bytes()
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split(" ", 2)[1]), headers, body
+
+
+def get(path: str, headers: str = "") -> Response:
+    """Выполняет GET-запрос; headers — дополнительные строки вида "Имя: значение\\r\\n"."""
+    return request(f"GET {path} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode("utf-8"))
+
+
+def post(path: str, body: bytes, content_type: str) -> Response:
+    """Выполняет POST-запрос с телом body типа content_type."""
+    head = (
+        f"POST {path} HTTP/1.1\r\nHost: test\r\n"
+        f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode("ascii")
+    return request(head + body)
+
+
+def get_json(path: str) -> Tuple[int, Any]:
+    """Выполняет GET-запрос и разбирает JSON-ответ: возвращает статус и данные."""
+    status, _, body = get(path)
+    return status, json.loads(body.decode("utf-8"))
@@ -0,0 +1,242 @@
+"""Тесты для асинхронного сервера AsyncHTTPServer.
+
+Здесь проверяется, что сервер отдаёт те же маршруты, что и
+MyRequestHandler, и держит постоянные соединения.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+import myapp.myapp as app
+from myapp.aio_server import AsyncHTTPServer
+
+from benchmarks.stub_feed import get_active_stub, install_stub_feed, uninstall_stub_feed
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple:
+    """Читает один ответ (Content-Length или chunked): возвращает статус, заголовки и тело."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") != "chunked":
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+        return status, headers, body
+    chunks = []
+    while True:
+        size = int(await reader.readuntil(b"\r\n"), 16)
+        chunks.append(await reader.readexactly(size + 2))
+        if not size:
+            return status, headers, b"".join(chunk[:-2] for chunk in chunks)
+
+
+class AsyncServerTests(unittest.IsolatedAsyncioTestCase):
+    """Набор тестов для AsyncHTTPServer."""
+
+    async def asyncSetUp(self) -> None:
+        """Запускает сервер на свободном порту."""
+        self.server = AsyncHTTPServer(app.MyRequestHandler, "127.0.0.1", 0, threads=4)
+        await self.server.start()
+
+    async def asyncTearDown(self) -> None:
+        """Останавливает сервер."""
+        await self.server.close()
+
+    async def _connect(self) -> tuple:
+        """Открывает соединение с сервером."""
+        return await asyncio.open_connection("127.0.0.1", self.server.port)
+
+    async def test_serves_routes_over_one_connection(self) -> None:
+        """Несколько запросов подряд должны обслуживаться в одном соединении."""
+        reader, writer = await self._connect()
+        expected = {"/": 200, "/users": 200, "/currencies": 200,
+                    "/author": 200, "/user?id=1": 200, "/user": 400,
+                    "/missing": 404}
+        for path, status in expected.items():
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+            await writer.drain()
+            got_status, headers, body = await _read_response(reader)
+            self.assertEqual(got_status, status, path)
+            self.assertNotIn("connection", headers)
+            self.assertTrue(body)
+        writer.close()
+        await writer.wait_closed()
+
+    async def test_connection_close_is_respected(self) -> None:
+        """Запрос с Connection: close должен закрывать соединение."""
+        reader, writer = await self._connect()
+        writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        status, _, _ = await _read_response(reader)
+        self.assertEqual(status, 200)
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_last_request_closes_connection(self) -> None:
+        """На последний разрешённый запрос соединения приходит Connection: close."""
+        self.server.max_requests = 2
+        reader, writer = await self._connect()
+        writer.write(b"GET /author HTTP/1.1\r\n\r\n" * 2)
+        await writer.drain()
+        self.assertNotIn("connection", (await _read_response(reader))[1])
+        self.assertEqual((await _read_response(reader))[1]["connection"], "close")
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_handler_close_is_respected(self) -> None:
+        """Если обработчик закрывает соединение, следующий запрос не читается."""
+        reader, writer = await self._connect()
+        writer.write(
+            b"POST /convert HTTP/1.1\r\nContent-Type: text/plain\r\n"
+            b"Content-Length: 5\r\n\r\nhello"
+            b"GET /author HTTP/1.1\r\n\r\n"
+        )
+        await writer.drain()
+        status, _, _ = await _read_response(reader)
+        self.assertEqual(status, 415)
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_chunked_request_is_rejected(self) -> None:
+        """Тело с Transfer-Encoding не принимается, а его части не разбираются как запросы."""
+        reader, writer = await self._connect()
+        writer.write(
+            b"POST /convert HTTP/1.1\r\nContent-Type: text/csv\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+            b"12\r\nUSD,EUR,1\r\n<HTML>\r\n\r\n0\r\n\r\n"
+        )
+        await writer.drain()
+        status, headers, _ = await _read_response(reader)
+        self.assertEqual((status, headers["connection"]), (411, "close"))
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_malformed_content_length_is_rejected(self) -> None:
+        """Отрицательный или нечисловой Content-Length — неверный запрос (400)."""
+        for length in (b"-1", b"abc"):
+            reader, writer = await self._connect()
+            writer.write(
+                b"POST /convert HTTP/1.1\r\nContent-Type: text/csv\r\n"
+                b"Content-Length: " + length + b"\r\n\r\n"
+            )
+            await writer.drain()
+            status, headers, _ = await _read_response(reader)
+            self.assertEqual((status, headers["connection"]), (400, "close"), length)
+            self.assertEqual(await reader.read(), b"")
+            writer.close()
+
+    async def test_oversized_header_gets_431(self) -> None:
+        """Заголовок длиннее header_limit получает ответ 431, а не обрыв соединения."""
+        reader, writer = await self._connect()
+        filler = b"x" * AsyncHTTPServer.header_limit
+        writer.write(b"GET / HTTP/1.1\r\nX-Filler: " + filler + b"\r\n\r\n")
+        await writer.drain()
+        status, headers, _ = await _read_response(reader)
+        self.assertEqual((status, headers["connection"]), (431, "close"))
+        writer.close()
+
+    async def test_post_body_is_read_from_connection(self) -> None:
+        """Тело запроса читается обработчиком, соединение остаётся открытым."""
+        reader, writer = await self._connect()
+        body = b"USD,EUR,100\nEUR,USD,1\n"
+        for _ in range(2):
+            writer.write(
+                b"POST /convert HTTP/1.1\r\nContent-Type: text/csv\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+            status, _, answer = await _read_response(reader)
+            self.assertEqual(status, 200)
+            self.assertIn(b"USD,EUR,100", answer)
+        writer.close()
+
+    async def test_large_page_is_streamed(self) -> None:
+        """Большая страница отправляется частями chunked по мере записи."""
+        old_rows, old_chunk = app.STREAM_MIN_ROWS, app.STREAM_CHUNK_SIZE
+        app.STREAM_MIN_ROWS, app.STREAM_CHUNK_SIZE = 2, 64
+        try:
+            reader, writer = await self._connect()
+            writer.write(b"GET /users HTTP/1.1\r\n\r\n")
+            await writer.drain()
+            status, headers, body = await _read_response(reader)
+        finally:
+            app.STREAM_MIN_ROWS, app.STREAM_CHUNK_SIZE = old_rows, old_chunk
+        self.assertEqual((status, headers["transfer-encoding"]), (200, "chunked"))
+        self.assertIn(b"</html>", body)
+        writer.close()
+
+    async def test_many_idle_connections(self) -> None:
+        """Сотни одновременно открытых соединений должны обслуживаться."""
+        connections = [await self._connect() for _ in range(200)]
+        for _, writer in connections:
+            writer.write(b"GET /author HTTP/1.1\r\n\r\n")
+        statuses = await asyncio.gather(
+            *(_read_response(reader) for reader, _ in connections)
+        )
+        self.assertTrue(all(status == 200 for status, _, _ in statuses))
+        for _, writer in connections:
+            writer.close()
+
+
+class AsyncioModeTests(unittest.TestCase):
+    """Набор тестов для запуска сервера в режиме asyncio из командной строки."""
+
+    def test_module_entry_point_serves_requests(self) -> None:
+        """python -m myapp.myapp --mode asyncio должен запускаться и отвечать на запросы."""
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        env = dict(
+            os.environ,
+            CBR_DAILY_URL=get_active_stub().url,
+            MYAPP_DB=os.path.join(workdir.name, "myapp.sqlite3"),
+            MYAPP_HISTORY=os.path.join(workdir.name, "history"),
+            PYTHONUNBUFFERED="1",
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", "myapp.myapp", "--mode", "asyncio", "--port", "0"],
+            cwd=Path(__file__).resolve().parents[1],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            started = re.search(r":(\d+)/", process.stdout.readline().decode("utf-8"))
+            if started is None:
+                process.wait(10)
+                self.fail(process.stderr.read().decode("utf-8"))
+            url = f"http://127.0.0.1:{started.group(1)}/user?id=1"
+            with urllib.request.urlopen(url, timeout=10) as response:
+                self.assertEqual(response.status, 200)
+                self.assertIn(b"Ali", response.read())
+        finally:
+            process.terminate()
+            process.wait(10)
+            process.stdout.close()
+            process.stderr.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
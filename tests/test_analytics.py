@@ -0,0 +1,208 @@
+"""Тесты для скользящей статистики курсов.
+
+Здесь проверяются RollingStats, RateAnalytics и маршруты
+'/currency/<code>/stats' и '/currency/<code>/stats.json'.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import random
+import shutil
+import tempfile
+import unittest
+from typing import List
+
+import numpy as np
+
+from myapp.models import Currency
+from myapp.utils import currencies_api
+from myapp.utils.analytics import RateAnalytics, RollingStats
+from myapp.utils.history import HistoryStore
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+FIRST = dt.date(2026, 1, 1)
+
+
+def random_walk(count: int, seed: int = 1) -> List[float]:
+    """Возвращает ряд курсов — случайное блуждание около 80."""
+    rng = random.Random(seed)
+    values = [80.0]
+    for _ in range(count - 1):
+        values.append(values[-1] + rng.gauss(0, 0.5))
+    return values
+
+
+def expected(values: List[float], window: int) -> dict:
+    """Считает статистику последних window значений напрямую через NumPy."""
+    tail = np.array(values[-window:])
+    return {
+        "moving_average": tail.mean(),
+        "change_std": np.diff(tail).std() if len(tail) > 1 else None,
+        "min": tail.min(),
+        "max": tail.max(),
+    }
+
+
+class RollingStatsTests(unittest.TestCase):
+    """Набор тестов для RollingStats."""
+
+    def test_matches_direct_computation(self) -> None:
+        """После каждого значения статистика совпадает с расчётом по окну."""
+        values = random_walk(300)
+        stats = RollingStats(20)
+        for number, value in enumerate(values, start=1):
+            stats.push(value)
+            reference = expected(values[:number], 20)
+            self.assertEqual(len(stats), min(number, 20))
+            self.assertAlmostEqual(stats.mean, reference["moving_average"], places=9)
+            self.assertEqual((stats.minimum, stats.maximum), (reference["min"], reference["max"]))
+            if number > 1:
+                self.assertAlmostEqual(stats.change_std, reference["change_std"], places=9)
+
+    def test_from_values_continues_like_push(self) -> None:
+        """Статистика, построенная по ряду сразу, дальше обновляется так же."""
+        values = random_walk(100)
+        built = RollingStats.from_values(np.array(values), 10)
+        pushed = RollingStats(10)
+        for value in values:
+            pushed.push(value)
+        for value in (75.0, 90.0, 80.0):
+            built.push(value)
+            pushed.push(value)
+            self.assertAlmostEqual(built.mean, pushed.mean, places=9)
+            self.assertAlmostEqual(built.change_std, pushed.change_std, places=9)
+            self.assertEqual((built.minimum, built.maximum), (pushed.minimum, pushed.maximum))
+
+    def test_empty_and_invalid(self) -> None:
+        """Пустая статистика ничего не сообщает; окно меньше двух дней запрещено."""
+        stats = RollingStats(5)
+        self.assertIsNone(stats.mean)
+        stats.push(80.0)
+        self.assertIsNone(stats.change_std)
+        with self.assertRaises(ValueError):
+            RollingStats(1)
+        with self.assertRaises(ValueError):
+            RateAnalytics(1)
+
+
+class RateAnalyticsTests(unittest.TestCase):
+    """Набор тестов для RateAnalytics поверх HistoryStore."""
+
+    def setUp(self) -> None:
+        """Записывает в историю 40 дней курсов USD и KZT (номинал 100)."""
+        self.directory = tempfile.mkdtemp(prefix="myapp-analytics-")
+        self.store = HistoryStore(self.directory)
+        self.usd = random_walk(40, seed=2)
+        self.store.append_many(
+            (FIRST + dt.timedelta(days=number), self.day(value))
+            for number, value in enumerate(self.usd)
+        )
+
+    def tearDown(self) -> None:
+        """Закрывает историю и удаляет каталог."""
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def day(usd: float) -> List[Currency]:
+        """Возвращает курсы одного дня."""
+        return [
+            Currency(1, 840, "USD", "Доллар США", usd, 1),
+            Currency(2, 398, "KZT", "Казахстанский тенге", usd / 5, 100),
+        ]
+
+    def assert_stats(self, stats: dict, values: List[float], window: int) -> None:
+        """Сравнивает статистику с расчётом по последним window значениям."""
+        for key, value in expected(values, window).items():
+            self.assertAlmostEqual(stats[key], value, places=9, msg=key)
+
+    def test_rebuild_then_incremental_updates(self) -> None:
+        """Первый sync строит статистику по истории, следующие — добавляют дни."""
+        analytics = RateAnalytics(window=10)
+        self.assertEqual(analytics.sync(self.store), 2)
+        self.assertEqual(analytics.updates, 0)
+        stats = analytics.stats("USD")
+        self.assertEqual((stats["count"], stats["date"]), (10, "2026-02-09"))
+        self.assert_stats(stats, self.usd, 10)
+        kzt = analytics.stats("KZT")
+        self.assertAlmostEqual(kzt["last"], self.usd[-1] / 500)
+
+        self.assertEqual(analytics.sync(self.store), 0)
+        self.store.append_many(
+            (dt.date(2026, 2, 10) + dt.timedelta(days=number), self.day(value))
+            for number, value in enumerate((70.0, 95.0))
+        )
+        self.assertEqual(analytics.sync(self.store), 2)
+        self.assertEqual(analytics.updates, 2)
+        self.assert_stats(analytics.stats("USD"), self.usd + [70.0, 95.0], 10)
+        self.assertEqual(analytics.stats("USD")["date"], "2026-02-11")
+
+    def test_prepended_days_trigger_rebuild(self) -> None:
+        """После добавления ранних дней в начало истории статистика строится заново."""
+        analytics = RateAnalytics(window=50)
+        analytics.sync(self.store)
+        earlier = random_walk(5, seed=3)
+        older = HistoryStore(tempfile.mkdtemp(dir=self.directory))
+        try:
+            older.append_many(
+                (FIRST - dt.timedelta(days=5 - number), self.day(value))
+                for number, value in enumerate(earlier)
+            )
+            self.assertEqual(self.store.prepend(older), 5)
+        finally:
+            older.close()
+        self.assertEqual(analytics.sync(self.store), 2)
+        self.assert_stats(analytics.stats("USD"), earlier + self.usd, 50)
+
+    def test_update_skips_old_days(self) -> None:
+        """Уже учтённый день не меняет статистику; неизвестной валюты нет."""
+        analytics = RateAnalytics(window=5)
+        analytics.sync(self.store)
+        self.assertFalse(analytics.update(FIRST, [("USD", 1.0, 1)]))
+        self.assert_stats(analytics.stats("USD"), self.usd, 5)
+        self.assertIsNone(analytics.stats("XXX"))
+
+
+class CurrencyStatsRouteTests(unittest.TestCase):
+    """Набор тестов для маршрутов статистики курса."""
+
+    def setUp(self) -> None:
+        """Загружает курсы: день ленты попадает в историю и статистику."""
+        currencies_api.rates.refresh()
+
+    def test_stats_json(self) -> None:
+        """JSON содержит статистику по истории курса."""
+        status, _, body = get("/currency/usd/stats.json")
+        self.assertEqual(status, 200)
+        stats = json.loads(body)
+        self.assertEqual(stats["char_code"], "USD")
+        self.assertEqual(stats["date"], "2026-10-17")
+        self.assertEqual(stats["last"], 80.7513)
+        self.assertEqual(stats["window"], currencies_api.analytics.window)
+
+    def test_stats_page(self) -> None:
+        """HTML-страница показывает статистику; для неизвестной валюты — 404."""
+        status, _, body = get("/currency/USD/stats")
+        self.assertEqual(status, 200)
+        self.assertIn("Статистика курса USD", body.decode("utf-8"))
+        self.assertIn(b"80.7513", body)
+        self.assertEqual(get("/currency/XXX/stats")[0], 404)
+        self.assertEqual(get("/currency/XXX/stats.json")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
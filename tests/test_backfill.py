@@ -0,0 +1,217 @@
+"""Тесты для заполнения истории курсов архивом ЦБ РФ."""
+
+from __future__ import annotations
+
+import contextlib
+import datetime as dt
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from myapp import backfill as backfill_cli
+from myapp.utils.backfill import archive_url, backfill, load_day
+from myapp.utils.history import HistoryStore
+
+from benchmarks.stub_feed import DAILY_XML, StubFeedServer
+
+FIRST = dt.date(2026, 10, 1)
+
+
+def recorded_document(date: dt.date, usd: str) -> bytes:
+    """Возвращает записанный документ с датой date и курсом доллара usd."""
+    body = DAILY_XML.read_bytes()
+    body = body.replace(b'Date="17.10.2026"', f'Date="{date:%d.%m.%Y}"'.encode("ascii"))
+    return body.replace(b"<Value>80,7513</Value>", f"<Value>{usd}</Value>".encode("ascii"))
+
+
+class BackfillTests(unittest.TestCase):
+    """Набор тестов для backfill по каталогу записанных документов."""
+
+    def setUp(self) -> None:
+        """Записывает документы за 1–10 октября (4 и 5 — выходные)."""
+        self.directory = tempfile.mkdtemp(prefix="myapp-backfill-")
+        self.archive = os.path.join(self.directory, "archive")
+        os.mkdir(self.archive)
+        for offset in range(10):
+            day = FIRST + dt.timedelta(days=offset)
+            # В выходные архив повторяет курсы пятницы
+            date = dt.date(2026, 10, 3) if day.day in (4, 5) else day
+            with open(os.path.join(self.archive, f"{day.isoformat()}.xml"), "wb") as file:
+                file.write(recorded_document(date, f"{80 + date.day},5"))
+        self.store = HistoryStore(os.path.join(self.directory, "history"))
+
+    def tearDown(self) -> None:
+        """Закрывает историю и удаляет каталог."""
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_load_day(self) -> None:
+        """Документ разбирается; дня без файла нет."""
+        date, currencies = load_day(self.archive, dt.date(2026, 10, 4))
+        self.assertEqual(date, dt.date(2026, 10, 3))
+        self.assertEqual(len(currencies), 10)
+        self.assertIsNone(load_day(self.archive, dt.date(2026, 9, 30)))
+
+    def test_backfill_in_process_pool(self) -> None:
+        """Дни пишутся по порядку, повторы выходных отбрасываются."""
+        report = backfill(
+            self.store, dt.date(2026, 9, 28), dt.date(2026, 10, 10), self.archive, workers=2
+        )
+        self.assertEqual((report.requested, report.loaded, report.written), (13, 10, 8))
+        self.assertEqual(report.last_date, dt.date(2026, 10, 10))
+        series = self.store.series("USD")
+        self.assertEqual(
+            series.values.tolist(), [81.5, 82.5, 83.5, 86.5, 87.5, 88.5, 89.5, 90.5]
+        )
+        # Дни до первого сохранённого проверяются снова, но документов за них нет
+        report = backfill(
+            self.store, dt.date(2026, 9, 28), dt.date(2026, 10, 10), self.archive, workers=2
+        )
+        self.assertEqual((report.requested, report.written), (3, 0))
+
+    def test_resume_and_rerun(self) -> None:
+        """Прерванная загрузка продолжается; повторный запуск ничего не пишет."""
+        end = dt.date(2026, 10, 10)
+
+        def interrupt(report) -> None:
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            backfill(
+                self.store, FIRST, end, self.archive, workers=1, batch_days=3, progress=interrupt
+            )
+        self.assertEqual(self.store.last_date(), dt.date(2026, 10, 3))
+        report = backfill(self.store, FIRST, end, self.archive, workers=2, batch_days=3)
+        self.assertEqual((report.requested, report.written), (7, 5))
+        size = os.path.getsize(self.store.data_path)
+        report = backfill(self.store, FIRST, end, self.archive)
+        self.assertEqual((report.requested, report.written), (0, 0))
+        self.assertEqual(os.path.getsize(self.store.data_path), size)
+        self.assertEqual(len(self.store), 8)
+
+    def test_store_with_day_written_by_server(self) -> None:
+        """Архив добавляется в начало истории, в которую сервер уже записал сегодняшний день."""
+        _, currencies = load_day(self.archive, dt.date(2026, 10, 10))
+        self.store.append(dt.date(2026, 10, 17), currencies)
+        # Сервер держит свой экземпляр истории открытым
+        server_view = HistoryStore(self.store.directory)
+        self.addCleanup(server_view.close)
+        self.assertEqual(len(server_view), 1)
+        report = backfill(
+            self.store, FIRST, dt.date(2026, 10, 20), self.archive, workers=1, batch_days=3
+        )
+        self.assertEqual((report.written, report.last_date), (8, dt.date(2026, 10, 17)))
+        expected = [81.5, 82.5, 83.5, 86.5, 87.5, 88.5, 89.5, 90.5, 90.5]
+        self.assertEqual(server_view.series("USD").values.tolist(), expected)
+        self.assertEqual(server_view.first_date(), FIRST)
+        # Сервер дописывает следующий день уже в подменённые файлы
+        self.assertTrue(server_view.append(dt.date(2026, 10, 18), currencies))
+        self.assertEqual(len(self.store), 10)
+        self.assertFalse(os.path.exists(os.path.join(self.store.directory, "backfill")))
+        self.assertEqual(sorted(os.listdir(self.store.directory)), ["rates.dat", "rates.idx"])
+
+    def test_resume_before_first_day(self) -> None:
+        """Прерванная загрузка ранних дней продолжается с сохранённых в подкаталоге."""
+        _, currencies = load_day(self.archive, dt.date(2026, 10, 10))
+        self.store.append(dt.date(2026, 10, 17), currencies)
+        end = dt.date(2026, 10, 10)
+
+        def interrupt(report) -> None:
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            backfill(
+                self.store, FIRST, end, self.archive, workers=1, batch_days=3, progress=interrupt
+            )
+        self.assertEqual(len(self.store), 1)
+        report = backfill(self.store, FIRST, end, self.archive, workers=1, batch_days=3)
+        self.assertEqual((report.requested, report.written), (7, 5))
+        self.assertEqual(len(self.store), 9)
+        self.assertEqual(self.store.first_date(), FIRST)
+
+    def test_day_appended_during_backfill(self) -> None:
+        """Если во время загрузки дописан более поздний день, остаток не теряется молча."""
+        _, currencies = load_day(self.archive, dt.date(2026, 10, 10))
+
+        def append_today(report) -> None:
+            self.store.append(dt.date(2026, 10, 17), currencies)
+
+        with self.assertRaises(ValueError):
+            backfill(
+                self.store,
+                FIRST,
+                dt.date(2026, 10, 10),
+                self.archive,
+                workers=1,
+                batch_days=3,
+                progress=append_today,
+            )
+        dates = self.store.dates().astype(str).tolist()
+        self.assertEqual(dates, ["2026-10-01", "2026-10-02", "2026-10-03", "2026-10-17"])
+
+    def test_invalid_arguments(self) -> None:
+        """Перевёрнутый период и нулевой пакет не принимаются."""
+        with self.assertRaises(ValueError):
+            backfill(self.store, dt.date(2026, 10, 2), FIRST, self.archive)
+        with self.assertRaises(ValueError):
+            backfill(self.store, FIRST, FIRST, self.archive, batch_days=0)
+
+    def test_command_line(self) -> None:
+        """Точка входа командной строки заполняет историю в указанном каталоге."""
+        history = os.path.join(self.directory, "cli-history")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = backfill_cli.main([
+                "--from", "2026-10-01",
+                "--to", "2026-10-03",
+                "--source", self.archive,
+                "--history", history,
+                "--workers", "1",
+            ])
+        self.assertEqual(code, 0)
+        self.assertIn("записано дней: 3", output.getvalue())
+        store = HistoryStore(history)
+        try:
+            self.assertEqual(store.last_date(), dt.date(2026, 10, 3))
+        finally:
+            store.close()
+
+
+class ArchiveServerTests(unittest.TestCase):
+    """Набор тестов для загрузки через HTTP с локальной заглушки."""
+
+    def setUp(self) -> None:
+        """Запускает заглушку, которая на любой день отдаёт документ 17.10.2026."""
+        self.stub = StubFeedServer()
+        self.directory = tempfile.mkdtemp(prefix="myapp-backfill-")
+        self.store = HistoryStore(self.directory)
+
+    def tearDown(self) -> None:
+        """Останавливает заглушку и удаляет историю."""
+        self.stub.close()
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_archive_url(self) -> None:
+        """Дата передаётся параметром date_req или через подстановку {date}."""
+        day = dt.date(2024, 1, 9)
+        self.assertEqual(
+            archive_url("https://www.cbr.ru/scripts/XML_daily.asp", day),
+            "https://www.cbr.ru/scripts/XML_daily.asp?date_req=09/01/2024",
+        )
+        self.assertEqual(archive_url("http://x/{date}.xml", day), "http://x/09/01/2024.xml")
+
+    def test_backfill_from_server(self) -> None:
+        """Каждый день запрашивается один раз; одинаковые документы пишутся один раз."""
+        report = backfill(
+            self.store, dt.date(2026, 10, 15), dt.date(2026, 10, 18), self.stub.url, workers=2
+        )
+        self.assertEqual(self.stub.requests, 4)
+        self.assertEqual((report.loaded, report.written), (4, 1))
+        self.assertEqual(self.store.series("USD").values.tolist(), [80.7513])
+
+
+if __name__ == "__main__":
+    unittest.main()
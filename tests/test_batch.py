@@ -0,0 +1,147 @@
+"""Тесты для пакетной конвертации валют.
+
+Здесь проверяются потоковый разбор CSV и JSON, векторная
+конвертация и POST-маршрут '/convert'.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import unittest
+
+from myapp.models import Currency, CurrencyTable
+from myapp.utils.batch import BodyReader, convert_batch, iter_csv_rows, iter_json_rows
+from myapp.utils.conversion import RateMatrix
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import post
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class StreamingParseTests(unittest.TestCase):
+    """Набор тестов для iter_json_rows и iter_csv_rows."""
+
+    def test_json_rows_across_chunk_boundaries(self) -> None:
+        """Элементы, разрезанные границами порций, собираются правильно."""
+        data = json.dumps(
+            [["USD", "EUR", 12345.678], {"from": "EUR", "to": "RUB", "amount": 10}] * 20
+        ).encode("utf-8")
+        for chunk_size in (1, 3, 7, 64 * 1024):
+            rows = list(iter_json_rows(io.BytesIO(data), chunk_size=chunk_size))
+            self.assertEqual(len(rows), 40)
+            self.assertEqual(rows[0], ("USD", "EUR", 12345.678))
+            self.assertEqual(rows[1], ("EUR", "RUB", 10))
+
+    def test_json_empty_and_invalid(self) -> None:
+        """Пустой массив допустим, остальные ошибки вызывают ValueError."""
+        self.assertEqual(list(iter_json_rows(io.BytesIO(b" [ ] "))), [])
+        for body in (b"{}", b"[[1, 2]]", b'[["USD", "EUR", 1]', b"[1,,2]", b"[] x"):
+            with self.assertRaises(ValueError, msg=body):
+                list(iter_json_rows(io.BytesIO(body), chunk_size=2))
+
+    def test_csv_rows_skip_header(self) -> None:
+        """Строка-заголовок и пустые строки пропускаются."""
+        data = b"from,to,amount\r\nUSD,EUR,1.5\r\n\r\nEUR,USD,2\r\n"
+        self.assertEqual(
+            list(iter_csv_rows(io.BytesIO(data))),
+            [("USD", "EUR", "1.5"), ("EUR", "USD", "2")],
+        )
+        with self.assertRaises(ValueError):
+            list(iter_csv_rows(io.BytesIO(b"USD,EUR\r\n")))
+
+    def test_csv_errors_are_value_errors(self) -> None:
+        """Ошибки модуля csv (например, слишком длинное поле) превращаются в ValueError."""
+        field = b"x" * (csv.field_size_limit() + 1)
+        for body in (b"USD,EUR," + field + b"\r\n", b"\xff,EUR,1\r\n"):
+            with self.assertRaises(ValueError):
+                list(iter_csv_rows(io.BytesIO(body)))
+
+    def test_json_item_size_is_limited(self) -> None:
+        """Элемент длиннее max_item_size отвергается, не дожидаясь конца тела."""
+        data = b'[["USD", "EUR", 1], ["' + b"x" * 1000 + b'", "EUR", 1]]'
+        rows = iter_json_rows(io.BytesIO(data), chunk_size=16, max_item_size=100)
+        self.assertEqual(next(rows), ("USD", "EUR", 1))
+        with self.assertRaisesRegex(ValueError, "Строка 2"):
+            next(rows)
+
+    def test_body_reader_stops_at_length(self) -> None:
+        """BodyReader не читает данные за пределами тела запроса."""
+        source = io.BytesIO(b"[1]NEXT REQUEST")
+        reader = BodyReader(source, 3)
+        self.assertEqual(reader.read(), b"[1]")
+        self.assertEqual(source.read(), b"NEXT REQUEST")
+
+
+class ConvertBatchTests(unittest.TestCase):
+    """Набор тестов для convert_batch."""
+
+    def setUp(self) -> None:
+        """Строит матрицу кросс-курсов для двух валют и рубля."""
+        self.matrix = RateMatrix(CurrencyTable.from_currencies([
+            Currency(840, 840, "USD", "Доллар США", 80.0, 1),
+            Currency(978, 978, "EUR", "Евро", 96.0, 1),
+        ]))
+
+    def test_converts_all_rows(self) -> None:
+        """Все суммы переводятся по кросс-курсам."""
+        rows = [("USD", "RUB", 2), ("eur", "usd", "10"), ("RUB", "EUR", 96.0)] * 1000
+        batch = convert_batch(self.matrix, rows)
+        self.assertEqual(len(batch), 3000)
+        self.assertEqual(batch.results[:3].tolist(), [160.0, 12.0, 1.0])
+
+    def test_errors_report_row_number(self) -> None:
+        """Ошибка указывает номер проблемной строки."""
+        with self.assertRaisesRegex(ValueError, "Строка 2"):
+            convert_batch(self.matrix, [("USD", "EUR", 1), ("USD", "XXX", 1)])
+        with self.assertRaisesRegex(ValueError, "Строка 1"):
+            convert_batch(self.matrix, [("USD", "EUR", "abc")])
+        with self.assertRaisesRegex(ValueError, "Строка 3"):
+            convert_batch(self.matrix, [("USD", "EUR", 1)] * 2 + [("USD", "EUR", "nan")])
+
+
+class ConvertBatchRouteTests(unittest.TestCase):
+    """Набор тестов для POST '/convert'."""
+
+    def test_json_batch(self) -> None:
+        """JSON-пакет возвращает массив результатов в том же порядке."""
+        body = json.dumps([["USD", "RUB", 1], ["RUB", "USD", 80.7513]]).encode()
+        status, _, payload = post("/convert", body, "application/json")
+        self.assertEqual(status, 200)
+        results = json.loads(payload)["results"]
+        self.assertAlmostEqual(results[0], 80.7513)
+        self.assertAlmostEqual(results[1], 1.0)
+
+    def test_csv_batch(self) -> None:
+        """CSV-пакет возвращает CSV с колонкой result."""
+        status, _, payload = post("/convert", b"USD,RUB,2\nEUR,RUB,1\n", "text/csv")
+        self.assertEqual(status, 200)
+        lines = payload.decode().splitlines()
+        self.assertEqual(lines[0], "from,to,amount,result")
+        self.assertEqual(lines[1].split(",")[:2], ["USD", "RUB"])
+        self.assertAlmostEqual(float(lines[1].split(",")[3]), 161.5026)
+        self.assertEqual(len(lines), 3)
+
+    def test_bad_requests(self) -> None:
+        """Неверный тип тела — 415, ошибка в данных — 400, другой путь — 404."""
+        self.assertEqual(post("/convert", b"x", "text/plain")[0], 415)
+        self.assertEqual(post("/convert", b"USD,XXX,1\n", "text/csv")[0], 400)
+        huge = b"x" * (csv.field_size_limit() + 1)
+        self.assertEqual(post("/convert", b"USD,EUR," + huge + b"\n", "text/csv")[0], 400)
+        huge_item = b'[["' + huge + b'", "EUR", 1]]'
+        self.assertEqual(post("/convert", huge_item, "application/json")[0], 400)
+        self.assertEqual(post("/other", b"", "text/csv")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
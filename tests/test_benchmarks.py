@@ -0,0 +1,86 @@
+"""Тесты для средств бенчмарков (benchmarks/)."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from benchmarks import load
+from benchmarks.harness import compare, load_report, measure, percentile, save_report
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class HarnessTests(unittest.TestCase):
+    """Набор тестов для benchmarks.harness."""
+
+    def test_percentile(self) -> None:
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+        with self.assertRaises(ValueError):
+            percentile([], 0.5)
+
+    def test_compare_respects_direction(self) -> None:
+        """Регрессия — рост времени или падение пропускной способности сверх порога."""
+        baseline = {
+            "time": {"value": 10.0, "unit": "us", "better": "lower"},
+            "rps": {"value": 1000.0, "unit": "req/s", "better": "higher"},
+            "gone": {"value": 1.0, "unit": "us", "better": "lower"},
+        }
+        better = {
+            "time": {"value": 8.0, "unit": "us", "better": "lower"},
+            "rps": {"value": 1200.0, "unit": "req/s", "better": "higher"},
+        }
+        worse = {
+            "time": {"value": 12.0, "unit": "us", "better": "lower"},
+            "rps": {"value": 800.0, "unit": "req/s", "better": "higher"},
+        }
+        self.assertEqual(compare(baseline, better, 0.1), [])
+        regressions = compare(baseline, worse, 0.1)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("rps:"))
+        self.assertEqual(compare(baseline, worse, 0.5), [])
+        with self.assertRaises(ValueError):
+            compare(baseline, worse, -1)
+
+    def test_measure_and_report_roundtrip(self) -> None:
+        """measure возвращает время вызова; отчёт сохраняется и читается из JSON."""
+        result = measure(lambda: sum(range(10)), min_time=0.01, repeat=2)
+        self.assertEqual((result["unit"], result["better"]), ("us", "lower"))
+        self.assertGreater(result["value"], 0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.json")
+            save_report({"results": {"sum": result}}, path)
+            self.assertEqual(load_report(path)["results"]["sum"], result)
+
+
+class LoadDriverTests(unittest.TestCase):
+    """Набор тестов для нагрузочного прогона."""
+
+    def test_reports_throughput_and_latency(self) -> None:
+        """Для маршрута считаются пропускная способность, p50 и p99."""
+        results = load.run(routes=("/currency/USD",), duration=0.2, concurrency=2)
+        throughput = results["load./currency/USD.throughput"]
+        self.assertGreater(throughput["requests"], 0)
+        self.assertEqual(throughput["errors"], 0)
+        self.assertLessEqual(
+            results["load./currency/USD.p50"]["value"], results["load./currency/USD.p99"]["value"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
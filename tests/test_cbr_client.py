@@ -0,0 +1,88 @@
+"""Тесты для клиента ленты курсов CbrClient.
+
+Клиент проверяется на локальной заглушке, которая отдаёт
+записанный XML-документ ЦБ РФ.
+"""
+
+from __future__ import annotations
+
+import unittest
+
+import requests
+
+from myapp.models import Currency
+from myapp.utils.cbr_client import CbrClient, parse_daily_xml
+
+from benchmarks.stub_feed import DAILY_XML, StubFeedServer
+
+
+class ParseDailyXmlTests(unittest.TestCase):
+    """Набор тестов для функции parse_daily_xml."""
+
+    def test_parses_recorded_document(self) -> None:
+        """Записанный документ должен превращаться в список валют."""
+        date, currencies = parse_daily_xml(DAILY_XML.read_bytes())
+        self.assertEqual(date, "17.10.2026")
+        self.assertEqual(len(currencies), 10)
+        by_code = {c.char_code: c for c in currencies}
+        self.assertEqual(by_code["USD"].num_code, 840)
+        self.assertAlmostEqual(by_code["USD"].value, 80.7513)
+        self.assertEqual(by_code["JPY"].nominal, 100)
+        self.assertEqual(by_code["AUD"].num_code, 36)
+        self.assertEqual(by_code["EUR"].name, "Евро")
+
+    def test_invalid_document_raises(self) -> None:
+        """Некорректный XML должен вызывать ValueError."""
+        with self.assertRaises(ValueError):
+            parse_daily_xml(b"<html>")
+
+
+class CbrClientTests(unittest.TestCase):
+    """Набор тестов для CbrClient."""
+
+    def setUp(self) -> None:
+        """Запускает заглушку ленты и создаёт клиента."""
+        self.stub = StubFeedServer()
+        self.client = CbrClient(url=self.stub.url)
+
+    def tearDown(self) -> None:
+        """Закрывает клиента и заглушку."""
+        self.client.close()
+        self.stub.close()
+
+    def test_fetch_returns_currencies(self) -> None:
+        """Первая загрузка возвращает валюты и дату курсов."""
+        currencies = self.client.fetch()
+        self.assertTrue(all(isinstance(c, Currency) for c in currencies))
+        self.assertEqual(self.client.date, "17.10.2026")
+
+    def test_not_modified_skips_parsing(self) -> None:
+        """Повторная загрузка получает 304 и возвращает тот же список."""
+        first = self.client.fetch()
+        second = self.client.fetch()
+        self.assertIs(first, second)
+        self.assertEqual(self.stub.requests, 2)
+        self.assertEqual(self.stub.not_modified, 1)
+        self.assertEqual(self.client.not_modified, 1)
+
+    def test_changed_feed_is_reparsed(self) -> None:
+        """Изменённый документ должен загружаться заново."""
+        first = self.client.fetch()
+        body = DAILY_XML.read_bytes().replace(b"80,7513", b"81,0000")
+        self.stub.set_body(body)
+        second = self.client.fetch()
+        self.assertIsNot(first, second)
+        usd = next(c for c in second if c.char_code == "USD")
+        self.assertAlmostEqual(usd.value, 81.0)
+
+    def test_unreachable_feed_raises(self) -> None:
+        """Недоступная лента должна вызывать ошибку requests."""
+        self.stub.close()
+        client = CbrClient(url=self.stub.url, connect_timeout=0.5, read_timeout=0.5)
+        with self.assertRaises(requests.RequestException):
+            client.fetch()
+        self.stub = StubFeedServer()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Тесты для потокового разбора документа ValCurs.
+
+Здесь проверяется, что ValCursReader выдаёт валюты по мере
+чтения источника и не накапливает разобранные элементы.
+"""
+
+from __future__ import annotations
+
+import io
+import unittest
+
+from myapp.models import Currency
+from myapp.utils.cbr_parser import ValCursReader, parse_currencies
+
+from benchmarks.stub_feed import DAILY_XML
+
+
+def _archive_document(count: int) -> bytes:
+    """Собирает документ ValCurs с count записями Valute."""
+    parts = ['<?xml version="1.0" encoding="windows-1251"?>',
+             '<ValCurs Date="01.02.2010" name="Foreign Currency Market">']
+    for number in range(1, count + 1):
+        parts.append(
+            f'<Valute ID="R{number:05d}"><NumCode>{number}</NumCode>'
+            f"<CharCode>C{number:05d}</CharCode><Nominal>1</Nominal>"
+            f"<Name>Валюта {number}</Name><Value>{number},5</Value></Valute>"
+        )
+    parts.append("</ValCurs>")
+    return "\n".join(parts).encode("cp1251")
+
+
+class CountingStream(io.BytesIO):
+    """Поток байтов, запоминающий, сколько данных из него прочитано."""
+
+    def __init__(self, data: bytes) -> None:
+        """Создаёт поток над data."""
+        super().__init__(data)
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Читает не больше size байтов и учитывает прочитанное."""
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+class ValCursReaderTests(unittest.TestCase):
+    """Набор тестов для ValCursReader и parse_currencies."""
+
+    def test_parses_recorded_document(self) -> None:
+        """Записанный документ ЦБ РФ разбирается в список валют."""
+        with open(DAILY_XML, "rb") as source:
+            date, currencies = parse_currencies(source)
+        self.assertEqual(date, "17.10.2026")
+        self.assertEqual(len(currencies), 10)
+        self.assertTrue(all(isinstance(c, Currency) for c in currencies))
+        try_rate = next(c for c in currencies if c.char_code == "TRY")
+        self.assertEqual(try_rate.nominal, 10)
+        self.assertAlmostEqual(try_rate.value, 19.335)
+
+    def test_yields_before_stream_is_exhausted(self) -> None:
+        """Первая валюта должна появляться до того, как прочитан весь документ."""
+        data = _archive_document(5000)
+        stream = CountingStream(data)
+        first = next(iter(ValCursReader(stream)))
+        self.assertEqual(first.char_code, "C00001")
+        self.assertLess(stream.consumed, len(data))
+
+    def test_large_archive_document(self) -> None:
+        """Документ с тысячами записей разбирается полностью."""
+        reader = ValCursReader(io.BytesIO(_archive_document(5000)))
+        currencies = list(reader)
+        self.assertEqual(len(currencies), 5000)
+        self.assertEqual(reader.date, "01.02.2010")
+        self.assertAlmostEqual(currencies[-1].value, 5000.5)
+
+    def test_wrong_root_raises(self) -> None:
+        """Документ без корня ValCurs должен вызывать ValueError."""
+        with self.assertRaises(ValueError):
+            parse_currencies(io.BytesIO(b"<html><body/></html>"))
+
+    def test_truncated_document_raises(self) -> None:
+        """Оборванный документ должен вызывать ValueError."""
+        data = DAILY_XML.read_bytes()[:-200]
+        with self.assertRaises(ValueError):
+            parse_currencies(io.BytesIO(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Тесты для сжатия ответов (Accept-Encoding)."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from myapp.utils.compression import MIN_COMPRESS_SIZE, compress, negotiate, zstandard
+from myapp.utils.page_cache import CachedPage
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get, request
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class NegotiationTests(unittest.TestCase):
+    """Набор тестов для negotiate и compress."""
+
+    def test_negotiate(self) -> None:
+        """Учитываются q-значения и звёздочка."""
+        self.assertEqual(negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate("deflate;q=1, gzip;q=0.5"), "gzip")
+        self.assertIsNone(negotiate("gzip;q=0"))
+        self.assertIsNone(negotiate("identity"))
+        self.assertIsNone(negotiate(None))
+        self.assertIn(negotiate("*"), ("br", "zstd", "gzip"))
+        self.assertIsNone(negotiate("*;q=0"))
+
+    def test_compress_roundtrip(self) -> None:
+        """gzip-сжатие обратимо, неизвестный способ вызывает ValueError."""
+        body = b"<tr><td>USD</td></tr>" * 100
+        self.assertEqual(gzip.decompress(compress(body, "gzip")), body)
+        with self.assertRaises(ValueError):
+            compress(body, "lzma")
+
+    @unittest.skipUnless(zstandard is not None, "нужен модуль zstandard")
+    def test_zstd_from_many_threads(self) -> None:
+        """zstd-сжатие из нескольких потоков одновременно даёт верные тела."""
+        bodies = [f"<tr><td>{n}</td></tr>".encode() * 5000 for n in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            compressed = list(executor.map(lambda body: compress(body, "zstd"), bodies))
+        decompressor = zstandard.ZstdDecompressor()
+        for body, data in zip(bodies, compressed):
+            self.assertEqual(decompressor.decompress(data), body)
+
+    def test_variant_compressed_once(self) -> None:
+        """Сжатый вариант страницы вычисляется один раз, мелкие тела не сжимаются."""
+        page = CachedPage(b"x" * MIN_COMPRESS_SIZE)
+        encoding, first = page.encoded("gzip")
+        self.assertEqual(encoding, "gzip")
+        self.assertIs(page.encoded("gzip")[1], first)
+        self.assertNotEqual(page.etag_for("gzip"), page.etag)
+        self.assertTrue(page.not_modified(page.etag_for("gzip"), encoding="gzip"))
+        self.assertFalse(page.not_modified(page.etag_for("gzip")))
+        self.assertFalse(page.not_modified(page.etag, encoding="gzip"))
+        self.assertEqual(CachedPage(b"tiny").encoded("gzip"), (None, b"tiny"))
+
+
+class CompressedRouteTests(unittest.TestCase):
+    """Набор тестов для сжатых ответов маршрутов."""
+
+    def test_currencies_page_gzip(self) -> None:
+        """Страница валют отдаётся в gzip и совпадает с несжатой."""
+        _, plain_headers, plain = get("/currencies")
+        _, headers, body = get("/currencies", "Accept-Encoding: gzip\r\n")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertNotIn("Content-Encoding", plain_headers)
+
+    def test_etag_of_other_encoding_is_not_304(self) -> None:
+        """ETag gzip-варианта не даёт 304 клиенту, который не принимает gzip."""
+        _, headers, _ = get("/currencies", "Accept-Encoding: gzip\r\n")
+        status, plain_headers, body = get("/currencies", f"If-None-Match: {headers['ETag']}\r\n")
+        self.assertEqual(status, 200)
+        self.assertNotIn("Content-Encoding", plain_headers)
+        self.assertIn(b"<html", body.lower())
+        status, _, _ = get(
+            "/currencies",
+            f"Accept-Encoding: gzip\r\nIf-None-Match: {headers['ETag']}\r\n",
+        )
+        self.assertEqual(status, 304)
+
+    def test_batch_json_gzip(self) -> None:
+        """Большой JSON-ответ пакетной конвертации сжимается."""
+        payload = json.dumps([["USD", "EUR", 1]] * 200).encode()
+        raw = (
+            b"POST /convert HTTP/1.1\r\nContent-Type: application/json\r\n"
+            b"Accept-Encoding: gzip\r\nContent-Length: "
+            + str(len(payload)).encode() + b"\r\n\r\n" + payload
+        )
+        _, headers, body = request(raw)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(body))["results"]), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Тесты для конвертации валют.
+
+Здесь проверяются матрица кросс-курсов RateMatrix
+и маршрут '/convert'.
+"""
+
+from __future__ import annotations
+
+import unittest
+
+from myapp.models import Currency, CurrencyTable
+from myapp.utils.conversion import RateMatrix
+from myapp.utils.currencies_api import get_currency_table, get_rate_matrix
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get_json
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class RateMatrixTests(unittest.TestCase):
+    """Набор тестов для RateMatrix."""
+
+    def setUp(self) -> None:
+        """Строит матрицу для трёх валют (рубль добавляется автоматически)."""
+        self.matrix = RateMatrix(CurrencyTable.from_currencies([
+            Currency(840, 840, "USD", "Доллар США", 80.0, 1),
+            Currency(978, 978, "EUR", "Евро", 96.0, 1),
+            Currency(392, 392, "JPY", "Японских иен", 50.0, 100),
+        ]))
+
+    def test_base_currency_is_added(self) -> None:
+        """Рубль присутствует в матрице с курсом 1."""
+        self.assertIn("RUB", self.matrix)
+        self.assertAlmostEqual(self.matrix.rate("USD", "RUB"), 80.0)
+        self.assertAlmostEqual(self.matrix.rate("RUB", "RUB"), 1.0)
+
+    def test_cross_rates(self) -> None:
+        """Кросс-курсы учитывают номинал."""
+        self.assertAlmostEqual(self.matrix.rate("EUR", "USD"), 1.2)
+        self.assertAlmostEqual(self.matrix.convert("USD", "JPY", 10), 1600.0)
+        self.assertAlmostEqual(self.matrix.convert("JPY", "RUB", 100), 50.0)
+
+    def test_unknown_currency_raises(self) -> None:
+        """Неизвестная валюта вызывает KeyError, нечисловая сумма — ValueError."""
+        with self.assertRaises(KeyError):
+            self.matrix.convert("USD", "XXX", 1)
+        with self.assertRaises(ValueError):
+            self.matrix.convert("USD", "EUR", float("nan"))
+
+    def test_matrix_is_reused_for_same_snapshot(self) -> None:
+        """Матрица перестраивается только для новой таблицы курсов."""
+        first = get_rate_matrix()
+        self.assertIs(first, get_rate_matrix())
+        self.assertEqual(first.codes[:-1], get_currency_table().char_codes)
+
+
+class ConvertRouteTests(unittest.TestCase):
+    """Набор тестов для маршрута '/convert'."""
+
+    def test_convert_ok(self) -> None:
+        """Конвертация по курсам из ленты."""
+        status, data = get_json("/convert?from=usd&to=RUB&amount=2")
+        self.assertEqual(status, 200)
+        self.assertEqual(data["from"], "USD")
+        self.assertAlmostEqual(data["result"], 2 * 80.7513)
+
+    def test_missing_parameters(self) -> None:
+        """Без from/to возвращается 400."""
+        status, data = get_json("/convert?from=USD")
+        self.assertEqual(status, 400)
+        self.assertIn("error", data)
+
+    def test_bad_amount_and_unknown_currency(self) -> None:
+        """Нечисловая сумма — 400, неизвестная валюта — 404."""
+        self.assertEqual(get_json("/convert?from=USD&to=EUR&amount=abc")[0], 400)
+        self.assertEqual(get_json("/convert?from=USD&to=EUR&amount=inf")[0], 400)
+        self.assertEqual(get_json("/convert?from=USD&to=XXX")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
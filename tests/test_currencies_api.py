@@ -1,16 +1,31 @@
 """Тесты для функции get_currencies.
 
 Здесь проверяется, что функция возвращает
-непустой список объектов Currency с корректными значениями.
+непустой список объектов Currency с корректными значениями,
+а пока курсов нет, обработчики отвечают 503, не обращаясь к ленте.
 """
 
 from __future__ import annotations
 
 import unittest
 
-from myapp.utils.currencies_api import get_currencies
+from myapp.utils import currencies_api
+from myapp.utils.currencies_api import RatesUnavailable, get_currencies
 from myapp.models import Currency
 
+from benchmarks.stub_feed import get_active_stub, install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
 
 class GetCurrenciesTests(unittest.TestCase):
     """Набор тестов для функции get_currencies."""
@@ -37,5 +52,58 @@ class GetCurrenciesTests(unittest.TestCase):
             self.assertTrue(c.char_code.strip())
 
 
+class RatesMetricsTests(unittest.TestCase):
+    """Набор тестов для метрик обновления курсов."""
+
+    def test_refreshes_and_failures_are_exported(self) -> None:
+        """Успешные и неудачные обновления учитываются в метриках и видны в '/metrics'."""
+        stub = get_active_stub()
+        refreshes = currencies_api.RATES_REFRESHES.value()
+        errors = currencies_api.RATES_REFRESH_ERRORS.value()
+        body = stub.body
+        stub.set_body(b"not a feed")
+        try:
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    currencies_api.rates.refresh()
+        finally:
+            stub.set_body(body)
+        self.assertEqual(currencies_api.RATES_REFRESH_ERRORS.value(), errors + 2)
+        self.assertEqual(currencies_api.RATES_REFRESH_FAILURES.value(), 2)
+        text = get("/metrics")[2].decode("utf-8")
+        self.assertIn("myapp_rates_refresh_failures 2", text)
+        currencies_api.rates.refresh()
+        self.assertEqual(currencies_api.RATES_REFRESHES.value(), refreshes + 1)
+        self.assertEqual(currencies_api.RATES_REFRESH_FAILURES.value(), 0)
+        self.assertEqual(currencies_api.rates.failures, 0)
+
+
+class RatesUnavailableTests(unittest.TestCase):
+    """Набор тестов для ответа 503, пока курсы не загружены."""
+
+    def setUp(self) -> None:
+        """Удаляет текущий снимок курсов, как будто первая загрузка не удалась."""
+        currencies_api.rates.reset()
+
+    def tearDown(self) -> None:
+        """Загружает курсы заново для остальных тестов."""
+        currencies_api.rates.refresh()
+
+    def test_get_currencies_raises(self) -> None:
+        """get_currencies не ждёт ленту, а сразу сообщает, что курсов нет."""
+        with self.assertRaises(RatesUnavailable):
+            get_currencies()
+
+    def test_handlers_answer_503(self) -> None:
+        """Обработчики, которым нужны курсы, отвечают 503 и не обращаются к ленте."""
+        stub = get_active_stub()
+        requests_before = stub.requests
+        for path in ("/user?id=1", "/currency/USD", "/convert?from=USD&to=EUR"):
+            status, headers, _ = get(path)
+            self.assertEqual(status, 503, path)
+            self.assertIn("Retry-After", headers)
+        self.assertEqual(stub.requests, requests_before)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
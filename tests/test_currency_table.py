@@ -0,0 +1,97 @@
+"""Тесты для столбцовой таблицы валют CurrencyTable."""
+
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from myapp.models import Currency, CurrencyTable
+from myapp.utils.currencies_api import get_currencies, get_currency_table
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+def _sample_table() -> CurrencyTable:
+    """Создаёт небольшую таблицу из трёх валют."""
+    return CurrencyTable.from_currencies([
+        Currency(840, 840, "USD", "Доллар США", 80.0, 1),
+        Currency(978, 978, "EUR", "Евро", 94.0, 1),
+        Currency(392, 392, "JPY", "Японских иен", 53.0, 100),
+    ])
+
+
+class CurrencyTableTests(unittest.TestCase):
+    """Набор тестов для CurrencyTable."""
+
+    def test_lookup_by_char_code(self) -> None:
+        """Поиск строки по символьному коду."""
+        table = _sample_table()
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.row_of("EUR"), 1)
+        self.assertIn("JPY", table)
+        self.assertNotIn("GBP", table)
+        self.assertEqual(table.get("USD").name, "Доллар США")
+        self.assertIsNone(table.get("GBP"))
+        with self.assertRaises(KeyError):
+            table.row_of("GBP")
+
+    def test_unit_rates_are_vectorized(self) -> None:
+        """Курсы за единицу считаются для всех валют сразу."""
+        table = _sample_table()
+        np.testing.assert_allclose(table.unit_rates(), [80.0, 94.0, 0.53])
+        self.assertAlmostEqual(table.unit_rate("JPY"), 0.53)
+        self.assertFalse(table.unit_rates().flags.writeable)
+
+    def test_slice_shares_arrays(self) -> None:
+        """Срез ссылается на те же массивы и имеет собственный индекс."""
+        table = _sample_table()
+        part = table[1:]
+        self.assertEqual(len(part), 2)
+        self.assertTrue(np.shares_memory(part.values, table.values))
+        self.assertEqual(part.row_of("JPY"), 1)
+
+    def test_rows_as_currency_objects(self) -> None:
+        """Строки таблицы доступны в виде объектов Currency."""
+        table = _sample_table()
+        currencies = table.to_currencies()
+        self.assertEqual([c.char_code for c in currencies], ["USD", "EUR", "JPY"])
+        self.assertIsInstance(table[2], Currency)
+        self.assertEqual(table[2].nominal, 100)
+
+    def test_invalid_columns_raise(self) -> None:
+        """Разная длина столбцов и повтор кодов вызывают ValueError."""
+        with self.assertRaises(ValueError):
+            CurrencyTable([1], [1], ["USD", "EUR"], ["a", "b"], [1.0, 2.0], [1, 1])
+        with self.assertRaises(ValueError):
+            CurrencyTable([1, 2], [1, 2], ["USD", "USD"], ["a", "b"], [1.0, 2.0], [1, 1])
+        with self.assertRaises(ValueError):
+            CurrencyTable([1], [1], ["USD"], ["a"], [1.0], [0])
+
+
+class GetCurrencyTableTests(unittest.TestCase):
+    """Набор тестов для функции get_currency_table."""
+
+    def test_table_matches_currency_list(self) -> None:
+        """Таблица содержит те же валюты, что и get_currencies."""
+        table = get_currency_table()
+        codes = [c.char_code for c in get_currencies()]
+        self.assertEqual(table.char_codes, codes)
+
+    def test_table_is_reused_for_same_snapshot(self) -> None:
+        """Пока список валют не изменился, возвращается та же таблица."""
+        self.assertIs(get_currency_table(), get_currency_table())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+"""Тесты для истории курсов.
+
+Здесь проверяются хранилище HistoryStore и маршрут
+'/currency/<code>?from=...&to=...'.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import shutil
+import tempfile
+import unittest
+from typing import List
+
+import numpy as np
+
+from myapp.models import Currency
+from myapp.utils import currencies_api
+from myapp.utils.history import HEADER_SIZE, RECORD, HistoryStore
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get_json
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+def make_day(usd: float) -> List[Currency]:
+    """Возвращает курсы одного дня (не по алфавиту) с курсом доллара usd."""
+    return [
+        Currency(1, 840, "USD", "Доллар США", usd, 1),
+        Currency(2, 398, "KZT", "Казахстанский тенге", 16.7, 100),
+        Currency(3, 978, "EUR", "Евро", usd + 10, 1),
+    ]
+
+
+class HistoryStoreTests(unittest.TestCase):
+    """Набор тестов для HistoryStore."""
+
+    def setUp(self) -> None:
+        """Создаёт хранилище во временном каталоге."""
+        self.directory = tempfile.mkdtemp(prefix="myapp-history-")
+        self.store = HistoryStore(self.directory)
+        self.first = dt.date(2026, 10, 1)
+
+    def tearDown(self) -> None:
+        """Закрывает хранилище и удаляет каталог."""
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def fill(self, days: int) -> None:
+        """Записывает days дней подряд с курсом доллара 80 + номер дня."""
+        self.store.append_many(
+            (self.first + dt.timedelta(days=number), make_day(80.0 + number))
+            for number in range(days)
+        )
+
+    def test_empty_store(self) -> None:
+        """В пустом хранилище нет дней, а ряд пуст."""
+        self.assertEqual(len(self.store), 0)
+        self.assertIsNone(self.store.last_date())
+        self.assertEqual(len(self.store.series("USD")), 0)
+
+    def test_series_for_range(self) -> None:
+        """Ряд содержит только дни периода и только нужную валюту."""
+        self.fill(10)
+        series = self.store.series("USD", dt.date(2026, 10, 3), dt.date(2026, 10, 5))
+        self.assertEqual(
+            series.to_json()["dates"], ["2026-10-03", "2026-10-04", "2026-10-05"]
+        )
+        self.assertEqual(series.values.tolist(), [82.0, 83.0, 84.0])
+        kzt = self.store.series("KZT", end=dt.date(2026, 10, 2))
+        np.testing.assert_allclose(kzt.unit_rates(), [0.167, 0.167])
+        self.assertEqual(len(self.store.series("USD", dt.date(2027, 1, 1))), 0)
+        with self.assertRaises(ValueError):
+            self.store.series("USD", dt.date(2026, 10, 5), dt.date(2026, 10, 3))
+
+    def test_append_is_idempotent(self) -> None:
+        """Повторная запись дня ничего не меняет."""
+        self.fill(3)
+        size = os.path.getsize(self.store.data_path)
+        self.assertFalse(self.store.append(self.first, make_day(1.0)))
+        self.assertEqual(self.store.append_many([(self.first, make_day(1.0))]), 0)
+        self.assertEqual(os.path.getsize(self.store.data_path), size)
+        self.assertTrue(self.store.append(dt.date(2026, 10, 4), make_day(90.0)))
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.first_date(), self.first)
+        self.assertEqual(self.store.last_date(), dt.date(2026, 10, 4))
+
+    def test_days_must_increase(self) -> None:
+        """Дни пакета должны идти по возрастанию."""
+        later = self.first + dt.timedelta(days=1)
+        with self.assertRaises(ValueError):
+            self.store.append_many([(later, make_day(80.0)), (self.first, make_day(80.0))])
+
+    def test_records_are_fixed_width(self) -> None:
+        """Файл записей — заголовок и по записи на валюту в день."""
+        self.fill(2)
+        size = os.path.getsize(self.store.data_path)
+        self.assertEqual(size, HEADER_SIZE + 6 * RECORD.itemsize)
+
+    def test_other_instance_sees_new_days(self) -> None:
+        """Читатель с тем же каталогом замечает дописанные дни."""
+        reader = HistoryStore(self.directory)
+        try:
+            self.fill(2)
+            self.assertEqual(len(reader.series("EUR")), 2)
+            self.store.append(dt.date(2026, 10, 3), make_day(85.0))
+            self.assertEqual(reader.series("USD").values.tolist(), [80.0, 81.0, 85.0])
+        finally:
+            reader.close()
+
+    def test_uncommitted_tail_is_discarded(self) -> None:
+        """Записи без строки индекса (прерванная запись) отбрасываются."""
+        self.fill(1)
+        with open(self.store.data_path, "ab") as data:
+            data.write(np.zeros(5, dtype=RECORD).tobytes())
+        self.store.append(dt.date(2026, 10, 2), make_day(81.0))
+        self.assertEqual(
+            os.path.getsize(self.store.data_path), HEADER_SIZE + 6 * RECORD.itemsize
+        )
+        self.assertEqual(self.store.series("USD").values.tolist(), [80.0, 81.0])
+
+    def test_prepend_adds_only_earlier_days(self) -> None:
+        """prepend добавляет только дни раньше первого; читатель видит новые файлы."""
+        reader = HistoryStore(self.directory)
+        older = HistoryStore(os.path.join(self.directory, "older"))
+        try:
+            self.fill(2)
+            self.assertEqual(len(reader), 2)
+            older.append_many(
+                (self.first + dt.timedelta(days=offset), make_day(70.0 + offset))
+                for offset in (-2, -1, 0)
+            )
+            self.assertEqual(self.store.prepend(older), 2)
+            self.assertEqual(self.store.prepend(older), 0)
+            self.assertEqual(reader.series("USD").values.tolist(), [68.0, 69.0, 80.0, 81.0])
+            self.assertTrue(reader.append(dt.date(2026, 10, 3), make_day(85.0)))
+            self.assertEqual(len(self.store), 5)
+            self.assertEqual(self.store.first_date(), dt.date(2026, 9, 29))
+        finally:
+            reader.close()
+            older.close()
+
+    def test_foreign_file_is_rejected(self) -> None:
+        """Чужой файл в каталоге истории не принимается за историю."""
+        directory = tempfile.mkdtemp(prefix="myapp-history-")
+        try:
+            with open(os.path.join(directory, "rates.dat"), "wb") as data:
+                data.write(b"not a history file")
+            with self.assertRaises(ValueError):
+                len(HistoryStore(directory))
+        finally:
+            shutil.rmtree(directory)
+
+
+class CurrencyHistoryRouteTests(unittest.TestCase):
+    """Набор тестов для маршрута '/currency/<code>?from=...&to=...'."""
+
+    def setUp(self) -> None:
+        """Загружает курсы: снимок записывает день ленты в историю."""
+        currencies_api.rates.refresh()
+
+    def test_history_for_period(self) -> None:
+        """История за день ленты содержит курс из ленты."""
+        status, data = get_json("/currency/usd?from=2026-10-17&to=2026-10-17")
+        self.assertEqual(status, 200)
+        self.assertEqual(data["char_code"], "USD")
+        self.assertEqual(data["dates"], ["2026-10-17"])
+        self.assertEqual(data["values"], [80.7513])
+        self.assertEqual(data["nominals"], [1])
+        status, data = get_json("/currency/USD?to=2026-10-16")
+        self.assertEqual((status, data["dates"]), (200, []))
+
+    def test_bad_parameters(self) -> None:
+        """Неверная дата — 400, неизвестная валюта — 404."""
+        self.assertEqual(get_json("/currency/USD?from=17.10.2026")[0], 400)
+        self.assertEqual(get_json("/currency/USD?from=2026-10-18&to=2026-10-17")[0], 400)
+        self.assertEqual(get_json("/currency/XXX?from=2026-10-17")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+"""Тесты для метрик Prometheus и маршрута '/metrics'."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from myapp.utils.metrics import CountingWriter, MetricsRegistry, _Metric
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+def sample(text: str, name: str) -> float:
+    """Возвращает значение ряда name (с метками) из текстового формата."""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"Ряд {name} не найден.")
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    """Набор тестов для MetricsRegistry и метрик."""
+
+    def test_counter_and_gauge_lines(self) -> None:
+        """Счётчик и показатель выводятся с HELP, TYPE и метками."""
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Hits.", ("route",))
+        gauge = registry.gauge("busy", "Busy.")
+        counter.inc(("/",))
+        counter.inc(("/",), 2)
+        counter.inc(('a"b',))
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        text = registry.render()
+        self.assertIn("# TYPE hits_total counter", text)
+        self.assertIn('hits_total{route="/"} 3', text)
+        self.assertIn('hits_total{route="a\\"b"} 1', text)
+        self.assertIn("# TYPE busy gauge", text)
+        self.assertEqual(sample(text, "busy"), 1)
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        """Корзины гистограммы накопительные, _count совпадает с +Inf."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value)
+        text = registry.render()
+        self.assertEqual(sample(text, 'latency_bucket{le="0.1"}'), 1)
+        self.assertEqual(sample(text, 'latency_bucket{le="1"}'), 3)
+        self.assertEqual(sample(text, 'latency_bucket{le="+Inf"}'), 4)
+        self.assertEqual(sample(text, "latency_count"), 4)
+        self.assertAlmostEqual(sample(text, "latency_sum"), 6.25)
+        self.assertEqual(histogram.count(), 4)
+
+    def test_duplicate_name_raises(self) -> None:
+        """Повторная регистрация имени запрещена."""
+        registry = MetricsRegistry()
+        registry.counter("x", "X.")
+        with self.assertRaises(ValueError):
+            registry.gauge("x", "X.")
+
+    def test_merges_snapshots_of_processes(self) -> None:
+        """Снимки других процессов складываются; показатели мёртвых процессов отбрасываются."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory)
+            counter = registry.counter("hits_total", "Hits.", ("route",))
+            gauge = registry.gauge("busy", "Busy.")
+            histogram = registry.histogram("latency", "Latency.", buckets=(1.0,))
+            counter.inc(("/",))
+            gauge.inc()
+            histogram.observe(0.5)
+            # Снимок процесса, который уже завершился
+            dead = {
+                "pid": 2 ** 22 + 1,
+                "metrics": {
+                    "hits_total": [[["/"], 4]],
+                    "busy": [[[], 7]],
+                    "latency": [[[], [[1, 1], 2.5]]],
+                },
+            }
+            with open(os.path.join(directory, "metrics-1.json"), "w", encoding="utf-8") as file:
+                json.dump(dead, file)
+            text = registry.render()
+        self.assertEqual(sample(text, 'hits_total{route="/"}'), 5)
+        self.assertEqual(sample(text, "busy"), 1)
+        self.assertEqual(sample(text, 'latency_bucket{le="1"}'), 2)
+        self.assertEqual(sample(text, "latency_count"), 3)
+
+    def test_dumps_periodically_and_on_stop(self) -> None:
+        """Поток сохраняет снимок без запросов, stop_dumping — последние значения."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory, dump_interval=0.01)
+            counter = registry.counter("hits_total", "Hits.")
+            counter.inc()
+            path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+            registry.start_dumping()
+            try:
+                deadline = time.monotonic() + 5
+                while not os.path.exists(path) and time.monotonic() < deadline:
+                    time.sleep(0.005)
+                self.assertTrue(os.path.exists(path))
+            finally:
+                registry.dump_interval = 3600.0
+                counter.inc(amount=2)
+                registry.stop_dumping()
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(json.load(file)["metrics"]["hits_total"], [[[], 3]])
+
+    def test_prefork_workers_do_not_repeat_master_values(self) -> None:
+        """Рабочие процессы после reset не повторяют значения главного в своих снимках."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory)
+            fetches = registry.histogram("fetch_seconds", "Fetch.", buckets=(1.0,))
+            requests = registry.counter("requests_total", "Requests.")
+            # Главный процесс загрузил ленту до запуска рабочих процессов
+            fetches.observe(0.5)
+            registry.dump()
+            children = []
+            for _ in range(2):
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        registry.reset()
+                        requests.inc()
+                        registry.dump()
+                        code = 0
+                    finally:
+                        os._exit(code)
+                children.append(pid)
+            for pid in children:
+                self.assertEqual(os.waitpid(pid, 0)[1], 0)
+            # Загрузка в главном процессе после fork тоже попадает в сумму
+            fetches.observe(0.5)
+            text = registry.render()
+        self.assertEqual(sample(text, "fetch_seconds_count"), 2)
+        self.assertEqual(sample(text, "requests_total"), 2)
+
+    def test_metric_base_is_abstract(self) -> None:
+        """Метрику без merge и lines создать нельзя."""
+        with self.assertRaises(TypeError):
+            _Metric("x", "X.")
+
+    def test_counting_writer(self) -> None:
+        """CountingWriter считает записанные байты."""
+        raw = io.BytesIO()
+        writer = CountingWriter(raw)
+        writer.write(b"abc")
+        writer.write(b"de")
+        self.assertEqual(writer.bytes_written, 5)
+        self.assertEqual(raw.getvalue(), b"abcde")
+
+
+class MetricsRouteTests(unittest.TestCase):
+    """Набор тестов для маршрута '/metrics'."""
+
+    def test_counts_requests_by_route_template(self) -> None:
+        """Запросы учитываются по шаблону маршрута, а не по конкретному пути."""
+        _, _, before = get("/metrics")
+        name = 'myapp_requests_total{route="/user/<int:user_id>",method="GET",status="200"}'
+        try:
+            initial = sample(before.decode("utf-8"), name)
+        except AssertionError:
+            initial = 0
+        get("/user/1")
+        get("/user/2")
+        get("/no-such-page")
+        status, headers, body = get("/metrics")
+        text = body.decode("utf-8")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertEqual(sample(text, name), initial + 2)
+        self.assertIn('route="unmatched",method="GET",status="404"', text)
+        self.assertGreater(
+            sample(text, 'myapp_response_bytes_total{route="/user/<int:user_id>"}'), 0
+        )
+        self.assertIn('myapp_template_render_seconds_count{template="user_detail.html"}', text)
+        self.assertEqual(sample(text, "myapp_requests_in_flight"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -135,5 +135,53 @@ class UserCurrencyModelTests(unittest.TestCase):
             UserCurrency(relation_id=0, user_id=2, currency_id=3)
 
 
+class BulkConstructionTests(unittest.TestCase):
+    """Набор тестов для пакетного создания моделей (from_rows)."""
+
+    def test_currency_from_rows_ok(self) -> None:
+        """Пакет строк превращается в валюты с теми же значениями."""
+        rows = [
+            (840, 840, "USD", "Доллар США", 80, 1),
+            (392, 392, "JPY", "Японских иен", 53.278, 100),
+        ]
+        currencies = Currency.from_rows(rows)
+        self.assertEqual(len(currencies), 2)
+        self.assertEqual(currencies[0].char_code, "USD")
+        self.assertIsInstance(currencies[0].value, float)
+        self.assertEqual(currencies[1].nominal, 100)
+
+    def test_currency_from_rows_keeps_error_types(self) -> None:
+        """Ошибки пакетного создания совпадают с ошибками конструктора."""
+        with self.assertRaises(ValueError):
+            Currency.from_rows([(1, 840, "USD", "Доллар США", -1.0, 1)])
+        with self.assertRaises(TypeError):
+            Currency.from_rows([(1, 840, 123, "Доллар США", 90.5, 1)])
+        with self.assertRaises(TypeError):
+            Currency.from_rows([(1, 840, "USD")])
+
+    def test_user_and_link_from_rows(self) -> None:
+        """Пакетное создание пользователей и связей."""
+        users = User.from_rows([(1, "Ali"), (2, "Ivan")])
+        self.assertEqual([u.name for u in users], ["Ali", "Ivan"])
+        links = UserCurrency.from_rows([(1, 1, 840), (2, 2, 978)])
+        self.assertEqual(links[1].currency_id, 978)
+        with self.assertRaises(ValueError):
+            User.from_rows([(1, "Ali"), (2, "  ")])
+        with self.assertRaises(ValueError):
+            UserCurrency.from_rows([(1, 0, 840)])
+
+    def test_models_have_no_instance_dict(self) -> None:
+        """Модели используют __slots__ и не хранят __dict__."""
+        author = Author("Имя", "P3123")
+        for obj in (
+            author,
+            App("TestApp", "1.0.0", author),
+            User(1, "Ali"),
+            Currency(1, 840, "USD", "Доллар США", 90.5, 1),
+            UserCurrency(1, 1, 840),
+        ):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""Тесты для кэша страниц и условных запросов (ETag, 304)."""
+
+from __future__ import annotations
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from myapp.myapp import PAGES, REPOSITORY
+from myapp.utils.page_cache import CachedPage, PageCache
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class PageCacheTests(unittest.TestCase):
+    """Набор тестов для PageCache и CachedPage."""
+
+    def test_renders_once_per_version(self) -> None:
+        """Шаблон отрисовывается заново только при смене версии."""
+        cache = PageCache()
+        calls = []
+
+        def render() -> str:
+            calls.append(1)
+            return f"<p>{len(calls)}</p>"
+
+        first = cache.get("/", 1, render)
+        self.assertIs(cache.get("/", 1, render), first)
+        second = cache.get("/", 2, render)
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(first.etag, second.etag)
+        self.assertEqual(cache.hits, 1)
+
+    def test_counters_from_threads(self) -> None:
+        """Счётчики hits и renders не теряют обращений из разных потоков."""
+        cache = PageCache()
+        cache.get("/", 1, lambda: "<p>page</p>")
+
+        def fetch(_: int) -> None:
+            for _ in range(500):
+                cache.get("/", 1, lambda: "<p>page</p>")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(fetch, range(8)))
+        self.assertEqual(cache.renders, 1)
+        self.assertEqual(cache.hits, 8 * 500)
+
+    def test_conditional_headers(self) -> None:
+        """If-None-Match сравнивает ETag, If-Modified-Since — дату изменения."""
+        page = CachedPage(b"body", last_modified=1_000_000)
+        self.assertTrue(page.not_modified(page.etag))
+        self.assertTrue(page.not_modified('"other", W/' + page.etag))
+        self.assertTrue(page.not_modified("*"))
+        self.assertFalse(page.not_modified('"other"'))
+        self.assertTrue(page.not_modified(None, page.last_modified_header))
+        self.assertFalse(page.not_modified('"other"', page.last_modified_header))
+        self.assertFalse(page.not_modified(None, "not a date"))
+
+
+class ConditionalRouteTests(unittest.TestCase):
+    """Набор тестов для ETag и 304 в маршрутах приложения."""
+
+    def test_if_none_match_returns_304(self) -> None:
+        """Повторный запрос с ETag получает 304 без тела."""
+        for path in ("/", "/author", "/users", "/currencies"):
+            status, headers, body = get(path)
+            self.assertEqual(status, 200)
+            self.assertEqual(int(headers["Content-Length"]), len(body))
+            self.assertIn("Last-Modified", headers)
+            renders = PAGES.renders
+            status, headers2, body = get(path, f"If-None-Match: {headers['ETag']}\r\n")
+            self.assertEqual(status, 304, path)
+            self.assertEqual(body, b"")
+            self.assertEqual(headers2["ETag"], headers["ETag"])
+            self.assertEqual(PAGES.renders, renders)
+
+    def test_users_page_follows_revision(self) -> None:
+        """Новый пользователь меняет ETag страницы '/users'."""
+        _, headers, _ = get("/users")
+        user = REPOSITORY.add_user("Olga")
+        try:
+            status, new_headers, body = get("/users", f"If-None-Match: {headers['ETag']}\r\n")
+            self.assertEqual(status, 200)
+            self.assertIn("Olga", body.decode("utf-8"))
+            self.assertNotEqual(new_headers["ETag"], headers["ETag"])
+        finally:
+            REPOSITORY.delete_user(user.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
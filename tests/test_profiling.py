@@ -0,0 +1,116 @@
+"""Тесты для выборочного профилирования запросов."""
+
+from __future__ import annotations
+
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+import myapp.myapp as app
+from myapp.utils.profiling import RouteProfiler
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+def slow_inner() -> None:
+    """Функция, которая должна попасть в профиль."""
+    time.sleep(0.03)
+
+
+def slow_outer() -> None:
+    """Вызывает slow_inner."""
+    slow_inner()
+
+
+class RouteProfilerTests(unittest.TestCase):
+    """Набор тестов для RouteProfiler."""
+
+    def setUp(self) -> None:
+        """Создаёт временный каталог для результатов."""
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self) -> None:
+        """Удаляет временный каталог."""
+        self._directory.cleanup()
+
+    def test_profiles_every_nth_request(self) -> None:
+        """Выбирается каждый every-й запрос, флаг выбирает запрос всегда."""
+        profiler = RouteProfiler(self.directory, every=3)
+        chosen = [profiler.should_profile() for _ in range(6)]
+        self.assertEqual(chosen, [False, False, True, False, False, True])
+        self.assertTrue(RouteProfiler(self.directory).should_profile(forced=True))
+        self.assertFalse(RouteProfiler(self.directory).should_profile())
+
+    def test_writes_pstats_and_collapsed_stacks(self) -> None:
+        """Результаты накапливаются по маршруту и сохраняются в оба формата."""
+        profiler = RouteProfiler(self.directory, every=1)
+        profiler.profile("GET /slow", slow_outer)
+        profiler.profile("GET /slow", slow_outer)
+        self.assertEqual(profiler.profiled, {"GET /slow": 2})
+        base = os.path.join(self.directory, f"GET_slow.{os.getpid()}")
+        stats = pstats.Stats(base + ".pstats")
+        calls = {name: data[1] for (_, _, name), data in stats.stats.items()}
+        self.assertEqual(calls["slow_inner"], 2)
+        with open(base + ".collapsed", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertTrue(stack.startswith("GET /slow;"))
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any("test_profiling.py:slow_inner" in line for line in lines))
+
+    def test_token_check(self) -> None:
+        """Флаг действует только с верным токеном и только если токен задан."""
+        profiler = RouteProfiler(self.directory, token="secret")
+        self.assertTrue(profiler.authorized("secret"))
+        self.assertFalse(profiler.authorized("wrong"))
+        self.assertFalse(profiler.authorized(""))
+        self.assertFalse(RouteProfiler(self.directory).authorized("secret"))
+
+    def test_from_environ(self) -> None:
+        """Без переменных окружения профилирование выключено."""
+        self.assertIsNone(RouteProfiler.from_environ({}))
+        profiler = RouteProfiler.from_environ(
+            {"MYAPP_PROFILE_EVERY": "10", "MYAPP_PROFILE_DIR": self.directory}
+        )
+        self.assertEqual((profiler.every, profiler.directory), (10, self.directory))
+        with self.assertRaises(ValueError):
+            RouteProfiler(self.directory, every=-1)
+
+    def test_admin_flag_profiles_live_request(self) -> None:
+        """Запрос с ?_profile=<токен> профилируется под шаблоном маршрута."""
+        previous = app.PROFILER
+        app.PROFILER = RouteProfiler(self.directory, token="secret")
+        try:
+            self.assertEqual(get("/user/1?_profile=wrong")[0], 200)
+            self.assertEqual(app.PROFILER.profiled, {})
+            self.assertEqual(get("/user/1?_profile=secret")[0], 200)
+        finally:
+            profiler, app.PROFILER = app.PROFILER, previous
+        self.assertEqual(profiler.profiled, {"GET /user/<int:user_id>": 1})
+        stats = profiler.stats("GET /user/<int:user_id>")
+        names = {name for _, _, name in stats.stats}
+        self.assertIn("handle_user_page", names)
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.directory, f"GET_user_int_user_id.{os.getpid()}.pstats")
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+"""Тесты для снимков курсов и фонового обновления."""
+
+from __future__ import annotations
+
+import calendar
+import os
+import random
+import threading
+import time
+import unittest
+from typing import List
+
+from myapp.models import Currency
+from myapp.utils.rates import (
+    RatesRefresher,
+    RatesSnapshot,
+    RatesUnavailable,
+    seconds_until_publication,
+)
+
+
+def make_currencies(usd: float) -> List[Currency]:
+    """Возвращает новый список из двух валют с курсом доллара usd."""
+    return [
+        Currency(1, 840, "USD", "Доллар США", usd, 1),
+        Currency(2, 978, "EUR", "Евро", usd * 1.1, 1),
+    ]
+
+
+class FakeFeed:
+    """Загрузчик курсов для тестов: новый список на каждый вызов или ошибка."""
+
+    def __init__(self) -> None:
+        """Создаёт загрузчик с курсом доллара 80."""
+        self.usd = 80.0
+        self.calls = 0
+        self.fail = False
+        self.same = False
+        self._last: List[Currency] = []
+
+    def __call__(self) -> tuple:
+        """Возвращает дату и список валют (или тот же список, если same)."""
+        self.calls += 1
+        if self.fail:
+            raise ValueError("лента недоступна")
+        if not self.same or not self._last:
+            self.usd += 1
+            self._last = make_currencies(self.usd)
+        return "17.10.2026", self._last
+
+
+class RatesSnapshotTests(unittest.TestCase):
+    """Набор тестов для RatesSnapshot."""
+
+    def test_views_are_consistent(self) -> None:
+        """Индекс, таблица и матрица построены по одному списку валют."""
+        snapshot = RatesSnapshot(make_currencies(90.0), version=3, date="17.10.2026")
+        self.assertEqual(snapshot.version, 3)
+        self.assertEqual(snapshot.index["USD"].value, 90.0)
+        self.assertEqual(snapshot.table.char_codes, ["USD", "EUR"])
+        self.assertAlmostEqual(snapshot.matrix.rate("USD", "RUB"), 90.0)
+        self.assertIsInstance(snapshot.currencies, tuple)
+
+    def test_is_immutable(self) -> None:
+        """Атрибуты снимка и его индекс изменить нельзя."""
+        snapshot = RatesSnapshot(make_currencies(90.0), version=1)
+        with self.assertRaises(AttributeError):
+            snapshot.version = 2
+        with self.assertRaises(AttributeError):
+            del snapshot.matrix
+        with self.assertRaises(TypeError):
+            snapshot.index["GBP"] = None
+
+
+class ScheduleTests(unittest.TestCase):
+    """Набор тестов для расписания обновлений."""
+
+    def test_seconds_until_publication(self) -> None:
+        """Срок — ближайшие 12:30 UTC плюс запас settle."""
+        noon = calendar.timegm((2026, 10, 16, 12, 0, 0))
+        self.assertEqual(seconds_until_publication(noon, settle=300), 35 * 60)
+        evening = calendar.timegm((2026, 10, 16, 13, 0, 0))
+        self.assertEqual(seconds_until_publication(evening, settle=0), 23.5 * 3600)
+
+    def test_next_delay_is_capped_and_jittered(self) -> None:
+        """Без ошибок пауза не больше interval + jitter."""
+        noon = calendar.timegm((2026, 10, 16, 12, 0, 0))
+        refresher = RatesRefresher(
+            FakeFeed(), interval=600, jitter=30, clock=lambda: noon, rng=random.Random(1)
+        )
+        for _ in range(20):
+            self.assertTrue(600 <= refresher.next_delay() <= 630)
+        refresher.interval = 7200
+        self.assertTrue(2100 <= refresher.next_delay() <= 2130)
+
+    def test_backoff_grows_after_failures(self) -> None:
+        """После ошибок пауза растёт вдвое, но не больше max_backoff."""
+        feed = FakeFeed()
+        feed.fail = True
+        refresher = RatesRefresher(feed, backoff=4, max_backoff=10, rng=random.Random(1))
+        expected = [(2, 4), (4, 8), (5, 10), (5, 10)]
+        for low, high in expected:
+            with self.assertRaises(ValueError):
+                refresher.refresh()
+            self.assertTrue(low <= refresher.next_delay() <= high)
+        self.assertEqual((refresher.failures, refresher.errors), (4, 4))
+
+
+class RatesRefresherTests(unittest.TestCase):
+    """Набор тестов для RatesRefresher."""
+
+    def test_publishes_new_version_only_on_change(self) -> None:
+        """Тот же список от загрузчика не создаёт новый снимок."""
+        feed = FakeFeed()
+        refresher = RatesRefresher(feed)
+        first = refresher.refresh()
+        self.assertIs(refresher.get(), first)
+        self.assertEqual(feed.calls, 1)
+        feed.same = True
+        self.assertIs(refresher.refresh(), first)
+        feed.same = False
+        second = refresher.refresh()
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertIs(refresher.get(), second)
+
+    def test_failure_keeps_current_snapshot(self) -> None:
+        """Ошибка загрузки не трогает опубликованный снимок."""
+        feed = FakeFeed()
+        refresher = RatesRefresher(feed)
+        snapshot = refresher.refresh()
+        feed.fail = True
+        with self.assertRaises(ValueError):
+            refresher.refresh()
+        self.assertIs(refresher.get(), snapshot)
+        feed.fail = False
+        refresher.refresh()
+        self.assertEqual(refresher.failures, 0)
+
+    def test_subscribers_receive_new_snapshots(self) -> None:
+        """Подписчики получают каждый новый снимок, пока не отписаны."""
+        feed = FakeFeed()
+        refresher = RatesRefresher(feed)
+        first: List[RatesSnapshot] = []
+        second: List[RatesSnapshot] = []
+        refresher.subscribe(first.append)
+        refresher.subscribe(second.append)
+        refresher.refresh()
+        refresher.unsubscribe(second.append)
+        refresher.refresh()
+        self.assertEqual([snapshot.version for snapshot in first], [1, 2])
+        self.assertEqual([snapshot.version for snapshot in second], [1])
+
+    def test_failing_subscriber_does_not_stop_others(self) -> None:
+        """Исключение подписчика записывается в журнал, остальные подписчики вызываются."""
+        refresher = RatesRefresher(FakeFeed())
+        received: List[int] = []
+
+        def broken(snapshot: RatesSnapshot) -> None:
+            raise OSError("диск заполнен")
+
+        refresher.subscribe(broken)
+        refresher.subscribe(lambda snapshot: received.append(snapshot.version))
+        with self.assertLogs("myapp.utils.rates", "ERROR"):
+            self.assertEqual(refresher.refresh().version, 1)
+        self.assertEqual(received, [1])
+        self.assertEqual(refresher.get().version, 1)
+
+    def test_thread_restarts_once_after_fork(self) -> None:
+        """Одновременные первые запросы после fork запускают один поток обновления."""
+        started: List[int] = []
+
+        class SlowRefresher(RatesRefresher):
+            """Расширяет окно между проверкой флага перезапуска и его сбросом."""
+
+            @property
+            def _restart_after_fork(self) -> bool:
+                restart = self._restart
+                time.sleep(0.01)
+                return restart
+
+            @_restart_after_fork.setter
+            def _restart_after_fork(self, value: bool) -> None:
+                self._restart = value
+
+            def _start_thread(self) -> None:
+                started.append(1)
+                super()._start_thread()
+
+        refresher = SlowRefresher(FakeFeed())
+        refresher.refresh()
+        # Состояние дочернего процесса после fork при follow_fork=True
+        refresher._restart_after_fork = True
+        barrier = threading.Barrier(8)
+
+        def first_request() -> None:
+            barrier.wait()
+            refresher.get()
+
+        requests = [threading.Thread(target=first_request) for _ in range(8)]
+        for thread in requests:
+            thread.start()
+        for thread in requests:
+            thread.join()
+        refresher.stop()
+        self.assertEqual(started, [1])
+
+    def test_get_never_loads(self) -> None:
+        """Без снимка get() сразу вызывает RatesUnavailable, не обращаясь к ленте."""
+        feed = FakeFeed()
+        refresher = RatesRefresher(feed)
+        with self.assertRaises(RatesUnavailable):
+            refresher.get()
+        self.assertEqual(feed.calls, 0)
+        refresher.refresh()
+        refresher.reset()
+        self.assertIsNone(refresher.snapshot)
+        with self.assertRaises(RatesUnavailable):
+            refresher.get()
+        self.assertEqual(refresher.refresh().version, 2)
+
+    def test_start_survives_unavailable_feed(self) -> None:
+        """Если лента недоступна при запуске, снимок появится после повторной попытки."""
+        feed = FakeFeed()
+        feed.fail = True
+        refresher = RatesRefresher(feed, jitter=0, backoff=0.005, max_backoff=0.01)
+        refresher.start()
+        try:
+            with self.assertRaises(RatesUnavailable):
+                refresher.get()
+            feed.fail = False
+            deadline = time.monotonic() + 5
+            while refresher.snapshot is None and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self.assertEqual(refresher.get().version, 1)
+        finally:
+            refresher.stop()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "нужен os.fork")
+    def test_child_without_follow_fork_only_reads(self) -> None:
+        """При follow_fork=False дочерний процесс не загружает курсы и не зовёт подписчиков."""
+        feed = FakeFeed()
+        published: List[int] = []
+        refresher = RatesRefresher(feed, jitter=0)
+        refresher.subscribe(lambda snapshot: published.append(snapshot.version))
+        refresher.start()
+        refresher.follow_fork = False
+        try:
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    version = refresher.get().version
+                    try:
+                        refresher.refresh()
+                    except RatesUnavailable:
+                        refresher.start()
+                        if (version, feed.calls, refresher._thread) == (1, 1, None):
+                            code = 0 if not refresher._subscribers else 2
+                finally:
+                    os._exit(code)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            self.assertEqual(refresher.refresh().version, 2)
+            self.assertEqual(published, [1, 2])
+        finally:
+            refresher.stop()
+
+    def test_background_thread_swaps_snapshots(self) -> None:
+        """Поток обновляет курсы сам; читатели всегда видят согласованный снимок."""
+        feed = FakeFeed()
+        refresher = RatesRefresher(feed, interval=0.005, jitter=0, backoff=0.005)
+        refresher.start()
+        inconsistent = []
+
+        def reader() -> None:
+            deadline = time.monotonic() + 0.2
+            while time.monotonic() < deadline:
+                snapshot = refresher.get()
+                usd = snapshot.index["USD"].value
+                if snapshot.matrix.rate("USD", "RUB") != usd:
+                    inconsistent.append(snapshot.version)
+
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        refresher.stop()
+        self.assertEqual(inconsistent, [])
+        self.assertGreater(refresher.get().version, 2)
+        calls = feed.calls
+        time.sleep(0.03)
+        self.assertEqual(feed.calls, calls)
+
+    def test_invalid_arguments_raise(self) -> None:
+        """Интервал и задержки должны быть положительными."""
+        with self.assertRaises(ValueError):
+            RatesRefresher(FakeFeed(), interval=0)
+        with self.assertRaises(ValueError):
+            RatesRefresher(FakeFeed(), jitter=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
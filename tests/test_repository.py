@@ -0,0 +1,257 @@
+"""Тесты для слоя хранения Repository."""
+
+from __future__ import annotations
+
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from myapp.models import Currency, User
+from myapp.utils.repository import Repository
+
+from tests.support import get
+
+
+class RepositoryTests(unittest.TestCase):
+    """Набор тестов для Repository."""
+
+    def setUp(self) -> None:
+        """Создаёт репозиторий во временном каталоге."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.sqlite3")
+        self.repository = Repository(self.path)
+
+    def tearDown(self) -> None:
+        """Закрывает соединения и удаляет временный каталог."""
+        self.repository.close()
+        shutil.rmtree(self.directory)
+
+    def test_users_roundtrip(self) -> None:
+        """Пользователи сохраняются пакетом и находятся по id."""
+        self.repository.add_users(User(i, f"user{i}") for i in range(1, 1001))
+        self.assertEqual(self.repository.count_users(), 1000)
+        self.assertEqual(self.repository.get_user(500).name, "user500")
+        self.assertIsNone(self.repository.get_user(5000))
+        self.assertIsNone(self.repository.get_user(2 ** 63))
+        revision = self.repository.users_revision()
+        created = self.repository.add_user("Новый")
+        self.assertEqual(created.id, 1001)
+        self.assertGreater(self.repository.users_revision(), revision)
+        with self.assertRaises(ValueError):
+            self.repository.add_user("  ")
+
+    def test_keyset_pages(self) -> None:
+        """Страницы по ключу идут подряд и без пропусков."""
+        self.repository.add_users(User(i, f"user{i}") for i in range(1, 251))
+        ids = []
+        after = 0
+        while True:
+            page = self.repository.users_page(after, 64)
+            ids.extend(user.id for user in page)
+            if page.next_after is None:
+                break
+            after = page.next_after
+        self.assertEqual(ids, list(range(1, 251)))
+        with self.assertRaises(ValueError):
+            self.repository.users_page(after=-1)
+        with self.assertRaises(ValueError):
+            self.repository.users_page(after=2 ** 63)
+
+    def test_prefix_search(self) -> None:
+        """Поиск по началу имени не зависит от регистра и листается страницами."""
+        names = ["Анна", "анастасия", "Андрей", "Борис", "Ann", "anton", "Anna"]
+        self.repository.add_users(User(i, name) for i, name in enumerate(names, start=1))
+        first = self.repository.users_page(0, 2, "АН")
+        self.assertEqual([u.name for u in first], ["анастасия", "Андрей"])
+        rest = self.repository.users_page(first.next_after, 10, "АН")
+        self.assertEqual([u.name for u in rest], ["Анна"])
+        self.assertIsNone(rest.next_after)
+        found = self.repository.users_page(0, 10, "ann")
+        self.assertEqual([u.name for u in found], ["Ann", "Anna"])
+        self.repository.add_user("Annabel")
+        self.assertEqual(len(list(self.repository.users_page(0, 10, "ann"))), 3)
+
+    def test_prefix_at_end_of_unicode(self) -> None:
+        """Префикс из последних символов Unicode ищется без верхней границы."""
+        last = chr(0x10FFFF)
+        names = [last, last + "a", "z" + last, "\ud7ffb", "\ue000"]
+        self.repository.add_users(User(i, name) for i, name in enumerate(names, start=1))
+        for prefix, expected in ((last, names[:2]), ("z", names[2:3]), ("\ud7ff", names[3:4])):
+            page = self.repository.users_page(0, 10, prefix)
+            self.assertEqual([u.name for u in page], expected)
+
+    def test_migrates_old_schema(self) -> None:
+        """База без столбца name_key дополняется при открытии."""
+        path = os.path.join(self.directory, "old.sqlite3")
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+            connection.execute("INSERT INTO users VALUES (1, 'Maria')")
+        connection.close()
+        repository = Repository(path)
+        self.assertEqual([u.id for u in repository.users_page(0, 10, "mar")], [1])
+        repository.close()
+
+    def test_wal_mode(self) -> None:
+        """База работает в режиме WAL."""
+        mode = self.repository.connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_currencies_upsert(self) -> None:
+        """Повторное сохранение валюты обновляет её курс."""
+        usd = Currency(840, 840, "USD", "Доллар США", 80.0, 1)
+        self.repository.save_currencies([usd])
+        usd.value = 81.5
+        self.repository.save_currencies([usd])
+        saved = self.repository.list_currencies()
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved[0].value, 81.5)
+
+    def test_subscriptions_persist_and_update_index(self) -> None:
+        """Подписки попадают в базу и в индекс SubscriptionStore."""
+        self.repository.add_users([User(1, "Ali"), User(2, "Ivan")])
+        self.repository.add_subscriptions([(1, 840), (1, 978), (2, 840), (1, 840)])
+        store = self.repository.subscriptions
+        self.assertEqual(store.currencies_of(1), {840, 978})
+        self.repository.add_subscriptions([(2, 978)])
+        self.assertEqual(store.subscribers_of(978), {1, 2})
+        self.assertTrue(self.repository.remove_subscription(1, 840))
+        self.assertFalse(self.repository.remove_subscription(1, 840))
+        self.assertTrue(self.repository.delete_user(2))
+        self.assertEqual(store.subscribers_of(840), frozenset())
+        self.assertEqual(
+            [(l.user_id, l.currency_id) for l in self.repository.list_subscriptions()],
+            [(1, 978)],
+        )
+
+    def test_seed_runs_once_and_threads_share_data(self) -> None:
+        """Начальное заполнение выполняется один раз; потоки видят одни данные."""
+        calls = []
+
+        def seed(repository: Repository) -> None:
+            calls.append(1)
+            repository.add_users([User(1, "Ali")])
+
+        repository = Repository(self.path, seed=seed)
+        names = []
+        threads = [
+            threading.Thread(target=lambda: names.append(repository.get_user(1).name))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        repository.close()
+        self.assertEqual(names, ["Ali"] * 4)
+        self.assertEqual(len(calls), 1)
+        reopened = Repository(self.path, seed=seed)
+        self.assertEqual(reopened.count_users(), 1)
+        reopened.close()
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_first_open_seeds_once(self) -> None:
+        """Два репозитория на одной пустой базе (как prefork-воркеры) заполняют её один раз."""
+        calls = []
+        errors = []
+
+        def seed(repository: Repository) -> None:
+            calls.append(1)
+            # Пауза между проверкой пустоты и вставкой расширяет окно гонки
+            time.sleep(0.1)
+            repository.add_users([User(1, "Ali"), User(2, "Ivan")])
+            repository.add_subscriptions([(1, 840)])
+
+        repositories = [Repository(self.path, seed=seed) for _ in range(2)]
+        barrier = threading.Barrier(len(repositories))
+
+        def open_repository(repository: Repository) -> None:
+            barrier.wait()
+            try:
+                repository.count_users()
+            except sqlite3.Error as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=open_repository, args=(repository,))
+            for repository in repositories
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for repository in repositories:
+            repository.close()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        reopened = Repository(self.path)
+        self.assertEqual(reopened.count_users(), 2)
+        self.assertEqual(len(reopened.list_subscriptions()), 1)
+        reopened.close()
+
+    def test_failed_seed_is_rolled_back(self) -> None:
+        """Ошибка в начальном заполнении откатывает все его вставки."""
+
+        def seed(repository: Repository) -> None:
+            repository.add_users([User(1, "Ali")])
+            raise RuntimeError("сбой заполнения")
+
+        repository = Repository(self.path, seed=seed)
+        with self.assertRaises(RuntimeError):
+            repository.count_users()
+        repository.close()
+        reopened = Repository(self.path)
+        self.assertEqual(reopened.count_users(), 0)
+        reopened.close()
+
+
+
+class UsersRouteTests(unittest.TestCase):
+    """Набор тестов для страниц и поиска маршрута '/users'."""
+
+    def test_pages_and_search(self) -> None:
+        """Страница ограничена limit и ссылается на следующую; q ищет по имени."""
+        status, _, body = get("/users?limit=2")
+        self.assertEqual(status, 200)
+        self.assertIn(b"Ivan", body)
+        self.assertNotIn(b"Maria", body)
+        self.assertIn(b"/users?after=2&amp;limit=2", body)
+        body = get("/users?after=2&limit=2")[2].decode("utf-8")
+        self.assertIn("Maria", body)
+        self.assertNotIn("Следующая страница", body)
+        body = get("/users?q=ma")[2]
+        self.assertIn(b"Maria", body)
+        self.assertNotIn(b"Ali", body)
+
+    def test_bad_parameters(self) -> None:
+        """Нечисловые и недопустимые параметры дают 400."""
+        for path in (
+            "/users?after=x",
+            "/users?limit=0",
+            "/users?after=-5",
+            "/users?limit=100000",
+            "/users?after=99999999999999999999",
+        ):
+            self.assertEqual(get(path)[0], 400, path)
+        self.assertEqual(get("/users?q=%F4%8F%BF%BF")[0], 200)
+
+    def test_other_pages_are_compressed(self) -> None:
+        """Страницы, кроме первой, тоже сжимаются, если клиент это поддерживает."""
+        _, headers, body = get("/users?limit=500", "Accept-Encoding: gzip\r\n")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertIn(b"Ivan", gzip.decompress(body))
+
+    def test_user_id_out_of_range(self) -> None:
+        """id за пределами 64-битного целого — просто несуществующий пользователь."""
+        huge = 2 ** 63
+        self.assertEqual(get(f"/user?id={huge}")[0], 404)
+        self.assertEqual(get(f"/user/{huge * 10}")[0], 404)
+        self.assertEqual(get(f"/user?id=-{huge + 1}")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
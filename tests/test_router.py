@@ -0,0 +1,123 @@
+"""Тесты для таблицы маршрутов Router."""
+
+from __future__ import annotations
+
+import json
+import unittest
+
+from myapp.router import Router
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import request
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class RouterTests(unittest.TestCase):
+    """Набор тестов для Router."""
+
+    def setUp(self) -> None:
+        """Создаёт таблицу с статическими и параметризованными маршрутами."""
+        self.router = Router()
+        self.calls = []
+        for path in ("/", "/users", "/user/<int:user_id>", "/currency/<code>",
+                     "/currency/<code>/stats"):
+            self.router.add("GET", path, self._recorder(path))
+        self.router.add("POST", "/convert", self._recorder("post"))
+        self.router.compile()
+
+    def _recorder(self, name: str):
+        """Возвращает обработчик, запоминающий имя маршрута и параметры."""
+        def handler(request, *args, **params) -> None:
+            self.calls.append((name, params))
+        return handler
+
+    def test_static_and_parameters(self) -> None:
+        """Статические пути и параметры с конвертерами разбираются верно."""
+        self.assertTrue(self.router.dispatch(None, "GET", "/users"))
+        self.assertTrue(self.router.dispatch(None, "GET", "/user/42"))
+        self.assertTrue(self.router.dispatch(None, "GET", "/currency/USD/stats"))
+        self.assertTrue(self.router.dispatch(None, "GET", "/currency/%D0%AF"))
+        self.assertEqual(self.calls, [
+            ("/users", {}),
+            ("/user/<int:user_id>", {"user_id": 42}),
+            ("/currency/<code>/stats", {"code": "USD"}),
+            ("/currency/<code>", {"code": "Я"}),
+        ])
+
+    def test_misses_and_methods(self) -> None:
+        """Неподходящие пути не находятся; allowed_methods учитывает метод."""
+        for path in ("/user/abc", "/user/1/x", "/nope", "/users/"):
+            self.assertIsNone(self.router.resolve("GET", path), path)
+        self.assertIsNone(self.router.resolve("POST", "/users"))
+        self.assertEqual(self.router.allowed_methods("/users"), ["GET"])
+        self.assertEqual(self.router.allowed_methods("/convert"), ["POST"])
+        self.assertEqual(self.router.allowed_methods("/nope"), [])
+
+    def test_duplicates_and_bad_converters(self) -> None:
+        """Повторная регистрация и неизвестный конвертер вызывают ValueError."""
+        with self.assertRaises(ValueError):
+            self.router.add("GET", "/users", print)
+        with self.assertRaises(ValueError):
+            self.router.add("GET", "/user/<int:user_id>", print)
+        with self.assertRaises(ValueError):
+            self.router.add("GET", "/x/<float:value>", print)
+
+    def test_middleware_order(self) -> None:
+        """Промежуточные слои вызываются в порядке добавления вокруг обработчика."""
+        order = []
+
+        def outer(request, route, call_next):
+            order.append(route)
+            order.append("outer")
+            call_next()
+            order.append("outer done")
+
+        def inner(request, route, call_next):
+            order.append("inner")
+            call_next()
+
+        self.router.use(outer)
+        self.router.use(inner)
+        self.router.dispatch(None, "GET", "/")
+        self.assertEqual(order, ["/", "outer", "inner", "outer done"])
+        self.assertEqual(len(self.calls), 1)
+
+
+class AppRoutesTests(unittest.TestCase):
+    """Набор тестов для новых маршрутов приложения."""
+
+    def test_user_path_parameter(self) -> None:
+        """'/user/<id>' показывает ту же страницу, что и '/user?id='."""
+        status, headers, body = request(b"GET /user/1 HTTP/1.1\r\n\r\n")
+        self.assertEqual(status, 200)
+        self.assertIn("Server-Timing", headers)
+        self.assertIn("Ali", body.decode("utf-8"))
+        self.assertEqual(request(b"GET /user/999 HTTP/1.1\r\n\r\n")[0], 404)
+
+    def test_currency_json(self) -> None:
+        """'/currency/<code>' возвращает курс валюты в JSON."""
+        status, _, body = request(b"GET /currency/usd HTTP/1.1\r\n\r\n")
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertEqual(data["char_code"], "USD")
+        self.assertAlmostEqual(data["unit_rate"], 80.7513)
+        self.assertEqual(request(b"GET /currency/XXX HTTP/1.1\r\n\r\n")[0], 404)
+
+    def test_method_not_allowed(self) -> None:
+        """Известный путь с другим методом получает 405 и Allow."""
+        status, headers, _ = request(b"POST /users HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+        self.assertEqual(status, 405)
+        self.assertEqual(headers["Allow"], "GET")
+
+
+if __name__ == "__main__":
+    unittest.main()
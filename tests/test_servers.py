@@ -0,0 +1,184 @@
+"""Тесты для режимов работы сервера.
+
+Здесь проверяется, что MyRequestHandler без изменений работает
+в пуле потоков и в режиме pre-fork с несколькими процессами.
+"""
+
+from __future__ import annotations
+
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from myapp.myapp import MyRequestHandler
+from myapp.servers import ThreadPoolHTTPServer
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+def _free_port() -> int:
+    """Возвращает свободный порт на локальном интерфейсе."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class KeepAliveTests(unittest.TestCase):
+    """Набор тестов для постоянных соединений HTTP/1.1."""
+
+    def setUp(self) -> None:
+        """Запускает сервер с пулом потоков и небольшим лимитом запросов."""
+        self.httpd = ThreadPoolHTTPServer(
+            ("127.0.0.1", 0), MyRequestHandler, max_workers=2
+        )
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection(
+            "127.0.0.1", self.httpd.server_address[1], timeout=5
+        )
+
+    def tearDown(self) -> None:
+        """Закрывает соединение и останавливает сервер."""
+        self.connection.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def _get(self, path: str) -> http.client.HTTPResponse:
+        """Отправляет GET-запрос по общему соединению и читает ответ."""
+        self.connection.request("GET", path)
+        response = self.connection.getresponse()
+        response.read()
+        return response
+
+    def test_error_pages_keep_connection(self) -> None:
+        """Ответы 200, 400 и 404 идут по одному соединению."""
+        statuses = [self._get(path).status for path in ("/", "/user?id=x", "/nope", "/user")]
+        self.assertEqual(statuses, [200, 400, 404, 400])
+        port = self.connection.sock.getsockname()[1]
+        self.assertEqual(self._get("/user?id=999").status, 404)
+        self.assertEqual(self.connection.sock.getsockname()[1], port)
+
+    def test_request_limit_closes_connection(self) -> None:
+        """Последний разрешённый запрос получает Connection: close."""
+        old_limit = MyRequestHandler.max_requests
+        MyRequestHandler.max_requests = 2
+        try:
+            self.assertIsNone(self._get("/author").getheader("Connection"))
+            self.assertEqual(self._get("/author").getheader("Connection"), "close")
+            self.assertIsNone(self.connection.sock)
+        finally:
+            MyRequestHandler.max_requests = old_limit
+
+
+    def test_idle_connection_times_out(self) -> None:
+        """Простаивающее соединение закрывается сервером по таймауту."""
+        old_timeout = MyRequestHandler.timeout
+        MyRequestHandler.timeout = 0.2
+        try:
+            self.assertEqual(self._get("/").status, 200)
+            self.connection.sock.settimeout(5)
+            self.assertEqual(self.connection.sock.recv(1), b"")
+        finally:
+            MyRequestHandler.timeout = old_timeout
+
+
+class ThreadPoolServerTests(unittest.TestCase):
+    """Набор тестов для ThreadPoolHTTPServer."""
+
+    def setUp(self) -> None:
+        """Запускает сервер с пулом потоков в фоновом потоке."""
+        self.httpd = ThreadPoolHTTPServer(
+            ("127.0.0.1", 0), MyRequestHandler, max_workers=4
+        )
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        """Останавливает сервер и рабочие потоки."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def test_serves_concurrent_requests(self) -> None:
+        """Параллельные запросы должны обслуживаться успешно."""
+        def fetch(path: str) -> int:
+            with urllib.request.urlopen(self.base_url + path, timeout=5) as resp:
+                return resp.status
+
+        paths = ["/", "/users", "/currencies", "/author", "/user?id=1"] * 4
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(fetch, paths))
+        self.assertEqual(statuses, [200] * len(paths))
+
+    def test_server_close_stops_workers(self) -> None:
+        """После server_close рабочие потоки должны быть остановлены."""
+        workers = list(self.httpd._workers)
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.assertTrue(all(not worker.is_alive() for worker in workers))
+
+    def test_invalid_worker_count_raises(self) -> None:
+        """Нулевое количество потоков должно вызывать ValueError."""
+        with self.assertRaises(ValueError):
+            ThreadPoolHTTPServer(
+                ("127.0.0.1", 0), MyRequestHandler, max_workers=0
+            )
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "режим prefork требует os.fork")
+class PreforkServerTests(unittest.TestCase):
+    """Набор тестов для режима pre-fork."""
+
+    def test_prefork_serves_and_stops_gracefully(self) -> None:
+        """Сервер из нескольких процессов отвечает и завершается по SIGTERM."""
+        port = _free_port()
+        proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "myapp.myapp",
+                "--mode", "prefork", "--workers", "2", "--threads", "2",
+                "--port", str(port),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            status = None
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                try:
+                    with urllib.request.urlopen(
+                        f"http://127.0.0.1:{port}/", timeout=2
+                    ) as resp:
+                        status = resp.status
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            self.assertEqual(status, 200)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            code = proc.wait(timeout=15)
+        self.assertEqual(code, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Тесты для снимка курсов в общей памяти."""
+
+from __future__ import annotations
+
+import os
+import time
+import unittest
+
+import numpy as np
+
+from myapp.models import Currency
+from myapp.utils import currencies_api
+from myapp.utils.rates import RatesSnapshot
+from myapp.utils.shared_rates import SLOTS, SharedRatesReader, SharedRatesWriter
+
+
+def make_snapshot(usd: float, version: int = 1) -> RatesSnapshot:
+    """Возвращает снимок из трёх валют с курсом доллара usd."""
+    return RatesSnapshot(
+        [
+            Currency(1, 840, "USD", "Доллар США", usd, 1),
+            Currency(2, 978, "EUR", "Евро", 90.5, 1),
+            Currency(3, 398, "KZT", "Казахстанский тенге", 16.7, 100),
+        ],
+        version=version,
+        date="17.10.2026",
+        fetched_at=1_000_000.0,
+    )
+
+
+class SharedRatesTests(unittest.TestCase):
+    """Набор тестов для SharedRatesWriter и SharedRatesReader."""
+
+    def setUp(self) -> None:
+        """Создаёт сегмент общей памяти на 8 валют."""
+        self.writer = SharedRatesWriter(capacity=8)
+        self.reader = self.writer.reader()
+
+    def tearDown(self) -> None:
+        """Удаляет сегмент."""
+        self.reader = None
+        self.writer.close()
+
+    def test_empty_segment_has_no_snapshot(self) -> None:
+        """До первой публикации читать нечего."""
+        self.assertEqual(self.reader.version, 0)
+        self.assertIsNone(self.reader.read())
+
+    def test_roundtrip_without_copies(self) -> None:
+        """Читатель видит те же курсы; массивы — представления общей памяти."""
+        original = make_snapshot(80.75)
+        self.writer.publish(original)
+        snapshot = self.reader.read()
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(snapshot.date, "17.10.2026")
+        self.assertEqual(snapshot.fetched_at, 1_000_000.0)
+        self.assertEqual(snapshot.table.char_codes, ["USD", "EUR", "KZT"])
+        self.assertEqual(snapshot.index["KZT"].name, "Казахстанский тенге")
+        np.testing.assert_array_equal(snapshot.matrix.matrix, original.matrix.matrix)
+        self.assertEqual(snapshot.matrix.codes, original.matrix.codes)
+        self.assertAlmostEqual(snapshot.matrix.convert("USD", "RUB", 2), 161.5)
+        for array in (snapshot.table.values, snapshot.table.ids, snapshot.matrix.matrix):
+            self.assertFalse(array.flags.owndata)
+            self.assertFalse(array.flags.writeable)
+
+    def test_same_version_returns_same_object(self) -> None:
+        """Пока версия не изменилась, повторное чтение ничего не строит."""
+        self.writer.publish(make_snapshot(80.0))
+        first = self.reader.read()
+        self.assertIs(self.reader.read(), first)
+        self.writer.publish(make_snapshot(81.0))
+        second = self.reader.read()
+        self.assertEqual(second.version, 2)
+        self.assertEqual(second.index["USD"].value, 81.0)
+        # Прежний снимок ссылается на свой слот и не меняется
+        self.assertEqual(first.index["USD"].value, 80.0)
+        self.assertEqual(float(first.table.values[0]), 80.0)
+
+    def test_slots_rotate(self) -> None:
+        """Слот снимка перезаписывается только через SLOTS версий."""
+        self.writer.publish(make_snapshot(80.0))
+        first = self.reader.read()
+        for number in range(1, SLOTS):
+            self.writer.publish(make_snapshot(80.0 + number))
+            self.assertEqual(float(first.table.values[0]), 80.0)
+        self.assertEqual(self.reader.read().version, SLOTS)
+
+    def test_capacity_is_checked(self) -> None:
+        """Снимок больше ёмкости сегмента не записывается."""
+        writer = SharedRatesWriter(capacity=2)
+        try:
+            with self.assertRaises(ValueError):
+                writer.publish(make_snapshot(80.0))
+            self.assertEqual(writer.published, 0)
+        finally:
+            writer.close()
+        with self.assertRaises(ValueError):
+            SharedRatesWriter(capacity=0)
+
+    def test_attach_by_name(self) -> None:
+        """Сегмент можно открыть по имени; ёмкость берётся из заголовка."""
+        self.writer.publish(make_snapshot(80.0))
+        reader = SharedRatesReader.attach(self.writer.name)
+        try:
+            self.assertEqual(reader.capacity, 8)
+            self.assertEqual(reader.read().version, 1)
+        finally:
+            reader.close()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "нужен os.fork")
+    def test_forked_reader_sees_new_versions(self) -> None:
+        """Дочерний процесс замечает новую версию без обмена сообщениями."""
+        self.writer.publish(make_snapshot(80.0))
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                os.close(read_end)
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    snapshot = self.reader.read()
+                    if snapshot.version == 2:
+                        os.write(write_end, str(snapshot.index["USD"].value).encode())
+                        code = 0
+                        break
+                    time.sleep(0.001)
+            finally:
+                os._exit(code)
+        os.close(write_end)
+        time.sleep(0.05)
+        self.writer.publish(make_snapshot(82.5))
+        _, status = os.waitpid(pid, 0)
+        with os.fdopen(read_end, "rb") as pipe:
+            self.assertEqual(pipe.read(), b"82.5")
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_get_snapshot_prefers_shared_memory(self) -> None:
+        """get_snapshot читает общую память, если она подключена и не пуста."""
+        self.writer.publish(make_snapshot(77.0))
+        currencies_api.use_shared_rates(self.reader)
+        try:
+            self.assertIs(currencies_api.get_snapshot(), self.reader.read())
+            self.assertEqual(currencies_api.get_currency_table().char_codes[0], "USD")
+        finally:
+            currencies_api.use_shared_rates(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
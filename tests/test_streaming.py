@@ -0,0 +1,83 @@
+"""Тесты для потоковой отдачи страниц (Transfer-Encoding: chunked)."""
+
+from __future__ import annotations
+
+import gzip
+import http.client
+import threading
+import unittest
+
+import myapp.myapp as app
+from myapp.myapp import MyRequestHandler
+from myapp.servers import ThreadPoolHTTPServer
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import request
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class StreamingTests(unittest.TestCase):
+    """Набор тестов для MyRequestHandler._stream_html."""
+
+    def setUp(self) -> None:
+        """Понижает порог потоковой отдачи и запускает сервер."""
+        self.old_rows, self.old_chunk = app.STREAM_MIN_ROWS, app.STREAM_CHUNK_SIZE
+        app.STREAM_MIN_ROWS = 2
+        app.STREAM_CHUNK_SIZE = 64
+        self.httpd = ThreadPoolHTTPServer(("127.0.0.1", 0), MyRequestHandler, max_workers=2)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection(
+            "127.0.0.1", self.httpd.server_address[1], timeout=5
+        )
+
+    def tearDown(self) -> None:
+        """Возвращает пороги и останавливает сервер."""
+        app.STREAM_MIN_ROWS, app.STREAM_CHUNK_SIZE = self.old_rows, self.old_chunk
+        self.connection.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def _get(self, path: str, headers: dict) -> http.client.HTTPResponse:
+        """Отправляет GET-запрос и возвращает ответ (тело прочитано в .data)."""
+        self.connection.request("GET", path, headers=headers)
+        response = self.connection.getresponse()
+        response.data = response.read()  # type: ignore[attr-defined]
+        return response
+
+    def test_users_page_is_chunked(self) -> None:
+        """Большая страница идёт chunked, соединение остаётся открытым."""
+        response = self._get("/users", {})
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertIsNone(response.getheader("Content-Length"))
+        body = response.data.decode("utf-8")  # type: ignore[attr-defined]
+        self.assertIn("Maria", body)
+        self.assertTrue(body.rstrip().endswith("</html>"))
+        self.assertEqual(self._get("/author", {}).status, 200)
+
+    def test_gzip_stream(self) -> None:
+        """Потоковая страница сжимается gzip на лету."""
+        response = self._get("/users", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        body = gzip.decompress(response.data).decode("utf-8")  # type: ignore[attr-defined]
+        self.assertIn("Ivan", body)
+
+    def test_http10_client_gets_close_delimited_body(self) -> None:
+        """Клиенту HTTP/1.0 страница отдаётся до закрытия соединения."""
+        _, headers, body = request(b"GET /users HTTP/1.0\r\n\r\n")
+        self.assertNotIn("Transfer-Encoding", headers)
+        self.assertIn(b"Ali", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
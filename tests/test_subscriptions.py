@@ -0,0 +1,88 @@
+"""Тесты для хранилища подписок SubscriptionStore."""
+
+from __future__ import annotations
+
+import unittest
+
+from myapp.models import Currency, CurrencyTable, UserCurrency
+from myapp.utils.subscriptions import SubscriptionStore
+
+from benchmarks.stub_feed import install_stub_feed, uninstall_stub_feed
+from tests.support import get
+
+
+def setUpModule() -> None:
+    """Направляет get_currencies на локальную заглушку ленты курсов."""
+    install_stub_feed()
+
+
+def tearDownModule() -> None:
+    """Останавливает заглушку ленты курсов."""
+    uninstall_stub_feed()
+
+
+class SubscriptionStoreTests(unittest.TestCase):
+    """Набор тестов для SubscriptionStore."""
+
+    def setUp(self) -> None:
+        """Создаёт хранилище с двумя пользователями."""
+        self.store = SubscriptionStore(
+            UserCurrency.from_rows([(1, 1, 840), (2, 1, 978), (3, 2, 840)])
+        )
+
+    def test_forward_and_reverse_lookup(self) -> None:
+        """Прямой и обратный индексы согласованы."""
+        self.assertEqual(self.store.currencies_of(1), {840, 978})
+        self.assertEqual(self.store.subscribers_of(840), {1, 2})
+        self.assertEqual(self.store.subscriber_count(978), 1)
+        self.assertTrue(self.store.is_subscribed(2, 840))
+        self.assertEqual(self.store.currencies_of(99), frozenset())
+
+    def test_add_is_idempotent_and_continues_ids(self) -> None:
+        """Повторная подписка возвращает прежнюю связь, новые id продолжают нумерацию."""
+        link = self.store.add(2, 978)
+        self.assertEqual(link.id, 4)
+        self.assertEqual(self.store.add(2, 978).id, 4)
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.subscribers_of(978), {1, 2})
+
+    def test_remove_updates_both_indexes(self) -> None:
+        """Удаление подписки убирает её из обоих индексов."""
+        self.assertTrue(self.store.remove(1, 840))
+        self.assertFalse(self.store.remove(1, 840))
+        self.assertEqual(self.store.currencies_of(1), {978})
+        self.assertEqual(self.store.subscribers_of(840), {2})
+        self.assertEqual(self.store.remove_user(1), 1)
+        self.assertEqual(self.store.subscribers_of(978), frozenset())
+        self.assertEqual([link.id for link in self.store.links()], [3])
+
+    def test_invalid_ids_raise(self) -> None:
+        """Некорректные идентификаторы не попадают в индексы."""
+        with self.assertRaises(ValueError):
+            self.store.add(0, 840)
+        with self.assertRaises(TypeError):
+            self.store.add(1, "USD")  # type: ignore[arg-type]
+        self.assertEqual(len(self.store), 3)
+
+    def test_table_select_ids(self) -> None:
+        """Таблица валют отдаёт подписки по идентификаторам в порядке таблицы."""
+        table = CurrencyTable.from_currencies([
+            Currency(840, 840, "USD", "Доллар США", 80.0, 1),
+            Currency(978, 978, "EUR", "Евро", 94.0, 1),
+        ])
+        selected = table.select_ids(self.store.currencies_of(1) | {1})
+        self.assertEqual([c.char_code for c in selected], ["USD", "EUR"])
+
+
+class UserDetailRouteTests(unittest.TestCase):
+    """Набор тестов для страницы пользователя с подписками."""
+
+    def test_user_page_lists_subscriptions(self) -> None:
+        """Страница пользователя показывает его подписки."""
+        body = get("/user?id=1")[2]
+        self.assertIn(b"USD", body)
+        self.assertIn(b"EUR", body)
+
+
+if __name__ == "__main__":
+    unittest.main()